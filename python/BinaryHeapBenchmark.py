@@ -0,0 +1,347 @@
+"""
+Throughput benchmarks for the heap implementations
+
+Usage: python BinaryHeapBenchmark.py [number of elements]
+
+"""
+
+import heapq
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+from BinaryHeap import BinaryHeap
+from ConcurrentBinaryHeap import ConcurrentBinaryHeap
+from FastBinaryHeap import FastBinaryHeap
+from IndexedBinaryHeap import IndexedBinaryHeap
+from PairingHeap import PairingHeap
+from TimerWheel import TimerWheel
+from TopK import TopK
+
+HEAPS = [BinaryHeap, FastBinaryHeap]
+
+
+# Returns the number of operations per second achieved by fn over n operations
+def ops_per_second(fn, n):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return n / elapsed if elapsed > 0 else float('inf')
+
+
+# Pushes every element, then polls them all
+def bench_push_pop(cls, elems):
+    heap = cls()
+
+    def push():
+        for elem in elems:
+            heap.add(elem)
+
+    def pop():
+        for _ in elems:
+            heap.poll()
+
+    return ops_per_second(push, len(elems)), ops_per_second(pop, len(elems))
+
+
+def bench_heapify(cls, elems):
+    return ops_per_second(lambda: cls(elems), len(elems))
+
+
+# The same workloads on a plain list through the heapq functions
+def bench_heapq_push_pop(elems):
+    heap = []
+
+    def push():
+        for elem in elems:
+            heapq.heappush(heap, elem)
+
+    def pop():
+        for _ in elems:
+            heapq.heappop(heap)
+
+    return ops_per_second(push, len(elems)), ops_per_second(pop, len(elems))
+
+
+def bench_heapq_heapify(elems):
+    return ops_per_second(lambda: heapq.heapify(list(elems)), len(elems))
+
+
+# Adds a batch to a heap one element at a time and with add_all
+def bench_add_all(cls, elems, batch):
+    one_by_one = cls(elems)
+    batched = cls(elems)
+
+    def run_loop():
+        for elem in batch:
+            one_by_one.add(elem)
+
+    loop = ops_per_second(run_loop, len(batch))
+    bulk = ops_per_second(lambda: batched.add_all(batch), len(batch))
+    return loop, bulk
+
+
+ARITIES = [2, 3, 4, 8, 16]
+
+
+# Runs a mix of adds and polls on a heap which already holds the elements.
+# push_ratio is the fraction of the operations which are adds.
+def bench_mix(heap, elems, push_ratio):
+    rnd = random.Random(1)
+    ops = [rnd.random() < push_ratio for _ in elems]
+
+    def run():
+        for push, elem in zip(ops, elems):
+            if push:
+                heap.add(elem)
+            else:
+                heap.poll()
+
+    return ops_per_second(run, len(elems))
+
+
+# Orders records by a field, once through key= and once by wrapping each
+# record in a (field, sequence number, record) tuple
+def bench_key(cls, records):
+    field = lambda record: record[1]
+
+    def run_key():
+        heap = cls(key=field)
+        for record in records:
+            heap.add(record)
+        for _ in records:
+            heap.poll()
+
+    def run_tuples():
+        heap = cls()
+        for i, record in enumerate(records):
+            heap.add((record[1], i, record))
+        for _ in records:
+            heap.poll()
+
+    n = 2 * len(records)
+    return ops_per_second(run_key, n), ops_per_second(run_tuples, n)
+
+
+# Finds the k largest elements of a stream
+def bench_top_k(elems, k):
+    def run_heap():
+        heap = FastBinaryHeap()
+        for elem in elems:
+            heap.add(elem)
+            if len(heap) > k:
+                heap.poll()
+
+    top_k = ops_per_second(lambda: TopK(k, iter(elems)), len(elems))
+    heap = ops_per_second(run_heap, len(elems))
+    nlargest = ops_per_second(lambda: heapq.nlargest(k, iter(elems)), len(elems))
+    return top_k, heap, nlargest
+
+
+# Merges shards of the elements pairwise until one heap is left, then polls
+# one element per shard, repeating rounds times. Returns elements merged
+# per second.
+def bench_meld(cls, elems, shards, rounds):
+    size = len(elems) // shards
+    parts = [elems[i * size:(i + 1) * size] for i in range(shards)]
+
+    if cls is PairingHeap:
+        def merge(a, b):
+            a.meld(b)
+            return a
+    elif cls is list:
+        def merge(a, b):
+            a += b
+            heapq.heapify(a)
+            return a
+    else:
+        def merge(a, b):
+            a.add_all(b.heap[:len(b)])
+            return a
+
+    elapsed = 0
+    for _ in range(rounds):
+        heaps = [list(part) if cls is list else cls(part) for part in parts]
+        start = time.perf_counter()
+        while len(heaps) > 1:
+            heaps = [merge(heaps[i], heaps[i + 1]) if i + 1 < len(heaps) else heaps[i]
+                     for i in range(0, len(heaps), 2)]
+        for _ in range(shards):
+            heapq.heappop(heaps[0]) if cls is list else heaps[0].poll()
+        elapsed += time.perf_counter() - start
+    merged = rounds * size * shards
+    return merged / elapsed if elapsed > 0 else float('inf')
+
+
+# Threads add their share of the elements to one queue while a consumer
+# thread drains it, adding batch elements per call (one at a time for 1)
+def bench_producers(elems, threads, batch):
+    queue = ConcurrentBinaryHeap()
+    share = len(elems) // threads
+
+    def produce(t):
+        mine = elems[t * share:(t + 1) * share]
+        if batch == 1:
+            for elem in mine:
+                queue.add(elem)
+        else:
+            for i in range(0, len(mine), batch):
+                queue.add_all(mine[i:i + batch])
+
+    def consume():
+        for _ in range(share * threads):
+            queue.poll()
+
+    def run():
+        workers = [threading.Thread(target=produce, args=(t,)) for t in range(threads)]
+        workers.append(threading.Thread(target=consume))
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    return ops_per_second(run, share * threads)
+
+
+# A connection opens every 0.1 ms with a timeout of 1 to 10 s, and
+# cancel_ratio of the timeouts are cancelled before they fire. Returns the
+# (time, 0, id, deadline) and (time, 1, id, None) events in time order.
+def timeout_events(n, cancel_ratio):
+    rnd = random.Random(1)
+    events = []
+    for i in range(n):
+        start = i * 0.0001
+        timeout = rnd.uniform(1, 10)
+        events.append((start, 0, i, start + timeout))
+        if rnd.random() < cancel_ratio:
+            events.append((start + rnd.random() * timeout, 1, i, None))
+    events.sort()
+    return events
+
+
+# Runs the events against a timeout queue, expiring timers every millisecond
+def run_timeouts(kind, events):
+    resolution = 0.001
+    last = 0
+    if kind == "TimerWheel":
+        wheel = TimerWheel(resolution)
+        timers = {}
+        for now, op, i, deadline in events:
+            if now - last >= resolution:
+                for expired in wheel.tick(now):
+                    del timers[expired]
+                last = now
+            if op == 0:
+                timers[i] = wheel.schedule(deadline, i)
+            else:
+                wheel.cancel(timers.pop(i))
+    elif kind == "IndexedBinaryHeap":
+        heap = IndexedBinaryHeap()
+        for now, op, i, deadline in events:
+            if now - last >= resolution:
+                while heap and heap.peek()[1] <= now:
+                    heap.poll()
+                last = now
+            if op == 0:
+                heap.add(i, deadline)
+            else:
+                heap.remove(i)
+    else:
+        # heapq with cancelled entries left in place until they reach the top
+        heap = []
+        entries = {}
+        for now, op, i, deadline in events:
+            if now - last >= resolution:
+                while heap and heap[0][0] <= now:
+                    _, expired, alive = heapq.heappop(heap)
+                    if alive:
+                        del entries[expired]
+                last = now
+            if op == 0:
+                entry = [deadline, i, True]
+                entries[i] = entry
+                heapq.heappush(heap, entry)
+            else:
+                entries.pop(i)[2] = False
+
+
+# Returns the events handled per second and the peak memory in bytes
+def bench_timeouts(kind, events):
+    rate = ops_per_second(lambda: run_timeouts(kind, events), len(events))
+    tracemalloc.start()
+    run_timeouts(kind, events)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rate, peak
+
+
+def main(n):
+    elems = [random.random() for _ in range(n)]
+    print("n = %d" % n)
+    for cls in HEAPS:
+        push, pop = bench_push_pop(cls, elems)
+        heapify = bench_heapify(cls, elems)
+        print("%-16s push %10.0f ops/s  poll %10.0f ops/s  heapify %11.0f elems/s"
+              % (cls.__name__, push, pop, heapify))
+    push, pop = bench_heapq_push_pop(elems)
+    heapify = bench_heapq_heapify(elems)
+    print("%-16s push %10.0f ops/s  poll %10.0f ops/s  heapify %11.0f elems/s"
+          % ("heapq", push, pop, heapify))
+
+    push, pop = bench_push_pop(PairingHeap, elems)
+    heapify = bench_heapify(PairingHeap, elems)
+    print("%-16s push %10.0f ops/s  poll %10.0f ops/s  heapify %11.0f elems/s"
+          % ("PairingHeap", push, pop, heapify))
+
+    # Batches larger than REHEAPIFY_FACTOR times the heap make add_all
+    # heapify again on the heaps which set it
+    small = elems[:n // 10]
+    batches = [("random", elems), ("descending", sorted(elems, reverse=True))]
+    for name, batch in batches:
+        print("adding n %s elements to a heap of n/10" % name)
+        for cls in HEAPS:
+            loop, bulk = bench_add_all(cls, small, batch)
+            print("%-16s add %10.0f elems/s  add_all %10.0f elems/s" % (cls.__name__, loop, bulk))
+
+    mixes = [("push heavy", 0.9), ("balanced", 0.5), ("pop heavy", 0.1)]
+    print("arity sweep, heap of n holding random elements, n operations")
+    for cls in HEAPS:
+        for name, push_ratio in mixes:
+            line = "%-16s %-11s" % (cls.__name__, name)
+            for d in ARITIES:
+                line += "  d=%-2d %9.0f" % (d, bench_mix(cls(elems, arity=d), elems, push_ratio))
+            print(line + "  ops/s")
+
+    records = [(str(i), elem) for i, elem in enumerate(elems)]
+    print("records ordered by a field, n adds then n polls")
+    for cls in HEAPS:
+        keyed, tuples = bench_key(cls, records)
+        print("%-16s key= %10.0f ops/s  tuples %10.0f ops/s" % (cls.__name__, keyed, tuples))
+
+    for shards in (16, 1024):
+        print("merging %d shards of n/%d elements pairwise, then polling %d" % (shards, shards, shards))
+        for cls in HEAPS + [PairingHeap, list]:
+            name = "heapq" if cls is list else cls.__name__
+            print("%-16s %10.0f elems merged/s" % (name, bench_meld(cls, elems, shards, 3)))
+
+    print("4 producer threads and 1 consumer thread on a ConcurrentBinaryHeap")
+    for batch in (1, 16, 256):
+        print("batch %-4d %10.0f elems/s" % (batch, bench_producers(elems, 4, batch)))
+
+    for cancel_ratio in (0.5, 0.9):
+        events = timeout_events(n, cancel_ratio)
+        print("%d timeouts, %d%% cancelled before they fire" % (n, cancel_ratio * 100))
+        for kind in ("TimerWheel", "IndexedBinaryHeap", "heapq"):
+            rate, peak = bench_timeouts(kind, events)
+            print("%-17s %10.0f events/s  peak %7.1f MB" % (kind, rate, peak / 2**20))
+
+    for k in (10, 1000):
+        top_k, heap, nlargest = bench_top_k(elems, k)
+        print("top %-5d TopK %10.0f elems/s  add+poll %10.0f elems/s  heapq.nlargest %10.0f elems/s"
+              % (k, top_k, heap, nlargest))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10**6)
@@ -6,16 +6,18 @@ import random
 class BinaryHeapTest(unittest.TestCase):
     LOOPS = 1000
     MAX_SZ = 100
+    # The heap class under test, overridden by the tests of its subclasses
+    HEAP = BinaryHeap
 
     def testEmpty(self):
-        q = BinaryHeap()
+        q = self.HEAP()
         self.assertEqual(len(q), 0)
         self.assertTrue(not q)
         self.assertEqual(q.poll(), None)
         self.assertEqual(q.peek(), None)
 
     def testHeapProperty(self):
-        q = BinaryHeap()
+        q = self.HEAP()
         nums = [3, 2, 5, 6, 7, 9, 4, 8, 1]
 
         # Try manually creating heap
@@ -28,14 +30,14 @@ class BinaryHeapTest(unittest.TestCase):
         q.clear()
 
         # Try heapify constructor
-        q = BinaryHeap(elems=nums)
+        q = self.HEAP(elems=nums)
         for i in range(1, 10):
             self.assertTrue(i == q.poll())
 
     def testHeapify(self):
         for i in range(1, self.LOOPS):
             lst = self.genRandList(i)
-            pq = BinaryHeap(elems=lst)
+            pq = self.HEAP(elems=lst)
             pq2 = []
             for x in lst:
                 heapq.heappush(pq2, x)
@@ -44,16 +46,119 @@ class BinaryHeapTest(unittest.TestCase):
             while pq2:
                 self.assertEqual(pq.poll(), heapq.heappop(pq2))
 
+    def testAddAll(self):
+        for i in range(self.LOOPS // 10):
+            pq1 = self.genRandList(random.randint(0, self.MAX_SZ))
+            heapq.heapify(pq1)
+            pq2 = self.HEAP(list(pq1))
+            # Small batches are sifted in, large ones trigger a heapify on
+            # heaps with a REHEAPIFY_FACTOR
+            for sz in (1, 3, i, self.MAX_SZ * 2):
+                batch = self.genRandList(sz)
+                for val in batch:
+                    heapq.heappush(pq1, val)
+                pq2.add_all(iter(batch))
+                self.assertTrue(pq2.isMinHeap(0))
+                self.assertEqual(len(pq1), len(pq2))
+            self.assertEqual([heapq.heappop(pq1) for _ in range(len(pq1))], pq2.poll_many(len(pq2) + 5))
+
+        pq = self.HEAP([3, 1])
+        with self.assertRaises(ValueError):
+            pq.add_all([2, None])
+        self.assertEqual(2, len(pq))
+
+    def testPollMany(self):
+        pq = self.HEAP([5, 3, 8, 1, 9, 2])
+        self.assertEqual([1, 2, 3], pq.poll_many(3))
+        self.assertEqual([], pq.poll_many(0))
+        self.assertEqual([5, 8, 9], pq.poll_many(10))
+        with self.assertRaises(ValueError):
+            pq.poll_many(-1)
+
+    def testReplaceTop(self):
+        pq = self.HEAP([5, 3, 8])
+        self.assertEqual(3, pq.replace_top(9))
+        self.assertEqual(5, pq.replace_top(1))
+        self.assertTrue(pq.isMinHeap(0))
+        self.assertEqual([1, 8, 9], pq.poll_many(3))
+        self.assertIsNone(pq.replace_top(4))
+        self.assertEqual(4, pq.peek())
+
+    def testArity(self):
+        with self.assertRaises(ValueError):
+            self.HEAP(arity=1)
+        for arity in range(2, 9):
+            for sz in range(0, self.MAX_SZ, 7):
+                nums = self.genRandList(sz)
+                pq1 = list(nums)
+                heapq.heapify(pq1)
+                pq2 = self.HEAP(nums, arity=arity)
+                self.assertTrue(pq2.isMinHeap(0))
+                for _ in range(sz * 2):
+                    r = random.random()
+                    if r < 0.4:
+                        val = random.randint(-sz, sz)
+                        heapq.heappush(pq1, val)
+                        pq2.add(val)
+                    elif r < 0.8:
+                        self.assertEqual(heapq.heappop(pq1) if pq1 else None, pq2.poll())
+                    elif pq1:
+                        val = random.choice(pq1)
+                        pq1.remove(val)
+                        heapq.heapify(pq1)
+                        pq2.remove(val)
+                    self.assertEqual(pq1[0] if pq1 else None, pq2.peek())
+                self.assertTrue(pq2.isMinHeap(0))
+                self.assertEqual(sorted(pq1), pq2.poll_many(len(pq2)))
+
+    def testKeyAndReverse(self):
+        records = [{"name": str(i), "priority": random.randint(0, self.MAX_SZ)}
+                   for i in range(self.MAX_SZ)]
+        byPriority = lambda record: record["priority"]
+        for arity in (2, 3):
+            for reverse in (False, True):
+                expected = sorted(records, key=byPriority, reverse=reverse)
+                pq = self.HEAP(records[:10], arity=arity, key=byPriority, reverse=reverse)
+                pq.add_all(records[10:20])
+                for record in records[20:]:
+                    pq.add(record)
+                self.assertTrue(pq.isMinHeap(0))
+                removed = records[5]
+                pq.remove(removed)
+                expected.remove(removed)
+                self.assertEqual([byPriority(r) for r in expected],
+                                 [byPriority(r) for r in pq.poll_many(len(pq))])
+
+        # A max heap of plain elements
+        nums = self.genRandList(self.MAX_SZ)
+        pq = self.HEAP(nums, reverse=True)
+        self.assertEqual(max(nums), pq.peek())
+        self.assertEqual(max(nums), pq.replace_top(min(nums) - 1))
+        self.assertEqual(sorted(nums, reverse=True)[1:] + [min(nums) - 1], pq.poll_many(len(pq)))
+
+    # The key function runs once per element, never during comparisons
+    def testKeyCalledOnce(self):
+        calls = [0]
+        def key(elem):
+            calls[0] += 1
+            return -elem
+        nums = self.genRandList(self.MAX_SZ)
+        pq = self.HEAP(nums[:self.MAX_SZ // 2], key=key)
+        for val in nums[self.MAX_SZ // 2:]:
+            pq.add(val)
+        self.assertEqual(sorted(nums, reverse=True), pq.poll_many(len(nums)))
+        self.assertEqual(len(nums), calls[0])
+
     def testClear(self):
         strs = ["aa", "bb", "cc", "dd", "ee"]
-        q = BinaryHeap(strs)
+        q = self.HEAP(strs)
         q.clear()
         self.assertEqual(len(q), 0)
         self.assertTrue(not q)
 
     def testContainment(self):
         strs = ["aa", "bb", "cc", "dd", "ee"]
-        q = BinaryHeap(strs)
+        q = self.HEAP(strs)
         q.remove("aa")
         self.assertFalse(q.contains("aa"))
         q.remove("bb")
@@ -69,7 +174,7 @@ class BinaryHeapTest(unittest.TestCase):
         for i in range(self.LOOPS):
             randNums = self.genRandList(100)
             built_in_pq = []
-            pq = BinaryHeap()
+            pq = self.HEAP()
             for j in range(len(randNums)):
                 heapq.heappush(built_in_pq, randNums[j])
                 pq.add(randNums[j])
@@ -83,7 +188,7 @@ class BinaryHeapTest(unittest.TestCase):
 
     def sequentialRemoving(self, arr, removeOrder):
         self.assertEqual(len(arr), len(removeOrder))
-        pq = BinaryHeap(arr)
+        pq = self.HEAP(arr)
         built_in_pq = []
         for val in arr:
             heapq.heappush(built_in_pq, val)
@@ -123,7 +228,7 @@ class BinaryHeapTest(unittest.TestCase):
 
     def testRemovingDuplicates(self):
         arr = [2, 7, 2, 11, 7, 13, 2]
-        pq = BinaryHeap(arr)
+        pq = self.HEAP(arr)
 
         self.assertTrue(pq.peek() == 2)
         pq.add(3)
@@ -142,7 +247,7 @@ class BinaryHeapTest(unittest.TestCase):
             sz = i
             randNums = self.genRandList(sz)
             pq1 = []
-            pq2 = BinaryHeap()
+            pq2 = self.HEAP()
 
             # Add all the elements to both priority queues
             for val in randNums:
@@ -168,7 +273,7 @@ class BinaryHeapTest(unittest.TestCase):
             sz = i
             randNums = self.genRandList(sz)
             pq1 = []
-            pq2 = BinaryHeap()
+            pq2 = self.HEAP()
 
             # Add all the elements to both priority queues
             for val in randNums:
@@ -196,7 +301,7 @@ class BinaryHeapTest(unittest.TestCase):
         SZs = self.genUniqueRandList(self.LOOPS)
 
         PQ = []
-        pq = BinaryHeap()
+        pq = self.HEAP()
 
         for sz in SZs:
             pq.clear()
@@ -0,0 +1,242 @@
+"""
+Bounded LRU and LFU caches
+
+Both caches pair a HashTableSeparateChaining, which maps each key to its node
+in a DoublyLinkedList, with the list itself, which keeps the entries in
+eviction order. The node handles let get, put and evict all run in O(1).
+
+The LRU cache keeps a single list ordered by recency. The LFU cache keeps one
+list per access frequency and the smallest frequency in use, as described in
+"An O(1) algorithm for implementing the LFU cache eviction scheme" by Shah,
+Mitra and Matani. Entries with the same frequency are evicted least recently
+used first.
+
+A cache can be bounded by the number of entries, by the total size of the
+values in bytes as measured by sizeOf, or by both.
+
+"""
+
+import sys
+from abc import ABC, abstractmethod
+
+from DoublyLinkedList import DoublyLinkedList
+from HashTableSeparateChaining import HashTableSeparateChaining
+
+class CacheEntry:
+    __slots__ = ("key", "value", "size", "frequency")
+
+    def __init__(self, key, value, size):
+        self.key = key
+        self.value = value
+        self.size = size
+        self.frequency = 1
+
+class BoundedCache(ABC):
+    # onEvict(key, value) is called for every entry evicted to make room,
+    # but not for entries which are removed or cleared explicitly
+    def __init__(self, maxEntries=None, maxBytes=None, sizeOf=sys.getsizeof, onEvict=None):
+        if maxEntries is None and maxBytes is None:
+            raise ValueError("Either maxEntries or maxBytes must be given")
+        if maxEntries is not None and maxEntries <= 0:
+            raise ValueError("Illegal maxEntries: " + str(maxEntries))
+        if maxBytes is not None and maxBytes <= 0:
+            raise ValueError("Illegal maxBytes: " + str(maxBytes))
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.sizeOf = sizeOf
+        self.onEvict = onEvict
+        # Maps each key to its node, whose data is the key's CacheEntry
+        self.nodes = HashTableSeparateChaining()
+        self.totalBytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __bool__(self):
+        return len(self.nodes) != 0
+
+    # Checks for a key without counting a hit or miss or touching its entry
+    def __contains__(self, key):
+        return key in self.nodes
+
+    # Returns the value of a key, or None on a miss
+    def get(self, key):
+        node = self.nodes[key]
+        if node is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._touch(node).data.value
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    # Inserts or updates a key, evicting entries until it fits, and returns
+    # its previous value. A value larger than maxBytes is evicted straight away.
+    def put(self, key, value):
+        if key is None:
+            raise ValueError("Null key")
+        size = 0 if self.maxBytes is None else self.sizeOf(value)
+
+        node = self.nodes[key]
+        if node is not None:
+            entry = node.data
+            oldValue = entry.value
+            self.totalBytes += size - entry.size
+            entry.value = value
+            entry.size = size
+            self._touch(node)
+            # The value may have grown
+            while self.maxBytes is not None and self.totalBytes > self.maxBytes:
+                self.__evictOne()
+            return oldValue
+
+        if self.maxBytes is not None and size > self.maxBytes:
+            self.__evicted(key, value)
+            return None
+        while (self.maxEntries is not None and len(self.nodes) >= self.maxEntries) or \
+              (self.maxBytes is not None and self.totalBytes + size > self.maxBytes):
+            self.__evictOne()
+
+        self.nodes[key] = self._insert(CacheEntry(key, value, size))
+        self.totalBytes += size
+        return None
+
+    def __setitem__(self, key, value):
+        return self.put(key, value)
+
+    # Removes a key and returns its value, or None if it does not exist
+    def remove(self, key):
+        node = self.nodes.remove(key)
+        if node is None:
+            return None
+        self._unlink(node)
+        self.totalBytes -= node.data.size
+        return node.data.value
+
+    def clear(self):
+        self.nodes.clear()
+        self._clearLists()
+        self.totalBytes = 0
+
+    # Returns the hit, miss and eviction counters
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.nodes),
+            "bytes": self.totalBytes,
+        }
+
+    def __evictOne(self):
+        node = self._victim()
+        entry = node.data
+        self._unlink(node)
+        self.nodes.remove(entry.key)
+        self.totalBytes -= entry.size
+        self.__evicted(entry.key, entry.value)
+
+    def __evicted(self, key, value):
+        self.evictions += 1
+        if self.onEvict is not None:
+            self.onEvict(key, value)
+
+    # Records an access to the node's entry and returns its (possibly new) node
+    @abstractmethod
+    def _touch(self, node):
+        pass
+
+    # Adds a new entry to the eviction order and returns its node
+    @abstractmethod
+    def _insert(self, entry):
+        pass
+
+    # Removes a node from the eviction order
+    @abstractmethod
+    def _unlink(self, node):
+        pass
+
+    # Returns the node which should be evicted next
+    @abstractmethod
+    def _victim(self):
+        pass
+
+    @abstractmethod
+    def _clearLists(self):
+        pass
+
+class LRUCache(BoundedCache):
+    def __init__(self, maxEntries=None, maxBytes=None, sizeOf=sys.getsizeof, onEvict=None):
+        super().__init__(maxEntries, maxBytes, sizeOf, onEvict)
+        # Most recently used entry first
+        self.order = DoublyLinkedList()
+
+    def _touch(self, node):
+        self.order.moveToFirst(node)
+        return node
+
+    def _insert(self, entry):
+        return self.order.addFirst(entry)
+
+    def _unlink(self, node):
+        self.order.removeNode(node)
+
+    def _victim(self):
+        return self.order.tail
+
+    def _clearLists(self):
+        self.order.clear()
+
+class LFUCache(BoundedCache):
+    def __init__(self, maxEntries=None, maxBytes=None, sizeOf=sys.getsizeof, onEvict=None):
+        super().__init__(maxEntries, maxBytes, sizeOf, onEvict)
+        # Maps an access frequency to the list of entries with that frequency,
+        # most recently used first. Empty lists are dropped.
+        self.frequencies = HashTableSeparateChaining()
+        self.minFrequency = 0
+
+    # Moves the entry to the list of the next frequency. The node belongs
+    # to another list afterwards, so a new node is returned.
+    def _touch(self, node):
+        entry = node.data
+        self._unlink(node)
+        if self.minFrequency == entry.frequency and entry.frequency not in self.frequencies:
+            self.minFrequency += 1
+        entry.frequency += 1
+        newNode = self.__listFor(entry.frequency).addFirst(entry)
+        self.nodes[entry.key] = newNode
+        return newNode
+
+    def _insert(self, entry):
+        self.minFrequency = 1
+        return self.__listFor(1).addFirst(entry)
+
+    def _unlink(self, node):
+        frequency = node.data.frequency
+        entries = self.frequencies[frequency]
+        entries.removeNode(node)
+        if entries.isEmpty():
+            self.frequencies.remove(frequency)
+
+    # The least recently used entry among the least frequently used ones.
+    # An explicit remove can empty the list of minFrequency, in which case
+    # the smallest frequency still in use is searched for once.
+    def _victim(self):
+        if self.minFrequency not in self.frequencies:
+            self.minFrequency = min(self.frequencies.keys())
+        return self.frequencies[self.minFrequency].tail
+
+    def _clearLists(self):
+        self.frequencies.clear()
+        self.minFrequency = 0
+
+    def __listFor(self, frequency):
+        entries = self.frequencies[frequency]
+        if entries is None:
+            entries = DoublyLinkedList()
+            self.frequencies[frequency] = entries
+        return entries
@@ -0,0 +1,146 @@
+from Cache import BoundedCache, LRUCache, LFUCache
+from collections import OrderedDict
+import random
+import unittest
+
+class CacheTest(unittest.TestCase):
+    LOOPS = random.randint(2500, 7500)
+    MAX_ENTRIES = random.randint(1, 50)
+    MAX_RAND_NUM = random.randint(1, 150)
+
+    def testIllegalCreation(self):
+        with self.assertRaises(ValueError):
+            LRUCache()
+        with self.assertRaises(ValueError):
+            LRUCache(0)
+        with self.assertRaises(ValueError):
+            LFUCache(maxBytes=-1)
+
+    def testAbstractBase(self):
+        with self.assertRaises(TypeError):
+            BoundedCache(5)
+
+    def testNullKey(self):
+        with self.assertRaises(ValueError):
+            LRUCache(5)[None] = 1
+
+    def testLRUOrder(self):
+        evicted = []
+        cache = LRUCache(3, onEvict=lambda key, value: evicted.append((key, value)))
+        cache["a"] = 1
+        cache["b"] = 2
+        cache["c"] = 3
+        self.assertEqual(1, cache["a"])
+        cache["d"] = 4
+        self.assertEqual([("b", 2)], evicted)
+        self.assertEqual(3, cache.put("c", 30))
+        cache["e"] = 5
+        self.assertEqual([("b", 2), ("a", 1)], evicted)
+        self.assertEqual({"c", "d", "e"}, {key for key in ("a", "b", "c", "d", "e") if key in cache})
+
+        self.assertIsNone(cache["a"])
+        stats = cache.stats()
+        self.assertEqual(1, stats["hits"])
+        self.assertEqual(1, stats["misses"])
+        self.assertEqual(2, stats["evictions"])
+        self.assertEqual(0.5, stats["hit_rate"])
+
+    def testLFUOrder(self):
+        cache = LFUCache(2)
+        cache["a"] = 1
+        cache["b"] = 2
+        cache["a"]
+        cache["a"]
+        cache["b"]
+        cache["c"] = 3
+        self.assertFalse("b" in cache)
+        cache["c"]
+        cache["d"] = 4
+        self.assertFalse("c" in cache)
+        self.assertTrue("a" in cache)
+
+        # Removing the least frequently used entry leaves minFrequency stale
+        self.assertEqual(4, cache.remove("d"))
+        cache["e"] = 5
+        cache["f"] = 6
+        self.assertEqual(["a", "f"], sorted(key for key in "abcdef" if key in cache))
+
+    def testByteCapacity(self):
+        evicted = []
+        cache = LRUCache(maxBytes=10, sizeOf=len, onEvict=lambda key, value: evicted.append(key))
+        cache["a"] = "xxxx"
+        cache["b"] = "xxxx"
+        cache["c"] = "xx"
+        self.assertEqual(10, cache.totalBytes)
+        cache["d"] = "x"
+        self.assertEqual(["a"], evicted)
+        self.assertEqual(7, cache.totalBytes)
+
+        # Growing a value evicts the least recently used entries
+        cache["d"] = "xxxxxxx"
+        self.assertEqual(["a", "b"], evicted)
+        self.assertEqual(9, cache.totalBytes)
+
+        # A value which can never fit is evicted straight away
+        cache["e"] = "x" * 11
+        self.assertEqual(["a", "b", "e"], evicted)
+        self.assertEqual(2, len(cache))
+
+        self.assertEqual("xx", cache.remove("c"))
+        self.assertEqual(7, cache.totalBytes)
+        cache.clear()
+        self.assertEqual(0, cache.totalBytes)
+        self.assertEqual(0, len(cache))
+
+    def testRandomLRUOperations(self):
+        cache = LRUCache(self.MAX_ENTRIES)
+        model = OrderedDict()
+        for _ in range(self.LOOPS):
+            key = random.randint(-self.MAX_RAND_NUM, self.MAX_RAND_NUM)
+            r = random.random()
+            if r < 0.5:
+                self.assertEqual(model.get(key, None), cache.put(key, r))
+                if key not in model and len(model) == self.MAX_ENTRIES:
+                    model.popitem(last=False)
+                model[key] = r
+                model.move_to_end(key)
+            elif r < 0.9:
+                self.assertEqual(model.get(key, None), cache.get(key))
+                if key in model:
+                    model.move_to_end(key)
+            else:
+                self.assertEqual(model.pop(key, None), cache.remove(key))
+            self.assertEqual(len(model), len(cache))
+
+    # Compares against a model which evicts the entry with the smallest
+    # (frequency, time of last access)
+    def testRandomLFUOperations(self):
+        cache = LFUCache(self.MAX_ENTRIES)
+        model = {}
+        for clock in range(self.LOOPS):
+            key = random.randint(-self.MAX_RAND_NUM, self.MAX_RAND_NUM)
+            r = random.random()
+            if r < 0.5:
+                old = model.get(key, None)
+                self.assertEqual(None if old is None else old[0], cache.put(key, r))
+                if old is None:
+                    if len(model) == self.MAX_ENTRIES:
+                        victim = min(model, key=lambda k: (model[k][1], model[k][2]))
+                        del model[victim]
+                    model[key] = [r, 1, clock]
+                else:
+                    model[key] = [r, old[1] + 1, clock]
+            elif r < 0.9:
+                entry = model.get(key, None)
+                self.assertEqual(None if entry is None else entry[0], cache.get(key))
+                if entry is not None:
+                    entry[1] += 1
+                    entry[2] = clock
+            else:
+                entry = model.pop(key, None)
+                self.assertEqual(None if entry is None else entry[0], cache.remove(key))
+            self.assertEqual(len(model), len(cache))
+
+
+if __name__ == "__main__":
+    unittest.main()
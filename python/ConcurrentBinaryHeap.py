@@ -0,0 +1,142 @@
+"""
+Thread-safe priority queues built on a FastBinaryHeap
+
+LockedBinaryHeap guards a heap with a single lock, which is held only for
+the heap operation itself. add_all adds a whole batch under one acquisition
+of the lock, so producers which batch their elements contend far less than
+producers which add them one at a time. The batch is copied into a list
+before the lock is taken, so a slow generator never stalls the consumers.
+
+ConcurrentBinaryHeap adds a poll which blocks on a condition variable until
+an element arrives. AsyncBinaryHeap adds a poll which is a coroutine and
+suspends the calling task instead. Its waiters are futures which are
+resolved through their event loop's call_soon_threadsafe, so elements can
+be added from any thread, including ones without an event loop.
+
+Polls which time out return None, which is never a valid element.
+
+"""
+
+import asyncio
+import collections
+import threading
+
+from FastBinaryHeap import FastBinaryHeap
+
+class LockedBinaryHeap:
+    def __init__(self, elems=None, arity=2, key=None, reverse=False):
+        self.heap = FastBinaryHeap(elems, arity, key, reverse)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __bool__(self):
+        return bool(self.heap)
+
+    def peek(self):
+        with self.lock:
+            return self.heap.peek()
+
+    def add(self, elem):
+        with self.lock:
+            self.heap.add(elem)
+            self._notify(1)
+
+    # Adds a batch of elements under a single acquisition of the lock
+    def add_all(self, elems):
+        elems = list(elems)
+        with self.lock:
+            self.heap.add_all(elems)
+            self._notify(len(elems))
+
+    # Removes the smallest element without waiting, or returns None if the
+    # queue is empty
+    def poll_nowait(self):
+        with self.lock:
+            return self.heap.poll()
+
+    # Removes up to k of the smallest elements under a single acquisition of
+    # the lock, without waiting
+    def poll_many(self, k):
+        with self.lock:
+            return self.heap.poll_many(k)
+
+    def clear(self):
+        with self.lock:
+            self.heap.clear()
+
+    # Wakes up to n waiting consumers. Called with the lock held.
+    def _notify(self, n):
+        pass
+
+    def __str__(self):
+        with self.lock:
+            return str(self.heap)
+
+class ConcurrentBinaryHeap(LockedBinaryHeap):
+    def __init__(self, elems=None, arity=2, key=None, reverse=False):
+        super().__init__(elems, arity, key, reverse)
+        self.notEmpty = threading.Condition(self.lock)
+
+    # Removes the smallest element, waiting up to timeout seconds for one to
+    # arrive, or forever if timeout is None. Returns None on timeout.
+    def poll(self, timeout=None):
+        with self.notEmpty:
+            if not self.notEmpty.wait_for(self.heap.__len__, timeout):
+                return None
+            return self.heap.poll()
+
+    def _notify(self, n):
+        self.notEmpty.notify(n)
+
+class AsyncBinaryHeap(LockedBinaryHeap):
+    def __init__(self, elems=None, arity=2, key=None, reverse=False):
+        super().__init__(elems, arity, key, reverse)
+        # (event loop, future) of every suspended poll, oldest first
+        self.waiters = collections.deque()
+
+    # Removes the smallest element, suspending the task for up to timeout
+    # seconds until one arrives, or forever if timeout is None. Returns None
+    # on timeout.
+    async def poll(self, timeout=None):
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            with self.lock:
+                if self.heap:
+                    return self.heap.poll()
+                if deadline is not None and loop.time() >= deadline:
+                    return None
+                waiter = (loop, loop.create_future())
+                self.waiters.append(waiter)
+            try:
+                remaining = None if deadline is None else deadline - loop.time()
+                await asyncio.wait_for(waiter[1], remaining)
+            except asyncio.TimeoutError:
+                self.__abandon(waiter)
+                return None
+            except asyncio.CancelledError:
+                self.__abandon(waiter)
+                raise
+
+    # Forgets a waiter which stopped waiting
+    def __abandon(self, waiter):
+        with self.lock:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+            elif self.heap:
+                # A producer picked this waiter just before it gave up, so
+                # pass the wake-up on to the next one
+                self._notify(1)
+
+    def _notify(self, n):
+        waiters = self.waiters
+        for _ in range(min(n, len(waiters))):
+            loop, future = waiters.popleft()
+            loop.call_soon_threadsafe(self.__wake, future)
+
+    @staticmethod
+    def __wake(future):
+        if not future.done():
+            future.set_result(None)
@@ -0,0 +1,173 @@
+from ConcurrentBinaryHeap import ConcurrentBinaryHeap, AsyncBinaryHeap
+import asyncio
+import random
+import threading
+import time
+import unittest
+
+class ConcurrentBinaryHeapTest(unittest.TestCase):
+    MAX_SZ = 100
+    THREADS = 4
+
+    def testSequential(self):
+        nums = [random.randint(-self.MAX_SZ, self.MAX_SZ) for _ in range(self.MAX_SZ)]
+        q = ConcurrentBinaryHeap(nums[:10])
+        q.add_all(nums[10:50])
+        for num in nums[50:]:
+            q.add(num)
+        self.assertEqual(len(nums), len(q))
+        self.assertEqual(min(nums), q.peek())
+        expected = sorted(nums)
+        self.assertEqual(expected[:10], q.poll_many(10))
+        self.assertEqual(expected[10], q.poll_nowait())
+        self.assertEqual(expected[11:], [q.poll() for _ in range(len(nums) - 11)])
+        self.assertIsNone(q.poll_nowait())
+        with self.assertRaises(ValueError):
+            q.add(None)
+
+    def testKeyAndReverse(self):
+        q = ConcurrentBinaryHeap(["bb", "a", "dddd", "ccc"], key=len, reverse=True)
+        self.assertEqual(["dddd", "ccc", "bb", "a"], q.poll_many(4))
+
+    def testPollTimeout(self):
+        q = ConcurrentBinaryHeap()
+        start = time.monotonic()
+        self.assertIsNone(q.poll(timeout=0.05))
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertIsNone(q.poll(timeout=0))
+
+    def testPollWaitsForProducer(self):
+        q = ConcurrentBinaryHeap()
+        timer = threading.Timer(0.05, q.add, (7,))
+        timer.start()
+        self.assertEqual(7, q.poll(timeout=5))
+        timer.join()
+
+    # One add_all must wake as many blocked consumers as it adds elements
+    def testAddAllWakesConsumers(self):
+        q = ConcurrentBinaryHeap()
+        results = []
+        consumers = [threading.Thread(target=lambda: results.append(q.poll(timeout=5)))
+                     for _ in range(self.THREADS)]
+        for consumer in consumers:
+            consumer.start()
+        time.sleep(0.05)
+        q.add_all(range(self.THREADS))
+        for consumer in consumers:
+            consumer.join()
+        self.assertEqual(list(range(self.THREADS)), sorted(results))
+
+    # Every element added by the producers is polled exactly once
+    def testProducersAndConsumers(self):
+        q = ConcurrentBinaryHeap()
+        n = 2000
+        results = [[] for _ in range(self.THREADS)]
+
+        def producer(t):
+            elems = list(range(t * n, (t + 1) * n))
+            for i in range(0, n, 50):
+                if i % 100:
+                    q.add_all(elems[i:i + 50])
+                else:
+                    for elem in elems[i:i + 50]:
+                        q.add(elem)
+
+        def consumer(t):
+            while True:
+                elem = q.poll(timeout=1)
+                if elem is None:
+                    return
+                results[t].append(elem)
+
+        threads = [threading.Thread(target=producer, args=(t,)) for t in range(self.THREADS)]
+        threads += [threading.Thread(target=consumer, args=(t,)) for t in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(list(range(self.THREADS * n)), sorted(sum(results, [])))
+        self.assertEqual(0, len(q))
+
+class AsyncBinaryHeapTest(unittest.TestCase):
+    THREADS = 4
+
+    def testSequential(self):
+        async def run():
+            q = AsyncBinaryHeap([5, 3, 8])
+            q.add_all([1, 9])
+            q.add(4)
+            return [await q.poll() for _ in range(6)]
+
+        self.assertEqual([1, 3, 4, 5, 8, 9], asyncio.run(run()))
+
+    def testPollTimeout(self):
+        async def run():
+            q = AsyncBinaryHeap()
+            self.assertIsNone(await q.poll(timeout=0.05))
+            self.assertIsNone(await q.poll(timeout=0))
+            self.assertEqual(0, len(q.waiters))
+
+        asyncio.run(run())
+
+    def testPollWaitsForTask(self):
+        async def run():
+            q = AsyncBinaryHeap()
+            consumer = asyncio.create_task(q.poll())
+            await asyncio.sleep(0.01)
+            self.assertFalse(consumer.done())
+            q.add(3)
+            return await asyncio.wait_for(consumer, 5)
+
+        self.assertEqual(3, asyncio.run(run()))
+
+    # A consumer which is cancelled after being picked by a producer must
+    # not swallow the element's wake-up
+    def testCancelledWaiterPassesWakeUpOn(self):
+        async def run():
+            q = AsyncBinaryHeap()
+            first = asyncio.create_task(q.poll())
+            second = asyncio.create_task(q.poll())
+            await asyncio.sleep(0.01)
+            q.add(1)
+            first.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await first
+            return await asyncio.wait_for(second, 5)
+
+        self.assertEqual(1, asyncio.run(run()))
+
+    # Producer threads feed consumer tasks on an event loop
+    def testThreadProducersAsyncConsumers(self):
+        n = 1000
+        q = AsyncBinaryHeap()
+
+        def producer(t):
+            elems = list(range(t * n, (t + 1) * n))
+            for i in range(0, n, 25):
+                q.add_all(elems[i:i + 25])
+                q.add(-1 - elems[i])
+
+        async def consumer():
+            results = []
+            while True:
+                elem = await q.poll(timeout=1)
+                if elem is None:
+                    return results
+                results.append(elem)
+
+        async def run():
+            threads = [threading.Thread(target=producer, args=(t,)) for t in range(self.THREADS)]
+            consumers = [asyncio.create_task(consumer()) for _ in range(self.THREADS)]
+            for thread in threads:
+                thread.start()
+            results = await asyncio.gather(*consumers)
+            for thread in threads:
+                thread.join()
+            return sum(results, [])
+
+        expected = list(range(self.THREADS * n)) + [-1 - i for i in range(0, self.THREADS * n, 25)]
+        self.assertEqual(sorted(expected), sorted(asyncio.run(run())))
+
+
+if __name__ == "__main__":
+    unittest.main()
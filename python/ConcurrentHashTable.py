@@ -0,0 +1,161 @@
+"""
+A thread-safe hash-table built from independently locked segments
+
+The key space is split into a fixed number of segments, each of which is a
+HashTableSeparateChaining guarded by its own lock, so writers to different
+segments never wait on each other. This is the design of Java's
+ConcurrentHashMap before Java 8.
+
+Reads do not take a lock. Each segment keeps a version counter which a
+writer makes odd before it starts changing the segment and even again once
+it is done (a seqlock). A reader notes the version, reads the segment, and
+only trusts the result if the version is even and unchanged afterwards;
+otherwise it repeats the read under the segment's lock. The segments are
+never resized incrementally, so reads do not change them.
+
+Iteration and len() are weakly consistent: they see every segment in some
+consistent state, but not necessarily all segments at the same moment.
+
+"""
+
+import threading
+
+from HashTableOpenAddressingBase import fibonacci_hash
+from HashTableSeparateChaining import HashTableSeparateChaining
+
+class Segment:
+    __slots__ = ("table", "lock", "version")
+
+    def __init__(self, capacity, maxLoadFactor):
+        self.table = HashTableSeparateChaining(capacity, maxLoadFactor)
+        self.lock = threading.Lock()
+        # Odd while a writer is modifying the table
+        self.version = 0
+
+class ConcurrentHashTable:
+    # concurrencyLevel is the number of segments, i.e. the number of writers
+    # which can modify the table at the same time. capacity is the initial
+    # capacity of the whole table and is split between the segments.
+    def __init__(self, concurrencyLevel=16, capacity=16, maxLoadFactor=0.75):
+        if concurrencyLevel <= 0:
+            raise ValueError("Illegal concurrency level: " + str(concurrencyLevel))
+        if capacity < 0:
+            raise ValueError("Illegal capacity: " + str(capacity))
+        perSegment = -(-capacity // concurrencyLevel)
+        self.segments = [Segment(perSegment, maxLoadFactor) for _ in range(concurrencyLevel)]
+
+    # The segments index their buckets with the low bits of the hash, so the
+    # segment is chosen from the high bits of a scrambled hash instead.
+    # Otherwise the keys of a segment would all share the same low bits and
+    # crowd into a fraction of its buckets.
+    def __segmentFor(self, keyHash):
+        return self.segments[fibonacci_hash(keyHash) % len(self.segments)]
+
+    # Runs fn on the segment's table without taking the lock, falling back
+    # to the lock if a writer was active during the read
+    def __read(self, segment, fn, key):
+        version = segment.version
+        if version & 1 == 0:
+            try:
+                result = fn(segment.table, key)
+            except Exception:
+                # A concurrent resize can briefly leave the table inconsistent.
+                # Errors raised by the key itself are raised again below.
+                pass
+            else:
+                if segment.version == version:
+                    return result
+        with segment.lock:
+            return fn(segment.table, key)
+
+    # Returns the number of keys, summed over the segments
+    def __len__(self):
+        return sum(len(segment.table) for segment in self.segments)
+
+    def __bool__(self):
+        return any(segment.table for segment in self.segments)
+
+    def __contains__(self, key):
+        if key is None:
+            return False
+        return self.__read(self.__segmentFor(hash(key)), HashTableSeparateChaining.__contains__, key)
+
+    def __getitem__(self, key):
+        if key is None:
+            return None
+        return self.__read(self.__segmentFor(hash(key)), HashTableSeparateChaining.__getitem__, key)
+
+    def __setitem__(self, key, value):
+        return self.put(key, value)
+
+    # Inserts or updates a key and returns its previous value
+    def put(self, key, value):
+        if key is None:
+            raise ValueError("Null key")
+        segment = self.__segmentFor(hash(key))
+        with segment.lock:
+            segment.version += 1
+            try:
+                return segment.table.__setitem__(key, value)
+            finally:
+                segment.version += 1
+
+    # Inserts the key only if it is absent. Returns the existing value,
+    # or None if the key was inserted.
+    def putIfAbsent(self, key, value):
+        if key is None:
+            raise ValueError("Null key")
+        segment = self.__segmentFor(hash(key))
+        with segment.lock:
+            if key in segment.table:
+                return segment.table[key]
+            segment.version += 1
+            try:
+                segment.table[key] = value
+            finally:
+                segment.version += 1
+        return None
+
+    # Removes a key and returns its value, or None if it does not exist
+    def remove(self, key):
+        if key is None:
+            return None
+        segment = self.__segmentFor(hash(key))
+        with segment.lock:
+            segment.version += 1
+            try:
+                return segment.table.remove(key)
+            finally:
+                segment.version += 1
+
+    # Clears the segments one at a time
+    def clear(self):
+        for segment in self.segments:
+            with segment.lock:
+                segment.version += 1
+                try:
+                    segment.table.clear()
+                finally:
+                    segment.version += 1
+
+    # Yields the (key, value) pairs of one segment at a time. Each segment is
+    # copied under its lock so writers are never blocked by a slow consumer.
+    def items(self):
+        for segment in self.segments:
+            with segment.lock:
+                snapshot = list(segment.table.items())
+            yield from snapshot
+
+    def keys(self):
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        for _, value in self.items():
+            yield value
+
+    def __iter__(self):
+        return self.keys()
+
+    def __str__(self):
+        return "{" + ", ".join("%s => %s" % item for item in self.items()) + "}"
@@ -0,0 +1,130 @@
+from ConcurrentHashTable import ConcurrentHashTable
+import random
+import threading
+import unittest
+
+class ConcurrentHashTableTest(unittest.TestCase):
+    LOOPS = random.randint(2500, 7500)
+    MAX_SIZE = random.randint(1, 750)
+    MAX_RAND_NUM = random.randint(1, 350)
+    THREADS = 8
+
+    def setUp(self):
+        self.map = ConcurrentHashTable(4)
+
+    def testNullKey(self):
+        with self.assertRaises(ValueError):
+            self.map[None] = 5
+        self.assertIsNone(self.map[None])
+        self.assertFalse(None in self.map)
+
+    def testIllegalCreation(self):
+        with self.assertRaises(ValueError):
+            ConcurrentHashTable(0)
+        with self.assertRaises(ValueError):
+            ConcurrentHashTable(4, -1)
+
+    def testPutIfAbsent(self):
+        self.assertIsNone(self.map.putIfAbsent("a", 1))
+        self.assertEqual(1, self.map.putIfAbsent("a", 2))
+        self.assertEqual(1, self.map["a"])
+        self.assertEqual(1, self.map.put("a", 3))
+        self.assertEqual(3, self.map["a"])
+
+    def testRandomMapOperations(self):
+        pymap = {}
+        for _ in range(self.LOOPS):
+            key = random.randint(-self.MAX_RAND_NUM, self.MAX_RAND_NUM)
+            r = random.random()
+            if r < 0.5:
+                self.assertEqual(pymap.get(key, None), self.map.put(key, r))
+                pymap[key] = r
+            elif r < 0.8:
+                self.assertEqual(pymap.pop(key, None), self.map.remove(key))
+            self.assertEqual(pymap.get(key, None), self.map[key])
+            self.assertEqual(key in pymap, key in self.map)
+            self.assertEqual(len(pymap), len(self.map))
+
+        self.assertEqual(pymap, dict(self.map.items()))
+        self.map.clear()
+        self.assertEqual(0, len(self.map))
+
+    # Each thread owns a disjoint range of keys, so the final contents are known
+    def testConcurrentWriters(self):
+        n = 2000
+        errors = []
+
+        def writer(t):
+            for i in range(t * n, (t + 1) * n):
+                self.map[i] = i
+            for i in range(t * n, (t + 1) * n, 2):
+                if self.map.remove(i) != i:
+                    errors.append(i)
+
+        self.run_threads(writer)
+        self.assertEqual([], errors)
+        self.assertEqual(self.THREADS * n // 2, len(self.map))
+        self.assertEqual(set(range(1, self.THREADS * n, 2)), set(self.map))
+
+    # All threads race to insert the same keys. Exactly one insertion per
+    # key may win.
+    def testConcurrentPutIfAbsent(self):
+        n = 2000
+        winners = [0] * self.THREADS
+
+        def racer(t):
+            for i in range(n):
+                if self.map.putIfAbsent(i, t) is None:
+                    winners[t] += 1
+
+        self.run_threads(racer)
+        self.assertEqual(n, sum(winners))
+        self.assertEqual(n, len(self.map))
+
+    # Readers must never see a value that was not written for the key,
+    # nor miss a key that is never removed, while writers resize the segments
+    def testLockFreeReads(self):
+        stable = list(range(0, 1000, 3))
+        for key in stable:
+            self.map[key] = -key
+        stop = threading.Event()
+        errors = []
+
+        def reader():
+            while not stop.is_set():
+                for key in stable:
+                    if self.map[key] != -key or key not in self.map:
+                        errors.append(key)
+                for key in range(1000, 1100):
+                    value = self.map[key]
+                    if value is not None and value % 10000 != key:
+                        errors.append(key)
+
+        def writer(t):
+            for round in range(10):
+                for key in range(1000 + t, 5000, self.THREADS):
+                    self.map[key] = round * 10000 + key
+                for key in range(1000 + t, 5000, self.THREADS):
+                    self.map.remove(key)
+
+        readers = [threading.Thread(target=reader) for _ in range(2)]
+        for thread in readers:
+            thread.start()
+        self.run_threads(writer)
+        stop.set()
+        for thread in readers:
+            thread.join()
+
+        self.assertEqual([], errors)
+        self.assertEqual(len(stable), len(self.map))
+
+    def run_threads(self, target):
+        threads = [threading.Thread(target=target, args=(t,)) for t in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -36,6 +36,8 @@ class DoublyLinkedList:
     def add(self, elem):
         self.addLast(elem)
 
+    # Returns the new node, which can later be passed to removeNode
+    # or moveToFirst to unlink or move the element in O(1)
     def addLast(self, elem):
         if self.isEmpty():
             self.head = self.tail = self.Node(elem, None, None)
@@ -43,6 +45,7 @@ class DoublyLinkedList:
             self.tail.next = self.Node(elem, self.tail, None)
             self.tail = self.tail.next
         self.size += 1
+        return self.tail
 
     def addFirst(self, elem):
         if self.isEmpty():
@@ -51,6 +54,23 @@ class DoublyLinkedList:
             self.head.prev = self.Node(elem, None, self.head)
             self.head = self.head.prev
         self.size += 1
+        return self.head
+
+    # Moves a node of this list to the front without allocating a new node
+    def moveToFirst(self, node):
+        if node is self.head:
+            return
+        # Unlink the node, it is not the head so it has a previous node
+        node.prev.next = node.next
+        if node is self.tail:
+            self.tail = node.prev
+        else:
+            node.next.prev = node.prev
+        # Relink it in front of the head
+        node.prev = None
+        node.next = self.head
+        self.head.prev = node
+        self.head = node
 
     def peekFirst(self):
         if self.isEmpty():
@@ -124,6 +124,21 @@ class DoublyLinkedListTest(unittest.TestCase):
         self._list.removeAt(0)
         self.assertEquals(len(self._list), 0)
 
+    def testNodeHandles(self):
+        nodes = [self._list.addLast(i) for i in range(5)]
+        self._list.moveToFirst(nodes[2])
+        self._list.moveToFirst(nodes[4])
+        self._list.moveToFirst(nodes[4])
+        self.assertEqual([4, 2, 0, 1, 3], list(self._list))
+        self.assertEqual(3, self._list.peekLast())
+        self._list.removeNode(nodes[1])
+        self._list.moveToFirst(nodes[3])
+        self.assertEqual([3, 4, 2, 0], list(self._list))
+        self.assertEqual(0, self._list.peekLast())
+        node = self._list.addFirst(9)
+        self.assertEqual(9, self._list.removeNode(node))
+        self.assertEqual(4, len(self._list))
+
     def testClear(self):
         self._list.add(22)
         self._list.add(33)
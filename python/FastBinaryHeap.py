@@ -0,0 +1,238 @@
+"""
+A min priority queue implementation using a binary heap, tuned for speed.
+
+It has the same API as BinaryHeap, but swim and sink are written like the
+sift loops of CPython's heapq: the element being moved is held aside while
+the parent (or smaller child) is shifted into the hole it leaves, so every
+level costs a comparison and a store, with no method calls inside the
+loops. The heap list always has exactly one slot per element, so add and poll
+append to and pop from the end of it.
+
+With a key function or reverse, separate loops compare the cached keys with
+< and move each key along with its element; reverse order swaps the operands
+of < instead of calling a comparison function. The plain loops are kept for
+the default ordering, where they are the fastest.
+
+Subclasses which need to observe every exchange, like IndexedBinaryHeap, must
+extend BinaryHeap instead since this class never calls less or swap on its
+hot paths.
+
+"""
+
+import operator
+
+from BinaryHeap import BinaryHeap
+
+class FastBinaryHeap(BinaryHeap):
+    # With the inlined loops heapifying keeps up with sifting on random
+    # batches and wins on ordered ones once the batch is more than twice the
+    # heap: 0.066s against 0.072s for 100k random elements into an empty
+    # heap, and 0.068s against 0.222s for a descending batch
+    REHEAPIFY_FACTOR = 2
+
+    def __init__(self, elems=None, arity=2, key=None, reverse=False):
+        # Whether the ordered loops, which compare cached keys or reverse the
+        # comparison, must be used instead of the plain loops
+        self.ordered = key is not None or reverse
+        # Comparison of the ordered loops, lt(a, b) if a belongs above b
+        self.lt = operator.gt if reverse else operator.lt
+        super().__init__(elems, arity, key, reverse)
+
+    def clear(self):
+        self.heap.clear()
+        if self.keys is not None:
+            self.keys.clear()
+        self.heapSize = self.heapCapacity = 0
+
+    def add(self, elem):
+        if elem is None:
+            raise ValueError
+        self.heap.append(elem)
+        if self.keys is not None:
+            self.keys.append(self.key(elem))
+        self.heapSize += 1
+        self.heapCapacity = self.heapSize
+        self.swim(self.heapSize - 1)
+
+    def poll(self):
+        if self.heapSize == 0:
+            return None
+        heap = self.heap
+        last = heap.pop()
+        self.heapSize -= 1
+        self.heapCapacity = self.heapSize
+        keys = self.keys
+        if keys is not None:
+            lastKey = keys.pop()
+            if self.heapSize:
+                keys[0] = lastKey
+        if self.heapSize == 0:
+            return last
+        top = heap[0]
+        heap[0] = last
+        self.sink(0)
+        return top
+
+    # Moves the element at k up into place, O(log(n))
+    def swim(self, k):
+        if self.ordered:
+            return self.__swimOrdered(k)
+        heap = self.heap
+        d = self.arity
+        elem = heap[k]
+        while k > 0:
+            parent = (k - 1) // d
+            parentElem = heap[parent]
+            if not elem < parentElem:
+                break
+            # Shift the parent down into the hole
+            heap[k] = parentElem
+            k = parent
+        heap[k] = elem
+
+    # Moves the element at k down into place, O(d*log(n)) for arity d. Like
+    # heapq, the smallest child is moved up into the hole all the way to a
+    # leaf without comparing it to the element, which is then swum back up
+    # from there. The element usually belongs near the bottom, so this saves
+    # a comparison per level.
+    def sink(self, k):
+        if self.ordered:
+            return self.__sinkOrdered(k)
+        heap = self.heap
+        size = self.heapSize
+        d = self.arity
+        start = k
+        elem = heap[k]
+        child = d * k + 1
+        if d == 2:
+            while child < size:
+                # Pick the smaller of the two children
+                right = child + 1
+                if right < size and not heap[child] < heap[right]:
+                    child = right
+                # Shift the child up into the hole
+                heap[k] = heap[child]
+                k = child
+                child = 2 * k + 1
+        else:
+            while child < size:
+                # Pick the smallest of the d children
+                smallest = child
+                smallestElem = heap[child]
+                for i in range(child + 1, min(child + d, size)):
+                    if heap[i] < smallestElem:
+                        smallest = i
+                        smallestElem = heap[i]
+                # Shift the child up into the hole
+                heap[k] = smallestElem
+                k = smallest
+                child = d * k + 1
+        # Swim the element back up, but not above where it started
+        while k > start:
+            parent = (k - 1) // d
+            parentElem = heap[parent]
+            if not elem < parentElem:
+                break
+            heap[k] = parentElem
+            k = parent
+        heap[k] = elem
+
+    # swim for a key function or reverse order. Without a key function the
+    # elements are their own keys and only the heap array is moved. Reverse
+    # order swaps the operands of < rather than calling a comparison
+    # function, which would cost a call per level.
+    def __swimOrdered(self, k):
+        heap = self.heap
+        keys = heap if self.keys is None else self.keys
+        keyed = self.keys is not None
+        reverse = self.reverse
+        d = self.arity
+        elem = heap[k]
+        elemKey = keys[k]
+        while k > 0:
+            parent = (k - 1) // d
+            parentKey = keys[parent]
+            if not (parentKey < elemKey if reverse else elemKey < parentKey):
+                break
+            heap[k] = heap[parent]
+            if keyed:
+                keys[k] = parentKey
+            k = parent
+        heap[k] = elem
+        keys[k] = elemKey
+
+    # sink for a key function or reverse order, see sink and __swimOrdered
+    def __sinkOrdered(self, k):
+        heap = self.heap
+        keys = heap if self.keys is None else self.keys
+        keyed = self.keys is not None
+        reverse = self.reverse
+        size = self.heapSize
+        d = self.arity
+        start = k
+        elem = heap[k]
+        elemKey = keys[k]
+        child = d * k + 1
+        while child < size:
+            # Pick the child which belongs highest
+            best = child
+            bestKey = keys[child]
+            if d == 2:
+                right = child + 1
+                if right < size:
+                    rightKey = keys[right]
+                    if bestKey < rightKey if reverse else rightKey < bestKey:
+                        best = right
+                        bestKey = rightKey
+            else:
+                for i in range(child + 1, min(child + d, size)):
+                    if bestKey < keys[i] if reverse else keys[i] < bestKey:
+                        best = i
+                        bestKey = keys[i]
+            heap[k] = heap[best]
+            if keyed:
+                keys[k] = bestKey
+            k = best
+            child = d * k + 1
+        while k > start:
+            parent = (k - 1) // d
+            parentKey = keys[parent]
+            if not (parentKey < elemKey if reverse else elemKey < parentKey):
+                break
+            heap[k] = heap[parent]
+            if keyed:
+                keys[k] = parentKey
+            k = parent
+        heap[k] = elem
+        keys[k] = elemKey
+
+    # Removes a node at particular index, O(log(n))
+    def removeAt(self, i):
+        if i == 0:
+            return self.poll()
+        if self.heapSize == 0:
+            return None
+        heap = self.heap
+        last = heap.pop()
+        if self.keys is not None:
+            lastKey = self.keys.pop()
+        self.heapSize -= 1
+        self.heapCapacity = self.heapSize
+        if i == self.heapSize:
+            return last
+        removed = heap[i]
+        heap[i] = last
+        parent = (i - 1) // self.arity
+        # The last element moves either up or down, never both
+        if self.keys is not None:
+            self.keys[i] = lastKey
+            moveUp = self.lt(lastKey, self.keys[parent])
+        elif self.ordered:
+            moveUp = self.lt(last, heap[parent])
+        else:
+            moveUp = last < heap[parent]
+        if moveUp:
+            self.swim(i)
+        else:
+            self.sink(i)
+        return removed
@@ -0,0 +1,29 @@
+from FastBinaryHeap import FastBinaryHeap
+import BinaryHeapTest
+import unittest
+import heapq
+import random
+
+# Runs every BinaryHeap test against FastBinaryHeap
+class FastBinaryHeapTest(BinaryHeapTest.BinaryHeapTest):
+    HEAP = FastBinaryHeap
+
+    def testMixedOperations(self):
+        for _ in range(self.LOOPS):
+            pq1 = []
+            pq2 = FastBinaryHeap()
+            for _ in range(random.randint(0, self.MAX_SZ)):
+                if pq1 and random.random() < 0.4:
+                    self.assertEqual(heapq.heappop(pq1), pq2.poll())
+                else:
+                    val = random.randint(-self.MAX_SZ, self.MAX_SZ)
+                    heapq.heappush(pq1, val)
+                    pq2.add(val)
+                self.assertEqual(len(pq1), len(pq2))
+                self.assertEqual(len(pq1), len(pq2.heap))
+                self.assertEqual(pq1[0] if pq1 else None, pq2.peek())
+            self.assertTrue(pq2.isMinHeap(0))
+
+
+if __name__ == "__main__":
+    unittest.main()
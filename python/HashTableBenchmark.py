@@ -0,0 +1,396 @@
+"""
+Throughput benchmarks for the hash-table implementations
+
+Usage: python HashTableBenchmark.py [number of keys]
+       python HashTableBenchmark.py --suite [--sizes 1000,10000] [--seed 1]
+                                    [--tables dict,HashTableLinearProbing]
+                                    [--json results.json]
+
+The first form prints a quick report. The second runs every workload of the
+suite (insert heavy, read heavy, miss heavy and delete churn) over sequential,
+random and adversarial keys at each size, for every table and the built-in
+dict. It reports ops/s, p50/p99 latency per operation and peak memory, and
+with --json writes the results to a file so that runs on different commits
+can be compared. Keys and operations are generated from the seed, so two runs
+with the same arguments perform exactly the same operations.
+
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+from ConcurrentHashTable import ConcurrentHashTable
+from HashTableDoubleHashing import HashTableDoubleHashing
+from HashTableLinearProbing import HashTableLinearProbing
+from HashTableQuadraticProbing import HashTableQuadraticProbing
+from HashTableRobinHood import HashTableRobinHood
+from HashTableSeparateChaining import HashTableSeparateChaining
+
+TABLES = [HashTableLinearProbing, HashTableQuadraticProbing, HashTableRobinHood,
+          HashTableDoubleHashing]
+
+
+def random_keys(n):
+    return random.sample(range(n * 10), n)
+
+
+# Dense runs of consecutive IDs starting at random offsets
+def clustered_keys(n, run=64):
+    keys = set()
+    while len(keys) < n:
+        base = random.randrange(n * 10)
+        keys.update(range(base, base + run))
+    return list(keys)[:n]
+
+
+KEY_SETS = [("random", random_keys), ("clustered", clustered_keys)]
+
+
+# Returns the number of operations per second achieved by fn over n operations
+def ops_per_second(fn, n):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return n / elapsed if elapsed > 0 else float('inf')
+
+
+def bench_put(table, keys):
+    def run():
+        for key in keys:
+            table[key] = key
+    return ops_per_second(run, len(keys))
+
+
+def bench_get(table, keys):
+    def run():
+        for key in keys:
+            table[key]
+    return ops_per_second(run, len(keys))
+
+
+def bench_from_items(cls, keys):
+    def run():
+        cls.from_items([(key, key) for key in keys])
+    return ops_per_second(run, len(keys))
+
+
+# Compares looking up keys one at a time against get_many in batches
+def bench_batch_get(table, keys, batch=256):
+    batches = [keys[i:i + batch] for i in range(0, len(keys), batch)]
+
+    def run_loop():
+        for chunk in batches:
+            [table[key] for key in chunk]
+
+    def run_batch():
+        for chunk in batches:
+            table.get_many(chunk)
+
+    return ops_per_second(run_loop, len(keys)), ops_per_second(run_batch, len(keys))
+
+
+# A separate-chaining table behind one global lock, the baseline
+# for ConcurrentHashTable
+class LockedHashTable:
+    def __init__(self):
+        self.table = HashTableSeparateChaining()
+        self.lock = threading.Lock()
+
+    def __getitem__(self, key):
+        with self.lock:
+            return self.table[key]
+
+    def __setitem__(self, key, value):
+        with self.lock:
+            self.table[key] = value
+
+    def remove(self, key):
+        with self.lock:
+            return self.table.remove(key)
+
+
+# Hammers a shared table from several threads with a mix of reads (90%),
+# writes and removals, and returns the total throughput
+def bench_threads(table, keys, threads=8, ops_per_thread=50000):
+    for key in keys:
+        table[key] = key
+
+    def worker(seed):
+        rnd = random.Random(seed)
+        for _ in range(ops_per_thread):
+            key = keys[rnd.randrange(len(keys))]
+            r = rnd.random()
+            if r < 0.9:
+                table[key]
+            elif r < 0.95:
+                table[key] = r
+            else:
+                table.remove(key)
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return threads * ops_per_thread / (time.perf_counter() - start)
+
+
+# Returns the number of bytes allocated by a table holding all the keys
+def bench_memory(cls, keys):
+    tracemalloc.start()
+    table = cls()
+    for key in keys:
+        table[key] = key
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def main(n):
+    for name, gen in KEY_SETS:
+        keys = gen(n)
+        print("n = %d, %s keys" % (n, name))
+        for cls in TABLES:
+            table = cls()
+            put = bench_put(table, keys)
+            get = bench_get(table, keys)
+            bulk = bench_from_items(cls, keys)
+            stats = table.probe_stats()
+            print("%-28s put %10.0f ops/s  get %10.0f ops/s  from_items %10.0f ops/s  "
+                  "probes avg %5.2f max %4d"
+                  % (cls.__name__, put, get, bulk,
+                     stats["average_probe_length"], stats["max_probe_length"]))
+
+    keys = random_keys(n)
+    print("batched lookups, n = %d" % n)
+    for cls in TABLES + [HashTableSeparateChaining]:
+        table = cls()
+        for key in keys:
+            table[key] = key
+        loop, batch = bench_batch_get(table, keys)
+        print("%-28s loop %10.0f ops/s  get_many %10.0f ops/s" % (cls.__name__, loop, batch))
+
+    print("threads, n = %d" % n)
+    for threads in (1, 4, 8):
+        locked = bench_threads(LockedHashTable(), keys, threads)
+        striped = bench_threads(ConcurrentHashTable(), keys, threads)
+        print("%d threads  global lock %10.0f ops/s  ConcurrentHashTable %10.0f ops/s"
+              % (threads, locked, striped))
+
+    print("memory, n = %d" % n)
+    for cls in TABLES + [HashTableSeparateChaining]:
+        size = bench_memory(cls, keys)
+        print("%-28s %8.1f MB  %6.1f bytes/entry" % (cls.__name__, size / 2**20, size / n))
+
+
+# The built-in dict behind the interface of the tables: missing keys read as
+# None and remove returns the removed value
+class DictTable(dict):
+    def __missing__(self, key):
+        return None
+
+    def remove(self, key):
+        return self.pop(key, None)
+
+
+SUITE_TABLES = [DictTable, HashTableLinearProbing, HashTableQuadraticProbing,
+                HashTableSeparateChaining, HashTableRobinHood, HashTableDoubleHashing]
+
+# Multiples of 3 * 2^20 all land in the same bucket of tables whose capacity
+# is a power of two or three times one, until the table outgrows 2^20 buckets
+ADVERSARIAL_STRIDE = 3 * 2**20
+# Colliding keys make some tables quadratic, so larger sizes are skipped
+ADVERSARIAL_MAX_SIZE = 2000
+
+GET, PUT, REMOVE = 0, 1, 2
+
+
+# Each generator returns 2n distinct keys. The first n are inserted before
+# the workload runs, the rest are never inserted and serve as misses or as
+# new keys for the churn workload.
+def suite_sequential_keys(n, rnd):
+    return list(range(2 * n))
+
+
+def suite_random_keys(n, rnd):
+    return rnd.sample(range(2**62), 2 * n)
+
+
+def suite_adversarial_keys(n, rnd):
+    keys = [i * ADVERSARIAL_STRIDE for i in range(2 * n)]
+    rnd.shuffle(keys)
+    return keys
+
+
+SUITE_KEY_SETS = [
+    ("sequential", suite_sequential_keys),
+    ("random", suite_random_keys),
+    ("adversarial", suite_adversarial_keys),
+]
+
+
+# Each workload returns the keys to insert beforehand and the list
+# of (operation, key) pairs to time
+def workload_insert(present, absent, rnd):
+    return [], [(PUT, key) for key in present]
+
+
+def workload_read(present, absent, rnd):
+    return present, [(GET, rnd.choice(present)) for _ in present]
+
+
+def workload_miss(present, absent, rnd):
+    return present, [(GET, key) for key in absent]
+
+
+# Replaces every key with a new one, leaving the open-addressing tables
+# full of tombstones
+def workload_churn(present, absent, rnd):
+    ops = []
+    for old, new in zip(present, absent):
+        ops.append((REMOVE, old))
+        ops.append((PUT, new))
+    return present, ops
+
+
+WORKLOADS = [
+    ("insert", workload_insert),
+    ("read", workload_read),
+    ("miss", workload_miss),
+    ("churn", workload_churn),
+]
+
+
+def build_table(cls, keys):
+    table = cls()
+    for key in keys:
+        table[key] = key
+    return table
+
+
+# Runs the operations and returns the elapsed time in seconds, or the list
+# of per-operation latencies in nanoseconds when per_op is set. Timing every
+# operation adds the cost of the clock to each one, so throughput is measured
+# by a separate run which only reads the clock twice.
+def run_ops(table, ops, per_op=False):
+    get, put, remove = table.__getitem__, table.__setitem__, table.remove
+    if not per_op:
+        start = time.perf_counter()
+        for op, key in ops:
+            if op == GET: get(key)
+            elif op == PUT: put(key, key)
+            else: remove(key)
+        return time.perf_counter() - start
+
+    clock = time.perf_counter_ns
+    latencies = []
+    record = latencies.append
+    for op, key in ops:
+        start = clock()
+        if op == GET: get(key)
+        elif op == PUT: put(key, key)
+        else: remove(key)
+        record(clock() - start)
+    return latencies
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+# Runs one workload on one table, each measurement on a freshly built table
+def bench_workload(cls, prefill, ops):
+    elapsed = run_ops(build_table(cls, prefill), ops)
+    latencies = sorted(run_ops(build_table(cls, prefill), ops, per_op=True))
+
+    tracemalloc.start()
+    table = build_table(cls, prefill)
+    run_ops(table, ops)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "ops": len(ops),
+        "ops_per_sec": len(ops) / elapsed if elapsed > 0 else float("inf"),
+        "p50_ns": percentile(latencies, 0.50),
+        "p99_ns": percentile(latencies, 0.99),
+        "peak_bytes": peak,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes, seed=1, tables=SUITE_TABLES, out=sys.stdout):
+    results = []
+    for n in sizes:
+        for key_name, gen in SUITE_KEY_SETS:
+            if key_name == "adversarial" and n > ADVERSARIAL_MAX_SIZE:
+                continue
+            for workload_name, workload in WORKLOADS:
+                # Every table sees exactly the same keys and operations
+                rnd = random.Random("%d/%d/%s/%s" % (seed, n, key_name, workload_name))
+                keys = gen(n, rnd)
+                prefill, ops = workload(keys[:n], keys[n:], rnd)
+                for cls in tables:
+                    result = bench_workload(cls, prefill, ops)
+                    result.update(table=cls.__name__, workload=workload_name,
+                                  keys=key_name, size=n)
+                    results.append(result)
+                    print("%-26s %-7s %-12s n=%-8d %11.0f ops/s  p50 %7d ns  p99 %8d ns  "
+                          "peak %9.1f KB" % (cls.__name__, workload_name, key_name, n,
+                          result["ops_per_sec"], result["p50_ns"], result["p99_ns"],
+                          result["peak_bytes"] / 1024), file=out)
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "sizes": list(sizes),
+        },
+        "results": results,
+    }
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Hash-table benchmarks")
+    parser.add_argument("n", nargs="?", type=int, default=10**6,
+                        help="number of keys for the quick report")
+    parser.add_argument("--suite", action="store_true", help="run the workload suite")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma separated table sizes for the suite")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tables", help="comma separated table class names")
+    parser.add_argument("--json", help="write the suite results to this file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    if not args.suite:
+        main(args.n)
+    else:
+        tables = SUITE_TABLES
+        if args.tables:
+            by_name = {cls.__name__: cls for cls in SUITE_TABLES}
+            tables = [by_name[name] for name in args.tables.split(",")]
+        sizes = [int(size) for size in args.sizes.split(",")]
+        report = run_suite(sizes, args.seed, tables)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
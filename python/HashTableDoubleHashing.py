@@ -0,0 +1,45 @@
+"""
+An implementation of an open-addressing hash-table using double hashing.
+
+The probe step of every key is given by a secondary hash derived from the
+key's hash, so keys which share a home slot follow different probe
+sequences, and probing reuses the hash the table already has instead of
+calling hash() on the key again. The capacity is
+kept prime so that every step size visits all the buckets.
+
+"""
+
+from HashTableOpenAddressingBase import HashTableOpenAddressingBase, fibonacci_hash
+
+# Default secondary hash, a Fibonacci scramble of the key's hash so that
+# consecutive integer keys end up with unrelated step sizes
+default_secondary_hash = fibonacci_hash
+
+class HashTableDoubleHashing(HashTableOpenAddressingBase):
+    def __init__(self, capacity=7, load_factor=0.65, secondary_hash=default_secondary_hash):
+        self.secondary_hash = secondary_hash
+        self.delta = 1
+        super().__init__(capacity, load_factor)
+
+    # Compute the step size of the key's probe sequence from its hash. It
+    # lies in the range [1, capacity) so, with a prime capacity, it is never
+    # a multiple of the capacity
+    def setup_probing(self, key_hash):
+        self.delta = 1 + self.secondary_hash(key_hash) % (self.capacity - 1)
+
+    def probe(self, x):
+        return x * self.delta
+
+    # Adjust the capacity until it is a prime number
+    def adjust_capacity(self):
+        while not self.is_prime(self.capacity):
+            self.capacity += 1
+
+    def is_prime(self, n):
+        if n < 2: return False
+        if n % 2 == 0: return n == 2
+        i = 3
+        while i * i <= n:
+            if n % i == 0: return False
+            i += 2
+        return True
@@ -0,0 +1,179 @@
+from HashTableDoubleHashing import HashTableDoubleHashing
+import unittest
+import random
+
+class HashObject:
+    def __init__(self, hash, data):
+        self.hash = hash
+        self.data = data
+
+    def __eq__(self, other):
+        if not isinstance(other, HashObject):
+            return False
+        return self.hash == other.hash and self.data == other.data
+
+    def __hash__(self):
+        return self.hash
+
+
+# Key which counts how often it is hashed and compared
+class CountingKey:
+    hash_calls = 0
+    eq_calls = 0
+
+    def __init__(self, data):
+        self.data = data
+
+    def __eq__(self, other):
+        CountingKey.eq_calls += 1
+        return isinstance(other, CountingKey) and self.data == other.data
+
+    def __hash__(self):
+        CountingKey.hash_calls += 1
+        return self.data
+
+
+class HashTableDoubleHashingTest(unittest.TestCase):
+    LOOPS = random.randint(2500, 7500)
+    MAX_SIZE = random.randint(1, 750)
+    MAX_RAND_NUM = random.randint(1, 350)
+
+    @classmethod
+    def setUp(cls):
+        cls.map = HashTableDoubleHashing()
+
+    def testNullKey(self):
+        with self.assertRaises(ValueError):
+            self.map[None] = 5
+
+    def testIllegalCreation1(self):
+        with self.assertRaises(ValueError):
+            HashTableDoubleHashing(-3, 0.5)
+
+    def testIllegalCreation2(self):
+        with self.assertRaises(ValueError):
+            HashTableDoubleHashing(5, float('inf'))
+
+    def testLegalCreation(self):
+        HashTableDoubleHashing(6, 0.9)
+
+    def testUpdatingValue(self):
+        self.map[1] = 1
+        self.assertEqual(1, self.map[1])
+
+        self.map[1] = 5
+        self.assertEqual(5, self.map[1])
+
+        self.map[1] = -7
+        self.assertEqual(-7, self.map[1])
+
+    # Test that as the table grows its capacity remains prime
+    def testTableSize(self):
+        for sz in range(1, 33):
+            self.map = HashTableDoubleHashing(sz)
+            for i in range(1000):
+                self.assertTrue(self.map.is_prime(self.map.get_capacity()))
+                self.map[i] = i
+
+    def testCustomSecondaryHash(self):
+        # A constant secondary hash degrades to linear probing with a step of one
+        self.map = HashTableDoubleHashing(secondary_hash=lambda key_hash: 0)
+        for i in range(100):
+            self.map[HashObject(5, i)] = i
+        for i in range(100):
+            self.assertEqual(i, self.map[HashObject(5, i)])
+
+    def testFromItemsSecondaryHash(self):
+        items = [(HashObject(5, i), i) for i in range(100)]
+        self.map = HashTableDoubleHashing.from_items(items, secondary_hash=lambda key_hash: 0)
+        self.assertEqual(0, self.map.secondary_hash(5))
+        for key, value in items:
+            self.assertEqual(value, self.map[key])
+
+    def testCachedHashes(self):
+        CountingKey.hash_calls = 0
+        keys = [CountingKey(i) for i in range(1000)]
+        for key in keys:
+            self.map[key] = key.data
+
+        # The probe step comes from the cached hash, so resizing hashes no key
+        # again and each key was hashed exactly once
+        self.assertEqual(len(keys), CountingKey.hash_calls)
+
+        CountingKey.hash_calls = 0
+        CountingKey.eq_calls = 0
+        for key in keys:
+            self.assertEqual(key.data, self.map[key])
+        self.assertEqual(len(keys), CountingKey.hash_calls)
+        self.assertEqual(len(keys), CountingKey.eq_calls)
+
+    def testIterator(self):
+        rand_nums = self.gen_rand_list(self.MAX_SIZE)
+        for key in rand_nums:
+            self.map[key] = key
+
+        count = 0
+        for key in self.map:
+            self.assertEqual(key, self.map[key])
+            self.assertTrue(key in rand_nums)
+            count += 1
+
+        self.assertEqual(len(set(rand_nums)), count)
+
+    def testRemoveComplex1(self):
+        o1 = HashObject(88, 1)
+        o2 = HashObject(88, 2)
+        o3 = HashObject(88, 3)
+        o4 = HashObject(88, 4)
+
+        self.map[o1] = 111
+        self.map[o2] = 111
+        self.map[o3] = 111
+        self.map[o4] = 111
+
+        self.map.remove(o2)
+        self.map.remove(o3)
+        self.map.remove(o1)
+        self.map.remove(o4)
+
+        self.assertEqual(0, len(self.map))
+
+    def testRandomMapOperations(self):
+        pymap = {}
+
+        for _ in range(self.LOOPS):
+            self.map.clear()
+            pymap.clear()
+
+            probability1 = random.random()
+            probability2 = random.random()
+
+            nums = self.gen_rand_list(self.MAX_SIZE)
+            for i in range(self.MAX_SIZE):
+                r = random.random()
+
+                key = nums[i]
+                val = i
+
+                if r < probability1:
+                    pymap[key] = val
+                    self.map[key] = val
+
+                self.assertEqual(pymap.get(key, None), self.map[key])
+                self.assertEqual(key in pymap, self.map.contains_key(key))
+
+                if r > probability2:
+                    self.assertEqual(pymap.pop(key, None), self.map.remove(key))
+
+                self.assertEqual(pymap.get(key, None), self.map[key])
+                self.assertEqual(key in pymap, self.map.contains_key(key))
+                self.assertEqual(len(pymap), len(self.map))
+
+    # Generate a list of random numbers
+    def gen_rand_list(self, sz):
+        lst = [random.randint(-self.MAX_RAND_NUM, self.MAX_RAND_NUM) for _ in range(sz)]
+        return lst
+
+
+if __name__ == "__main__":
+    unittest.main()
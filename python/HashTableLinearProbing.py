@@ -10,7 +10,7 @@ class HashTableLinearProbing(HashTableOpenAddressingBase):
         super().__init__(capacity, load_factor)
 
 
-    def setup_probing(self, key):
+    def setup_probing(self, key_hash):
         pass
     
     def probe(self, x):
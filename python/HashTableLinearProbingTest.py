@@ -17,6 +17,23 @@ class HashObject:
         return self.hash
 
 
+# Key which counts how often it is hashed and compared
+class CountingKey:
+    hash_calls = 0
+    eq_calls = 0
+
+    def __init__(self, data):
+        self.data = data
+
+    def __eq__(self, other):
+        CountingKey.eq_calls += 1
+        return isinstance(other, CountingKey) and self.data == other.data
+
+    def __hash__(self):
+        CountingKey.hash_calls += 1
+        return self.data
+
+
 class HashTableLinearProbingTest(unittest.TestCase):
     LOOPS = random.randint(25000, 75000)
     MAX_SIZE = random.randint(1, 750)
@@ -85,6 +102,63 @@ class HashTableLinearProbingTest(unittest.TestCase):
             self.assertEqual(len(map2), count)
 
 
+    def testViews(self):
+        pymap = {key: key * 2 for key in self.gen_rand_list(self.MAX_SIZE)}
+        for key, val in pymap.items():
+            self.map[key] = val
+
+        self.assertEqual(sorted(pymap.keys()), sorted(self.map.keys()))
+        self.assertEqual(sorted(pymap.values()), sorted(self.map.values()))
+        self.assertEqual(sorted(pymap.items()), sorted(self.map.items()))
+
+    def testNestedIteration(self):
+        for i in range(50):
+            self.map[i] = i
+
+        pairs = [(a, b) for a in self.map for b in self.map]
+        self.assertEqual(50 * 50, len(pairs))
+        self.assertEqual(set((a, b) for a in range(50) for b in range(50)), set(pairs))
+
+    def testRelocationDuringSuspendedIteration(self):
+        a, b = HashObject(0, "a"), HashObject(0, "b")
+        c, d = HashObject(5, "c"), HashObject(1, "d")
+        for key in (a, b, c, d):
+            self.map[key] = key.data
+        self.map.remove(a)
+        tombstone = self.map._keys.index(HashTableLinearProbing.TOMBSTONE)
+        slot = self.map._keys.index(b)
+        self.assertLess(tombstone, self.map._keys.index(d))
+        self.assertLess(self.map._keys.index(d), slot)
+
+        it = iter(self.map)
+        self.assertIs(next(it), d)
+        # Moving b behind the iterator would hide it from the rest of the walk
+        self.assertEqual(self.map[b], "b")
+        self.assertIs(self.map._keys[slot], b)
+
+        self.assertIs(next(it), b)
+        # Both slots are behind the iterator now, so b can move
+        self.assertEqual(self.map[b], "b")
+        self.assertIs(self.map._keys[tombstone], b)
+        self.assertEqual([c], list(it))
+
+    def testConcurrentModification(self):
+        for i in range(10):
+            self.map[i] = i
+
+        with self.assertRaises(RuntimeError):
+            for key in self.map:
+                self.map[key + 100] = key
+
+        with self.assertRaises(RuntimeError):
+            for key in self.map.keys():
+                self.map.remove(key)
+
+        # Reserving room rebuilds the slot arrays under the iterator
+        with self.assertRaises(RuntimeError):
+            for key in self.map.items():
+                self.map.reserve(500)
+
     def testRandomRemove(self):
         for _ in range(self.LOOPS):
             self.map.clear()
@@ -96,7 +170,7 @@ class HashTableLinearProbingTest(unittest.TestCase):
 
             self.assertEqual(len(self.map), len(keys_set))
 
-            keys = self.map.keys()
+            keys = list(self.map.keys())
             for key in keys:
                 self.map.remove(key)
 
@@ -139,6 +213,149 @@ class HashTableLinearProbingTest(unittest.TestCase):
 
         self.assertEqual(0, len(self.map))
 
+    def testCachedHashes(self):
+        CountingKey.hash_calls = 0
+        CountingKey.eq_calls = 0
+        keys = [CountingKey(i) for i in range(1000)]
+        for key in keys:
+            self.map[key] = key.data
+
+        # Resizing reuses the cached hashes so each key was hashed exactly once
+        self.assertEqual(len(keys), CountingKey.hash_calls)
+
+        # Keys only get compared against slots whose hash matches
+        CountingKey.eq_calls = 0
+        for key in keys:
+            self.assertEqual(key.data, self.map[key])
+        self.assertEqual(len(keys), CountingKey.eq_calls)
+
+    def testFromItems(self):
+        pymap = {key: key * 2 for key in self.gen_rand_list(self.MAX_SIZE)}
+
+        for items in (pymap, list(pymap.items()), iter(pymap.items())):
+            table = HashTableLinearProbing.from_items(items)
+            self.assertEqual(len(pymap), len(table))
+            for key in pymap:
+                self.assertEqual(pymap[key], table[key])
+            # The table is allocated once, at the capacity its constructor picks
+            # for the number of keys
+            self.assertEqual(HashTableLinearProbing(int(len(pymap) / 0.65) + 1).get_capacity(),
+                             table.get_capacity())
+
+        # An expected size which is too small still inserts everything
+        table = HashTableLinearProbing.from_items(((i, i) for i in range(100)), expected_size=10)
+        self.assertEqual(100, len(table))
+        for i in range(100):
+            self.assertEqual(i, table[i])
+
+    def testUpdate(self):
+        pymap = {}
+        for _ in range(10):
+            pairs = [(key, random.random()) for key in self.gen_rand_list(self.MAX_SIZE)]
+            pymap.update(pairs)
+            self.map.update(pairs)
+            self.assertEqual(len(pymap), len(self.map))
+            for key in pymap:
+                self.assertEqual(pymap[key], self.map[key])
+
+        # Overwriting keys which are all in the table does not grow it
+        capacity = self.map.get_capacity()
+        self.map.update({key: 0 for key in pymap})
+        self.assertEqual(capacity, self.map.get_capacity())
+        self.assertEqual(len(pymap), len(self.map))
+
+    def testCompactionRatio(self):
+        for ratio in (0, 0.0, -0.5, 1.5):
+            with self.assertRaises(ValueError):
+                self.map.compaction_ratio = ratio
+        # A table without tombstones has to grow, however low the ratio
+        for ratio in (1e-9, 1.0, None):
+            table = HashTableLinearProbing()
+            table.compaction_ratio = ratio
+            for i in range(100):
+                table[i] = i
+            self.assertEqual(100, len(table))
+            self.assertEqual(0, table.compaction_count)
+
+    def testChurnCompaction(self):
+        for i in range(100):
+            self.map[i] = i
+        capacity = self.map.get_capacity()
+
+        # Keep the number of live keys flat while churning through new keys
+        for i in range(100, 10000):
+            self.map[i] = i
+            self.assertEqual(i - 100, self.map.remove(i - 100))
+            self.assertEqual(100, len(self.map))
+
+        self.assertEqual(capacity, self.map.get_capacity())
+        self.assertTrue(self.map.compaction_count > 0)
+        for i in range(9900, 10000):
+            self.assertEqual(i, self.map[i])
+
+    def testCompact(self):
+        for i in range(1000):
+            self.map[i] = i
+        for i in range(0, 1000, 2):
+            self.map.remove(i)
+        self.assertEqual(500, self.map.tombstone_count())
+
+        before, after = self.map.compact()
+        self.assertEqual(500, before["tombstones"])
+        self.assertEqual(0, after["tombstones"])
+        self.assertEqual(0, self.map.tombstone_ratio())
+        self.assertEqual(500, after["keys"])
+        self.assertTrue(after["max_probe_length"] >= 1)
+        for i in range(1, 1000, 2):
+            self.assertEqual(i, self.map[i])
+
+    def testStats(self):
+        self.assertIsNone(self.map.stats())
+
+        self.map.enable_stats()
+        for i in range(1000):
+            self.map[i] = i
+        for i in range(0, 1000, 2):
+            self.map.remove(i)
+
+        stats = self.map.stats()
+        self.assertEqual(1500, stats["operations"])
+        self.assertEqual(1500, sum(stats["probe_histogram"].values()))
+        self.assertEqual(max(stats["probe_histogram"]), stats["max_probe_length"])
+        self.assertEqual(500, stats["size"])
+        self.assertEqual(500, stats["tombstones"])
+        self.assertTrue(stats["resize_count"] > 0)
+        self.assertTrue(stats["resize_time"] > 0)
+
+        self.map.disable_stats()
+        self.assertIsNone(self.map.stats())
+
+    def testBatchOperations(self):
+        pymap = {}
+        for _ in range(10):
+            pairs = [(key, random.random()) for key in self.gen_rand_list(self.MAX_SIZE)]
+            expected = []
+            for key, val in pairs:
+                expected.append(pymap.get(key, None))
+                pymap[key] = val
+            self.assertEqual(expected, self.map.put_many(pairs))
+
+            keys = self.gen_rand_list(self.MAX_SIZE)
+            self.assertEqual([pymap.get(key, None) for key in keys], self.map.get_many(keys))
+
+            keys = self.gen_rand_list(self.MAX_SIZE // 2)
+            self.assertEqual([pymap.pop(key, None) for key in keys], self.map.remove_many(keys))
+            self.assertEqual(len(pymap), len(self.map))
+
+        # Putting keys which are all in a full table again does not grow it
+        table = HashTableLinearProbing.from_items((i, i) for i in range(100))
+        capacity = table.get_capacity()
+        self.assertEqual(list(range(100)), table.put_many([(i, -i) for i in range(100)]))
+        self.assertEqual(capacity, table.get_capacity())
+
+        with self.assertRaises(ValueError):
+            self.map.get_many([1, None])
+
     def testRandomMapOperations(self):
         pymap = {}
 
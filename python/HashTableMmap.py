@@ -0,0 +1,237 @@
+"""
+An on-disk layout for the open-addressing hash-tables which can be opened
+with mmap for read-only lookups.
+
+The file starts with a fixed size header, followed by a slot array and a
+blob region:
+
+    header  magic, format version, table class name, capacity, key count
+    slots   capacity fixed-width records of (hash, blob offset), where a
+            hash of -1 marks an empty slot
+    blobs   one record per key: key length, value length, pickled key,
+            pickled value
+
+Keys are placed in the slot array with the probing sequence of the table
+class they were saved from (setup_probing, probe and home_slot), so a
+lookup reads only the slots on its probe path and the blobs whose hash
+matches. Opening a file does no work proportional to the number of keys, and
+every process which maps the same file shares a single page cache copy of
+it. Lookups are not zero-copy: the key bytes they compare and the value
+they unpickle are copied out of the mapping.
+
+Keys and values are read back with pickle.loads, which can run arbitrary
+code, so only map files which come from a trusted source.
+
+Python's hash() of str and bytes is randomized per process, so slots store
+a stable 63-bit hash of the pickled key instead. Two keys are considered
+equal when they pickle to the same bytes, which holds for the usual key
+types (str, bytes, int, float and tuples of these) but not, for example,
+for 1 and 1.0 or for frozensets. Keys are pickled without the memo, which
+would otherwise write an object which appears twice in a key differently
+from two equal but distinct objects.
+
+"""
+
+import hashlib
+import io
+import mmap
+import os
+import pickle
+import struct
+
+from HashTableDoubleHashing import HashTableDoubleHashing
+from HashTableLinearProbing import HashTableLinearProbing
+from HashTableQuadraticProbing import HashTableQuadraticProbing
+from HashTableRobinHood import HashTableRobinHood
+
+MAGIC = b"OAHTMAP\0"
+VERSION = 1
+# magic, version, table class name, capacity, key count
+HEADER = struct.Struct("<8sI32sQQ")
+# hash (-1 when the slot is empty), offset of the key's blob record
+SLOT = struct.Struct("<qQ")
+# pickled key length, pickled value length
+BLOB = struct.Struct("<II")
+EMPTY = -1
+# Pinned so the stored bytes, and thus the hashes, do not change
+# with the running Python's default pickle protocol
+PICKLE_PROTOCOL = 4
+
+TABLE_CLASSES = {cls.__name__: cls for cls in (
+    HashTableLinearProbing,
+    HashTableQuadraticProbing,
+    HashTableDoubleHashing,
+    HashTableRobinHood,
+)}
+
+# Pickles a key the same way whether or not its parts are shared objects
+def dump_key(key):
+    buf = io.BytesIO()
+    pickler = pickle.Pickler(buf, PICKLE_PROTOCOL)
+    # Disables the memo, so a repeated object is written out in full again
+    pickler.fast = True
+    pickler.dump(key)
+    return buf.getvalue()
+
+# Hash of a key which is the same in every process
+def stable_hash(key_bytes):
+    digest = hashlib.blake2b(key_bytes, digest_size=8).digest()
+    return int.from_bytes(digest, "little") >> 1
+
+# Yields the slot indices on the probe path of a key with the given hash.
+# The prober is an empty table used only for its probing sequence. It is
+# given the stable hash, so hash dependent probing (double hashing) is
+# stable too.
+def _probe_path(prober, key_hash):
+    prober.setup_probing(key_hash)
+    offset = prober.home_slot(key_hash)
+    yield offset
+    x = 1
+    while True:
+        yield prober.normalise_index(offset + prober.probe(x))
+        x += 1
+
+# Writes the keys and values of an open-addressing table to path. The file
+# is written next to path and renamed over it, so processes which already
+# have the old file mapped keep reading a consistent copy.
+def write_table(table, path):
+    name = type(table).__name__
+    if name not in TABLE_CLASSES:
+        raise ValueError("Unsupported table class: " + name)
+
+    # Size the table for its current keys at the table's load factor
+    capacity = int(len(table) / table.load_factor) + 1
+    prober = TABLE_CLASSES[name](capacity, table.load_factor)
+    capacity = prober.capacity
+
+    slots = bytearray(SLOT.pack(EMPTY, 0) * capacity)
+    blobs = bytearray()
+    blob_start = HEADER.size + SLOT.size * capacity
+    count = 0
+
+    for key, val in table.items():
+        key_bytes = dump_key(key)
+        val_bytes = pickle.dumps(val, PICKLE_PROTOCOL)
+        key_hash = stable_hash(key_bytes)
+
+        for i in _probe_path(prober, key_hash):
+            if SLOT.unpack_from(slots, i * SLOT.size)[0] == EMPTY:
+                break
+        SLOT.pack_into(slots, i * SLOT.size, key_hash, blob_start + len(blobs))
+        blobs += BLOB.pack(len(key_bytes), len(val_bytes))
+        blobs += key_bytes
+        blobs += val_bytes
+        count += 1
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, name.encode(), capacity, count))
+        f.write(slots)
+        f.write(blobs)
+    os.replace(tmp_path, path)
+
+class MappedHashTable:
+    # Maps the file at path read-only. Only the header is read here.
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            if len(self._map) < HEADER.size:
+                raise ValueError("Not a mapped hash-table file: " + path)
+            magic, version, name, capacity, count = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC:
+                raise ValueError("Not a mapped hash-table file: " + path)
+            if version != VERSION:
+                raise ValueError("Unsupported format version: " + str(version))
+            name = name.rstrip(b"\0").decode()
+            if name not in TABLE_CLASSES:
+                raise ValueError("Unsupported table class: " + name)
+            if len(self._map) < HEADER.size + SLOT.size * capacity:
+                raise ValueError("Truncated mapped hash-table file: " + path)
+        except ValueError:
+            self._map.close()
+            raise
+
+        self.capacity = capacity
+        self.key_count = count
+        self.table_class = TABLE_CLASSES[name]
+        # The stored capacity was already adjusted when the file was written,
+        # so it is set directly rather than adjusted a second time
+        self._prober = self.table_class()
+        self._prober.capacity = capacity
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.key_count
+
+    def __bool__(self):
+        return self.key_count != 0
+
+    def get_capacity(self):
+        return self.capacity
+
+    # Returns the offset of the key's blob record or -1 if it does not exist
+    def _find(self, key):
+        if key is None:
+            raise ValueError("Null key")
+
+        key_bytes = dump_key(key)
+        key_hash = stable_hash(key_bytes)
+        mm = self._map
+
+        for i in _probe_path(self._prober, key_hash):
+            slot_hash, offset = SLOT.unpack_from(mm, HEADER.size + i * SLOT.size)
+            if slot_hash == EMPTY:
+                return -1
+            if slot_hash == key_hash:
+                key_len = BLOB.unpack_from(mm, offset)[0]
+                start = offset + BLOB.size
+                if mm[start:start + key_len] == key_bytes:
+                    return offset
+
+    def contains_key(self, key):
+        return self._find(key) != -1
+
+    def __contains__(self, key):
+        return self.contains_key(key)
+
+    # Returns the value mapped to key, or None if key is absent
+    def __getitem__(self, key):
+        offset = self._find(key)
+        if offset == -1:
+            return None
+        key_len, val_len = BLOB.unpack_from(self._map, offset)
+        start = offset + BLOB.size + key_len
+        return pickle.loads(self._map[start:start + val_len])
+
+    # Yields (key, value) pairs in slot order
+    def items(self):
+        mm = self._map
+        for i in range(self.capacity):
+            slot_hash, offset = SLOT.unpack_from(mm, HEADER.size + i * SLOT.size)
+            if slot_hash == EMPTY:
+                continue
+            key_len, val_len = BLOB.unpack_from(mm, offset)
+            start = offset + BLOB.size
+            key = pickle.loads(mm[start:start + key_len])
+            yield key, pickle.loads(mm[start + key_len:start + key_len + val_len])
+
+    def keys(self):
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        for _, val in self.items():
+            yield val
+
+    def __iter__(self):
+        return self.keys()
@@ -0,0 +1,120 @@
+from HashTableMmap import MappedHashTable, write_table
+from HashTableDoubleHashing import HashTableDoubleHashing
+from HashTableLinearProbing import HashTableLinearProbing
+from HashTableQuadraticProbing import HashTableQuadraticProbing
+from HashTableRobinHood import HashTableRobinHood
+from HashTableSeparateChaining import HashTableSeparateChaining
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+
+class HashTableMmapTest(unittest.TestCase):
+    MAX_SIZE = random.randint(1, 750)
+    MAX_RAND_NUM = random.randint(1, 350)
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".oaht")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def testRoundTrip(self):
+        for cls in (HashTableLinearProbing, HashTableQuadraticProbing,
+                    HashTableDoubleHashing, HashTableRobinHood):
+            table = cls()
+            pymap = {}
+            for key in self.gen_rand_list(self.MAX_SIZE):
+                table[key] = pymap[key] = str(key)
+            for key in self.gen_rand_list(self.MAX_SIZE // 2):
+                table.remove(key)
+                pymap.pop(key, None)
+
+            write_table(table, self.path)
+            with MappedHashTable(self.path) as mapped:
+                self.assertIs(cls, mapped.table_class)
+                self.assertEqual(len(pymap), len(mapped))
+                self.assertEqual(pymap, dict(mapped.items()))
+                for key in range(-self.MAX_RAND_NUM - 5, self.MAX_RAND_NUM + 5):
+                    self.assertEqual(pymap.get(key, None), mapped[key])
+                    self.assertEqual(key in pymap, key in mapped)
+
+    def testMixedKeys(self):
+        table = HashTableLinearProbing()
+        pymap = {"a": 1, b"b": [2, 3], (4, "five"): {"six": 6}, 7.5: None}
+        for key, val in pymap.items():
+            table[key] = val
+        write_table(table, self.path)
+
+        with MappedHashTable(self.path) as mapped:
+            for key, val in pymap.items():
+                self.assertEqual(val, mapped[key])
+                self.assertTrue(mapped.contains_key(key))
+            self.assertFalse(mapped.contains_key("missing"))
+            self.assertEqual(sorted(map(repr, pymap)), sorted(map(repr, mapped)))
+            with self.assertRaises(ValueError):
+                mapped[None]
+
+    # Equal keys must match whether or not their parts are the same objects
+    def testSharedObjectsInKeys(self):
+        table = HashTableRobinHood()
+        s = "user" + str(42)
+        table[(s, s)] = 1
+        table[("a" + str(1), ("a" + str(1),))] = 2
+        write_table(table, self.path)
+
+        with MappedHashTable(self.path) as mapped:
+            key = ("user" + str(42), "user" + str(42))
+            self.assertIsNot(key[0], key[1])
+            self.assertEqual(table[key], mapped[key])
+            self.assertEqual(1, mapped[key])
+            t = "a" + str(1)
+            self.assertEqual(2, mapped[(t, (t,))])
+
+    def testEmptyTable(self):
+        write_table(HashTableRobinHood(), self.path)
+        with MappedHashTable(self.path) as mapped:
+            self.assertEqual(0, len(mapped))
+            self.assertFalse(mapped)
+            self.assertIsNone(mapped["key"])
+            self.assertEqual([], list(mapped))
+
+    def testUnsupportedTable(self):
+        with self.assertRaises(ValueError):
+            write_table(HashTableSeparateChaining(), self.path)
+
+    def testBadFile(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a hash table, just some bytes in a file")
+        with self.assertRaises(ValueError):
+            MappedHashTable(self.path)
+
+    # The file must be readable from a process with a different hash seed
+    def testOtherProcess(self):
+        table = HashTableDoubleHashing()
+        for i in range(500):
+            table["key%d" % i] = i
+        write_table(table, self.path)
+
+        script = (
+            "import sys\n"
+            "from HashTableMmap import MappedHashTable\n"
+            "with MappedHashTable(sys.argv[1]) as mapped:\n"
+            "    assert all(mapped['key%d' % i] == i for i in range(500))\n"
+            "    assert mapped['key500'] is None\n"
+        )
+        env = dict(os.environ, PYTHONHASHSEED="12345")
+        here = os.path.dirname(os.path.abspath(__file__))
+        subprocess.run([sys.executable, "-c", script, self.path],
+                       check=True, env=env, cwd=here)
+
+    # Generate a list of random numbers
+    def gen_rand_list(self, sz):
+        return [random.randint(-self.MAX_RAND_NUM, self.MAX_RAND_NUM) for _ in range(sz)]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,27 @@
 from abc import ABC, abstractmethod
-from collections import deque
+from itertools import islice
+from HashTableStats import HashTableStats
+
+# Multiplicative (Fibonacci) scramble of a hash, which spreads consecutive
+# integer hashes over unrelated values
+def fibonacci_hash(key_hash):
+    return ((key_hash * 11400714819323198485) & 0xFFFFFFFFFFFFFFFF) >> 32
+
+# How far a live iterator has walked the slots: every slot up to and
+# including position has already been visited
+class IteratorCursor:
+    __slots__ = ("position",)
+
+    def __init__(self):
+        self.position = -1
 
 class HashTableOpenAddressingBase(ABC):
     DEFAULT_CAPACITY = 7
     TOMBSTONE = "TOMBSTONE"
+    # When the table is full and at least this fraction of the used buckets
+    # are tombstones, the table is rehashed at the same capacity instead of
+    # being grown. Set compaction_ratio to None to always grow the table.
+    DEFAULT_COMPACTION_RATIO = 0.25
 
     def __init__(self, capacity=7, load_factor=0.65):
         if self.__class__ == HashTableOpenAddressingBase:
@@ -18,17 +36,30 @@ class HashTableOpenAddressingBase(ABC):
         self.capacity = max(self.DEFAULT_CAPACITY, capacity)
         self.key_count = self.used_buckets = 0  
         self.modification_count = 0
+        self.compaction_ratio = self.DEFAULT_COMPACTION_RATIO
+        self.compaction_count = 0
+        # Probe and resize counters, only allocated while stats are enabled
+        self._stats = None
+        # Cursors of the live iterators. Lazy relocation on lookups is
+        # skipped when it would move a key past one of them.
+        self._active_iterators = set()
         super().__init__()
 
         self.adjust_capacity()
 
         self.threshold = int(self.capacity * self.load_factor)
 
-        self._keys = deque([None for _ in range(self.capacity)])
-        self._values = deque([None for _ in range(self.capacity)])
-        
+        self._keys = self.new_table()
+        self._values = self.new_table()
+        # Cached hash of the key stored in each slot. Probes compare these
+        # first and only call the key's __eq__ when the hashes match, and
+        # resizing reuses them instead of calling hash() again
+        self._hashes = self.new_table()
+
+    # Prepares the probe sequence of a key from its hash, which callers
+    # already have, so probing never calls hash() again
     @abstractmethod
-    def setup_probing(self, key):
+    def setup_probing(self, key_hash):
         pass
 
     @abstractmethod
@@ -39,13 +70,23 @@ class HashTableOpenAddressingBase(ABC):
     def adjust_capacity(self):
         pass
 
+    # Returns the slot where the probe sequence of a key starts
+    def home_slot(self, key_hash):
+        return self.normalise_index(key_hash)
+
     def increase_capacity(self):
         self.capacity = 2 * self.capacity + 1
     
+    # Allocates an empty slot array of the current capacity. Slots are kept in
+    # plain lists rather than deques since probing indexes into the middle of
+    # the table and list indexing is O(1) whereas deque indexing is O(n)
+    def new_table(self):
+        return [None] * self.capacity
+
     def clear(self):
-        for i in range(self.capacity):
-            self._keys[i] = None
-            self._values[i] = None
+        self._keys = self.new_table()
+        self._values = self.new_table()
+        self._hashes = self.new_table()
 
         self.key_count = self.used_buckets = 0
         self.modification_count += 1
@@ -61,12 +102,44 @@ class HashTableOpenAddressingBase(ABC):
     def __bool__(self):
         return self.key_count != 0
 
+    # Starts recording probe counts and resize timings. Disabled by default
+    # since it costs a little on every operation.
+    def enable_stats(self):
+        if self._stats is None:
+            self._stats = HashTableStats()
+
+    def disable_stats(self):
+        self._stats = None
+
+    # Returns a snapshot of the recorded counters, or None if stats are disabled.
+    # Resizes count every rebuild of the table, compactions included.
+    def stats(self):
+        if self._stats is None:
+            return None
+        return self._stats.snapshot(
+            size=self.key_count,
+            capacity=self.capacity,
+            tombstones=self.tombstone_count(),
+            compaction_count=self.compaction_count,
+        )
+
+    # Returns the number of deleted slots still marked with a tombstone
+    def tombstone_count(self):
+        return self.used_buckets - self.key_count
+
+    # Returns the fraction of the used buckets which hold tombstones
+    def tombstone_ratio(self):
+        if self.used_buckets == 0:
+            return 0.0
+        return self.tombstone_count() / self.used_buckets
+
     def contains_key(self, key):
         if key is None:
             raise ValueError("Null key")
         
-        self.setup_probing(key)
-        offset = self.normalise_index(hash(key))
+        key_hash = hash(key)
+        self.setup_probing(key_hash)
+        offset = self.home_slot(key_hash)
 
         # Start at the original hash value and probe until we find a spot where our key
         # is or hit a null element in which case our element does not exist
@@ -77,25 +150,29 @@ class HashTableOpenAddressingBase(ABC):
         while True:
             # Ignore deleted cells, but record where the first index
             # of  a deleted cell is found to perform the lazy relocation later.
-            if self._keys[i] == self.TOMBSTONE:
+            if self._keys[i] is self.TOMBSTONE:
                 if j == -1: j = i
             # We hit a non-null key, perhaps it's the one we're looking for.
             elif self._keys[i] is not None: 
                 # The key we want is in the hash-table!
-                if self._keys[i] == key:
+                if self._hashes[i] == key_hash and self._keys[i] == key:
                     # If j != -1, this means we previously encountered a deleted cell.
                     # We can perform an optimization by swapping the entries in cells
                     # i and j so that the next time we search for this key it will be 
                     # found faster. This is called lazy deletion/relocation
-                    if j != -1:
+                    if j != -1 and self._can_relocate(i, j):
                         # Swap the key-value pairs of positions i and j.
                         self._keys[j] = self._keys[i]
-                        self._values[j] = self._values[i]    
+                        self._values[j] = self._values[i]
+                        self._hashes[j] = key_hash
                         self._keys[i] = self.TOMBSTONE
                         self._values[i] = None
+                        self._hashes[i] = None
+                    if self._stats is not None: self._stats.record_probes(x)
                     return True
             else:
                 # Key was not found in the hash-table 
+                if self._stats is not None: self._stats.record_probes(x)
                 return False
 
             i = self.normalise_index(offset + self.probe(x))
@@ -104,28 +181,62 @@ class HashTableOpenAddressingBase(ABC):
 
 
 
+    # Whether lazy relocation may move a key from slot i to slot j. A move
+    # is safe unless it crosses the position of a live iterator, which
+    # would then yield the key twice or not at all.
+    def _can_relocate(self, i, j):
+        for cursor in self._active_iterators:
+            if (i <= cursor.position) != (j <= cursor.position):
+                return False
+        return True
+
+    # Lazily yields the indices of the slots holding a key. Raises a
+    # RuntimeError if the table is modified while the walk is in progress.
+    def _live_slots(self):
+        expected_count = self.modification_count
+        cursor = IteratorCursor()
+        self._active_iterators.add(cursor)
+        try:
+            for i in range(self.capacity):
+                if self._keys[i] is not None and self._keys[i] is not self.TOMBSTONE:
+                    cursor.position = i
+                    yield i
+                    if self.modification_count != expected_count:
+                        raise RuntimeError("Concurrent modification")
+        finally:
+            self._active_iterators.discard(cursor)
+
+    # Returns a lazy iterator over the keys. While it is suspended, lookups
+    # only relocate keys which stay on the same side of it, so an iterator
+    # which is kept but never finished leaves some tombstones in place
+    # until the next rehash.
     def keys(self):
-        hash_table_keys = []
-        for i in range(self.capacity):
-            if self._keys[i] is not None and self._keys[i] != self.TOMBSTONE:
-                hash_table_keys.append(self._keys[i])
-        return hash_table_keys
-        
+        return (self._keys[i] for i in self._live_slots())
+
+    # Returns a lazy iterator over the values
     def values(self):
-        hash_table_values = []
-        for i in range(self.capacity):
-            if self._keys[i] is not None and self._keys[i] != self.TOMBSTONE:
-                hash_table_values.append(self._values[i])
+        return (self._values[i] for i in self._live_slots())
+
+    # Returns a lazy iterator over the (key, value) pairs
+    def items(self):
+        return ((self._keys[i], self._values[i]) for i in self._live_slots())
 
     # Double the size of the hash-table
     def resize_table(self):
         self.increase_capacity()
         self.adjust_capacity()
+        self.rehash_table()
+
+    # Rebuilds the slot arrays at the current capacity, re-inserting every
+    # live key and dropping all the tombstones
+    def rehash_table(self):
+        if self._stats is not None: start = self._stats.start_resize()
 
         self.threshold = int(self.capacity * self.load_factor)
 
-        old_key_table = deque([None for _ in range(self.capacity)])
-        old_value_table = deque([None for _ in range(self.capacity)])
+        old_key_table = self.new_table()
+        old_value_table = self.new_table()
+        old_hash_table = self.new_table()
 
         # Perform key table pointer swap 
         key_table_temp = self._keys
@@ -139,15 +250,110 @@ class HashTableOpenAddressingBase(ABC):
         old_value_table = value_table_temp
         value_table_temp = None
 
+        # Perform hash table pointer swap
+        hash_table_temp = self._hashes
+        self._hashes = old_hash_table
+        old_hash_table = hash_table_temp
+        hash_table_temp = None
+
         # Reset the key count and buckets used since we are about to 
         # re-insert all the keys into the hash-table
         self.key_count = self.used_buckets = 0
 
         for i in range(len(old_key_table)):
-            if old_key_table[i] is not None and old_key_table[i] != self.TOMBSTONE:
-                self[old_key_table[i]] = old_value_table[i]
+            if old_key_table[i] is not None and old_key_table[i] is not self.TOMBSTONE:
+                self._reinsert(old_key_table[i], old_hash_table[i], old_value_table[i])
             old_key_table[i] = None
             old_value_table[i] = None
+            old_hash_table[i] = None
+
+        if self._stats is not None: self._stats.end_resize(start)
+
+    # Rehashes the table at the same capacity to get rid of the tombstones.
+    # Returns the probe statistics from before and after the compaction.
+    def compact(self):
+        before = self.probe_stats()
+        self.rehash_table()
+        self.compaction_count += 1
+        self.modification_count += 1
+        return before, self.probe_stats()
+
+    # The fraction of tombstones at which make_room compacts instead of
+    # growing, in (0, 1], or None to always grow
+    @property
+    def compaction_ratio(self):
+        return self._compaction_ratio
+
+    @compaction_ratio.setter
+    def compaction_ratio(self, ratio):
+        if ratio is not None and not 0 < ratio <= 1:
+            raise ValueError("Illegal compaction_ratio: " + str(ratio))
+        self._compaction_ratio = ratio
+
+    # Makes room for one more key, either by compacting the table when the
+    # tombstones dominate or by growing it. Compacting only helps if the
+    # keys alone are below the threshold, otherwise the table has to grow.
+    def make_room(self):
+        if self.compaction_ratio is not None and \
+                self.key_count < self.threshold and \
+                self.tombstone_ratio() >= self.compaction_ratio:
+            self.rehash_table()
+            self.compaction_count += 1
+            self.modification_count += 1
+        else:
+            self.resize_table()
+
+    # Returns the number of probes needed to reach the key stored at
+    # index i, starting from its home slot
+    def probe_length(self, i):
+        self.setup_probing(self._hashes[i])
+        offset = self.home_slot(self._hashes[i])
+
+        j = offset
+        x = 1
+
+        while j != i:
+            j = self.normalise_index(offset + self.probe(x))
+            x += 1
+
+        return x
+
+    # Returns a summary of the probe lengths of all the keys in the table
+    def probe_stats(self):
+        total = longest = 0
+        for i in range(self.capacity):
+            if self._keys[i] is not None and self._keys[i] is not self.TOMBSTONE:
+                length = self.probe_length(i)
+                total += length
+                longest = max(longest, length)
+
+        return {
+            "keys": self.key_count,
+            "tombstones": self.tombstone_count(),
+            "capacity": self.capacity,
+            "average_probe_length": total / self.key_count if self.key_count else 0.0,
+            "max_probe_length": longest,
+        }
+
+    # Inserts a key known to be absent from the table using its cached hash.
+    # Used when rebuilding the table, where there are no tombstones to reuse
+    # and no duplicate keys, so only the first empty slot has to be found
+    def _reinsert(self, key, key_hash, val):
+        self.setup_probing(key_hash)
+        offset = self.home_slot(key_hash)
+
+        i = offset
+        x = 1
+
+        while self._keys[i] is not None:
+            i = self.normalise_index(offset + self.probe(x))
+            x += 1
+
+        self._keys[i] = key
+        self._values[i] = val
+        self._hashes[i] = key_hash
+        self.key_count += 1
+        self.used_buckets += 1
 
     # Converts a hash value to an index. Essentially, this strips the 
     # negative sign and places the hash value in the domain [0, capacity)
@@ -163,10 +369,14 @@ class HashTableOpenAddressingBase(ABC):
     # exists inside the hash-table then the value is updated.
     def __setitem__(self, key, val):
         if key is None: raise ValueError("Null key")
-        if self.used_buckets >= self.threshold: self.resize_table()
-        
-        self.setup_probing(key)
-        offset = self.normalise_index(hash(key))
+        if self.used_buckets >= self.threshold: self.make_room()
+        return self._put(key, hash(key), val)
+
+    # Inserts or updates a key whose hash has already been computed. The caller
+    # is responsible for making sure there is room in the table
+    def _put(self, key, key_hash, val):
+        self.setup_probing(key_hash)
+        offset = self.home_slot(key_hash)
 
         i = offset
         j = -1
@@ -174,22 +384,25 @@ class HashTableOpenAddressingBase(ABC):
 
         while True:
             # The current slot was previously deleted
-            if self._keys[i] == self.TOMBSTONE:
+            if self._keys[i] is self.TOMBSTONE:
                 if j == -1: j = i
             # The current cell already contains a key
             elif self._keys[i] is not None:
                 # The key we're trying to insert already exists in the hash-table,
                 # so update its value with the most recent value
-                if self._keys[i] == key:
+                if self._hashes[i] == key_hash and self._keys[i] == key:
                     old_value = self._values[i]
                     if j == -1:
                         self._values[i] = val
                     else:
                         self._keys[i] = self.TOMBSTONE
                         self._values[i] = None
+                        self._hashes[i] = None
                         self._keys[j] = key
                         self._values[j] = val
+                        self._hashes[j] = key_hash
                     self.modification_count += 1
+                    if self._stats is not None: self._stats.record_probes(x)
                     return old_value
             # Current cell is null so an insertion/update can occur
             else:
@@ -199,6 +412,7 @@ class HashTableOpenAddressingBase(ABC):
                     self.key_count += 1
                     self._keys[i] = key
                     self._values[i] = val
+                    self._hashes[i] = key_hash
 
                     # Previously seen deleted bucket. Instead of inserting
                     # the new element at i where the null element is, insert
@@ -207,20 +421,188 @@ class HashTableOpenAddressingBase(ABC):
                     self.key_count += 1
                     self._keys[j] = key
                     self._values[j] = val
+                    self._hashes[j] = key_hash
 
                 self.modification_count += 1
+                if self._stats is not None: self._stats.record_probes(x)
                 return None
 
             i = self.normalise_index(offset + self.probe(x))
             x += 1
 
 
+    # Grows the table at most once so that n more keys can be inserted
+    # without triggering a resize. The table holds up to threshold used
+    # buckets, since __setitem__ only makes room once they reach it.
+    def reserve(self, n):
+        needed = self.used_buckets + n
+        if needed <= self.threshold:
+            return
+        while int(self.capacity * self.load_factor) < needed:
+            self.increase_capacity()
+            self.adjust_capacity()
+        self.rehash_table()
+        self.modification_count += 1
+
+    # Reserves room for the keys of a batch which are not in the table yet.
+    # Keys are only looked up when the whole batch might not fit, so that
+    # overwriting existing keys never grows the table.
+    def _reserve_batch(self, keys, hashes):
+        n = len(keys)
+        if self.key_count and self.used_buckets + n > self.threshold:
+            n = self._count_missing(keys, hashes)
+        self.reserve(n)
+
+    # Returns how many keys of a batch are not in the table, without the
+    # lazy relocation or the probe counting of a regular lookup
+    def _count_missing(self, keys, hashes):
+        table_keys = self._keys
+        table_hashes = self._hashes
+        setup_probing = self.setup_probing
+        home_slot = self.home_slot
+        probe = self.probe
+        capacity = self.capacity
+        tombstone = self.TOMBSTONE
+
+        missing = 0
+        for key, key_hash in zip(keys, hashes):
+            setup_probing(key_hash)
+            offset = home_slot(key_hash)
+            i = offset
+            x = 1
+            while True:
+                slot_key = table_keys[i]
+                if slot_key is None:
+                    missing += 1
+                    break
+                if slot_key is not tombstone and table_hashes[i] == key_hash \
+                        and slot_key == key:
+                    break
+                i = (offset + probe(x)) % capacity
+                x += 1
+        return missing
+
+    # Inserts all the key-value pairs of a mapping or an iterable of pairs.
+    # The table is presized once up front for the keys it does not hold yet,
+    # so the insertions skip the per-item resize check
+    def update(self, items):
+        if hasattr(items, "items"):
+            items = list(items.items())
+        elif hasattr(items, "keys"):
+            items = [(key, items[key]) for key in items.keys()]
+        elif not isinstance(items, (list, tuple)):
+            items = list(items)
+        keys = [key for key, _ in items]
+        hashes = self._hash_all(keys)
+        self._reserve_batch(keys, hashes)
+        put = self._put
+        for (key, val), key_hash in zip(items, hashes):
+            put(key, key_hash, val)
+
+    # Inserts key-value pairs without checking whether the table needs to grow
+    def _put_all(self, items):
+        put = self._put
+        for key, val in items:
+            if key is None: raise ValueError("Null key")
+            put(key, hash(key), val)
+
+    # Builds a table from a mapping or an iterable of key-value pairs. The
+    # table is sized for expected_size keys from the start; pairs beyond
+    # that estimate fall back to regular insertion. Any other keyword
+    # arguments are passed on to the constructor, e.g. secondary_hash.
+    @classmethod
+    def from_items(cls, items, expected_size=None, load_factor=0.65, **kwargs):
+        if hasattr(items, "items"):
+            items = items.items()
+        if expected_size is None:
+            if not hasattr(items, "__len__"):
+                items = list(items)
+            expected_size = len(items)
+
+        # The smallest capacity whose threshold holds expected_size keys, so
+        # the reserve below only grows the table if float rounding fell short
+        table = cls(int(expected_size / load_factor) + 1, load_factor, **kwargs)
+        table.reserve(expected_size)
+
+        it = iter(items)
+        table._put_all(islice(it, expected_size))
+        for key, val in it:
+            table[key] = val
+        return table
+
+    # Hashes a batch of keys up front, rejecting null keys before
+    # any of them is looked at
+    def _hash_all(self, keys):
+        hashes = []
+        for key in keys:
+            if key is None: raise ValueError("Null key")
+            hashes.append(hash(key))
+        return hashes
+
+    # Looks up a batch of keys and returns their values in input order.
+    # The attribute lookups are hoisted out of the probing loop, which also
+    # skips the lazy relocation done by __getitem__.
+    def get_many(self, keys):
+        if not isinstance(keys, (list, tuple)):
+            keys = list(keys)
+        hashes = self._hash_all(keys)
+        if self._stats is not None:
+            return [self[key] for key in keys]
+
+        table_keys = self._keys
+        table_values = self._values
+        table_hashes = self._hashes
+        setup_probing = self.setup_probing
+        home_slot = self.home_slot
+        probe = self.probe
+        capacity = self.capacity
+        tombstone = self.TOMBSTONE
+
+        result = []
+        for key, key_hash in zip(keys, hashes):
+            setup_probing(key_hash)
+            offset = home_slot(key_hash)
+            i = offset
+            x = 1
+            while True:
+                slot_key = table_keys[i]
+                if slot_key is None:
+                    result.append(None)
+                    break
+                if slot_key is not tombstone and table_hashes[i] == key_hash \
+                        and slot_key == key:
+                    result.append(table_values[i])
+                    break
+                i = (offset + probe(x)) % capacity
+                x += 1
+        return result
+
+    # Inserts a batch of key-value pairs, growing the table at most once and
+    # only for the keys it does not hold yet. Returns the previous values in
+    # input order.
+    def put_many(self, pairs):
+        if not isinstance(pairs, (list, tuple)):
+            pairs = list(pairs)
+        keys = [key for key, _ in pairs]
+        hashes = self._hash_all(keys)
+        self._reserve_batch(keys, hashes)
+        put = self._put
+        return [put(key, key_hash, val) for (key, val), key_hash in zip(pairs, hashes)]
+
+    # Removes a batch of keys and returns their values in input order
+    def remove_many(self, keys):
+        if not isinstance(keys, (list, tuple)):
+            keys = list(keys)
+        hashes = self._hash_all(keys)
+        remove = self._remove
+        return [remove(key, key_hash) for key, key_hash in zip(keys, hashes)]
+
     def __getitem__(self, key):
         if key is None: raise ValueError("Null key")
         
-        self.setup_probing(key)
-
-        offset = self.normalise_index(hash(key))
+        key_hash = hash(key)
+        self.setup_probing(key_hash)
+        offset = self.home_slot(key_hash)
 
         # Start at the original hash value and probe until we find a spot where our key 
         # is or we hit a null element in which case our element does not exist.
@@ -231,27 +613,32 @@ class HashTableOpenAddressingBase(ABC):
         while True:
             # Ignore deleted cells, but record where the first index
             # of a deleted cell is found to perform lazy relocaltion later
-            if self._keys == self.TOMBSTONE:
+            if self._keys[i] is self.TOMBSTONE:
                 if j == -1: j = i
             # We hit a non-null key, perhaps it's the one we're looking for
             elif self._keys[i] is not None:
                 # The key we want is in the hash-table!
-                if self._keys[i] == key:
+                if self._hashes[i] == key_hash and self._keys[i] == key:
                     # If j != -1 this means we previously encountered a deleted cell.
                     # We can perform an optimization by swapping the entries in cells
                     # i and j so that the next time we search for this key it will be
                     # found faster. This is called lazy deletion/relocation.
-                    if j != -1:
+                    if j != -1 and self._can_relocate(i, j):
                         # Swap key-values pairs at indexes i and j.
                         self._keys[j] = self._keys[i]
-                        self._values[j] = self.values[i]
+                        self._values[j] = self._values[i]
+                        self._hashes[j] = key_hash
                         self._keys[i] = self.TOMBSTONE
                         self._values[i] = None
+                        self._hashes[i] = None
+                        if self._stats is not None: self._stats.record_probes(x)
                         return self._values[j]
                     else:
+                        if self._stats is not None: self._stats.record_probes(x)
                         return self._values[i]
             # Element was not found in the hash-table
             else:
+                if self._stats is not None: self._stats.record_probes(x)
                 return None
 
             i = self.normalise_index(offset + self.probe(x))
@@ -263,9 +650,11 @@ class HashTableOpenAddressingBase(ABC):
     # null if the key does not exists.
     def remove(self, key):
         if key is None: raise ValueError("Null key")
-        
-        self.setup_probing(key)
-        offset = self.normalise_index(hash(key))
+        return self._remove(key, hash(key))
+
+    def _remove(self, key, key_hash):
+        self.setup_probing(key_hash)
+        offset = self.home_slot(key_hash)
 
         # Starting at the original hash probe until we find a spot where our key is
         # or we hit a null element in which case our element does not exist.
@@ -278,15 +667,19 @@ class HashTableOpenAddressingBase(ABC):
             # if self._keys[i] == self.TOMBSTONE: continue
             
             # Key was not found in hash-table
-            if self._keys[i] is None: return None
+            if self._keys[i] is None:
+                if self._stats is not None: self._stats.record_probes(x)
+                return None
         
             # The key we want to remove is in the hash-table!
-            if self._keys[i] == key:
+            if self._hashes[i] == key_hash and self._keys[i] == key:
                 self.key_count -= 1
                 self.modification_count += 1
                 old_value = self._values[i]
                 self._keys[i] = self.TOMBSTONE
                 self._values[i] = None
+                self._hashes[i] = None
+                if self._stats is not None: self._stats.record_probes(x)
                 return old_value
 
             i = self.normalise_index(offset + self.probe(x))
@@ -295,26 +688,15 @@ class HashTableOpenAddressingBase(ABC):
     def __str__(self):
         result = "{"
         for i in range(self.capacity):
-            if self._keys[i] is not None and self._keys[i] != self.TOMBSTONE:
+            if self._keys[i] is not None and self._keys[i] is not self.TOMBSTONE:
                 result = str(self._keys[i]) + " => " + str(self._values[i]) + ", "
         result += "}"
         return result
 
+    # Returns an independent iterator over the keys, so iterations
+    # can be nested or interleaved. See keys for its effect on relocation.
     def __iter__(self):
-        # self.MODIFICATION_COUNT = self.modification_count
-        self.index = 0
-        self.keysLeft = self.key_count
-        return self
-
-    def __next__(self):
-        if self.keysLeft == 0:
-            raise StopIteration
-        while self._keys[self.index] is None or self._keys[self.index] == self.TOMBSTONE:
-            self.index += 1
-        self.keysLeft -= 1
-        data = self._keys[self.index]
-        self.index += 1
-        return data
+        return self.keys()
 
 
 
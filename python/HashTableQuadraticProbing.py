@@ -9,7 +9,7 @@ class HashTableQuadraticProbing(HashTableOpenAddressingBase):
         k = int(math.log(n, 2))
         return 2**(k+1)
 
-    def setup_probing(self, key):
+    def setup_probing(self, key_hash):
         pass
 
     def probe(self, x):
@@ -119,7 +119,7 @@ class HashTableQuadraticProbingTest(unittest.TestCase):
             
             self.assertEqual(len(self.map), len(keys_set))
 
-            keys = self.map.keys()
+            keys = list(self.map.keys())
 
             for key in keys:
                 self.map.remove(key)
@@ -170,6 +170,73 @@ class HashTableQuadraticProbingTest(unittest.TestCase):
 
         self.assertEqual(0, len(self.map))
 
+    def testFromItems(self):
+        pymap = {key: key * 2 for key in self.gen_rand_list(self.MAX_SIZE)}
+
+        for items in (pymap, list(pymap.items()), iter(pymap.items())):
+            table = HashTableQuadraticProbing.from_items(items)
+            self.assertEqual(len(pymap), len(table))
+            for key in pymap:
+                self.assertEqual(pymap[key], table[key])
+            # The table is allocated once, at the capacity its constructor picks
+            # for the number of keys
+            self.assertEqual(HashTableQuadraticProbing(int(len(pymap) / 0.65) + 1).get_capacity(),
+                             table.get_capacity())
+
+        # An expected size which is too small still inserts everything
+        table = HashTableQuadraticProbing.from_items(((i, i) for i in range(100)), expected_size=10)
+        self.assertEqual(100, len(table))
+        for i in range(100):
+            self.assertEqual(i, table[i])
+
+    def testUpdate(self):
+        pymap = {}
+        for _ in range(10):
+            pairs = [(key, random.random()) for key in self.gen_rand_list(self.MAX_SIZE)]
+            pymap.update(pairs)
+            self.map.update(pairs)
+            self.assertEqual(len(pymap), len(self.map))
+            for key in pymap:
+                self.assertEqual(pymap[key], self.map[key])
+
+        # Overwriting keys which are all in the table does not grow it
+        capacity = self.map.get_capacity()
+        self.map.update({key: 0 for key in pymap})
+        self.assertEqual(capacity, self.map.get_capacity())
+        self.assertEqual(len(pymap), len(self.map))
+
+    def testChurnCompaction(self):
+        for i in range(100):
+            self.map[i] = i
+        capacity = self.map.get_capacity()
+
+        # Keep the number of live keys flat while churning through new keys
+        for i in range(100, 10000):
+            self.map[i] = i
+            self.assertEqual(i - 100, self.map.remove(i - 100))
+            self.assertEqual(100, len(self.map))
+
+        self.assertEqual(capacity, self.map.get_capacity())
+        self.assertTrue(self.map.compaction_count > 0)
+        for i in range(9900, 10000):
+            self.assertEqual(i, self.map[i])
+
+    def testCompact(self):
+        for i in range(1000):
+            self.map[i] = i
+        for i in range(0, 1000, 2):
+            self.map.remove(i)
+        self.assertEqual(500, self.map.tombstone_count())
+
+        before, after = self.map.compact()
+        self.assertEqual(500, before["tombstones"])
+        self.assertEqual(0, after["tombstones"])
+        self.assertEqual(0, self.map.tombstone_ratio())
+        self.assertEqual(500, after["keys"])
+        self.assertTrue(after["max_probe_length"] >= 1)
+        for i in range(1, 1000, 2):
+            self.assertEqual(i, self.map[i])
+
     def testRandomMapOperations(self):
         pymap = {}
         
@@ -0,0 +1,151 @@
+"""
+An implementation of an open-addressing hash-table using Robin Hood hashing.
+
+Keys are probed linearly, but on insertion a key which has travelled further
+from its home slot than the resident key takes over the slot and the resident
+key continues probing instead. This keeps the variance of the probe lengths
+low and lets unsuccessful lookups stop as soon as they meet a key which is
+closer to its home slot than the key being searched for. Deletion shifts the
+following keys back by one slot, so no tombstones are ever left behind.
+
+Linear probing keeps keys with nearby hashes in one run of slots, so the home
+slot of a key is taken from a Fibonacci scramble of its hash. Otherwise
+clustered integer keys would build long runs which every probe has to walk.
+
+"""
+
+from HashTableOpenAddressingBase import HashTableOpenAddressingBase, fibonacci_hash
+
+class HashTableRobinHood(HashTableOpenAddressingBase):
+    def __init__(self, capacity=7, load_factor=0.65):
+        super().__init__(capacity, load_factor)
+
+    def setup_probing(self, key_hash):
+        pass
+
+    def probe(self, x):
+        return x
+
+    # Any capacity works since linear probing with a step of one
+    # visits every bucket
+    def adjust_capacity(self):
+        pass
+
+    def home_slot(self, key_hash):
+        return fibonacci_hash(key_hash) % self.capacity
+
+    # Returns how far the key stored at index i is from its home slot
+    def probe_distance(self, i):
+        return self.normalise_index(i - self.home_slot(self._hashes[i]))
+
+    # Returns the index of the slot holding key or -1 if it does not exist
+    def _find(self, key, key_hash):
+        i = self.home_slot(key_hash)
+        dist = 0
+
+        while True:
+            # Every key further along the probe sequence is closer to its
+            # home slot than we are, so our key cannot be in the table
+            if self._keys[i] is None or self.probe_distance(i) < dist:
+                if self._stats is not None: self._stats.record_probes(dist + 1)
+                return -1
+            if self._hashes[i] == key_hash and self._keys[i] == key:
+                if self._stats is not None: self._stats.record_probes(dist + 1)
+                return i
+            i = self.normalise_index(i + 1)
+            dist += 1
+
+    # Places a key known to be absent from the table starting at index i,
+    # which is dist slots away from the key's home slot. Resident keys which
+    # are closer to their home slot are displaced further down the table.
+    def _place(self, i, dist, key, key_hash, val):
+        while self._keys[i] is not None:
+            existing = self.probe_distance(i)
+            if existing < dist:
+                key, self._keys[i] = self._keys[i], key
+                val, self._values[i] = self._values[i], val
+                key_hash, self._hashes[i] = self._hashes[i], key_hash
+                dist = existing
+            i = self.normalise_index(i + 1)
+            dist += 1
+
+        self._keys[i] = key
+        self._values[i] = val
+        self._hashes[i] = key_hash
+        self.key_count += 1
+        self.used_buckets += 1
+
+    def _put(self, key, key_hash, val):
+        i = self.home_slot(key_hash)
+        dist = 0
+
+        # Look for the key, stopping at the first slot where it would have
+        # displaced the resident key had it been inserted
+        while self._keys[i] is not None and self.probe_distance(i) >= dist:
+            if self._hashes[i] == key_hash and self._keys[i] == key:
+                old_value = self._values[i]
+                self._values[i] = val
+                self.modification_count += 1
+                if self._stats is not None: self._stats.record_probes(dist + 1)
+                return old_value
+            i = self.normalise_index(i + 1)
+            dist += 1
+
+        if self._stats is not None: self._stats.record_probes(dist + 1)
+        self._place(i, dist, key, key_hash, val)
+        self.modification_count += 1
+        return None
+
+    def _reinsert(self, key, key_hash, val):
+        self._place(self.home_slot(key_hash), 0, key, key_hash, val)
+
+    def contains_key(self, key):
+        if key is None:
+            raise ValueError("Null key")
+        return self._find(key, hash(key)) != -1
+
+    def __getitem__(self, key):
+        if key is None: raise ValueError("Null key")
+        i = self._find(key, hash(key))
+        return None if i == -1 else self._values[i]
+
+    # Looks up a batch of keys, stopping unsuccessful probes early
+    def get_many(self, keys):
+        if not isinstance(keys, (list, tuple)):
+            keys = list(keys)
+        hashes = self._hash_all(keys)
+        find = self._find
+        values = self._values
+
+        result = []
+        for key, key_hash in zip(keys, hashes):
+            i = find(key, key_hash)
+            result.append(None if i == -1 else values[i])
+        return result
+
+    # Removes a key from the map and returns the value. The keys following
+    # it are shifted back one slot until a key already at its home slot or
+    # an empty slot is found, which keeps the table free of tombstones.
+    def _remove(self, key, key_hash):
+        i = self._find(key, key_hash)
+        if i == -1:
+            return None
+
+        old_value = self._values[i]
+        j = self.normalise_index(i + 1)
+
+        while self._keys[j] is not None and self.probe_distance(j) > 0:
+            self._keys[i] = self._keys[j]
+            self._values[i] = self._values[j]
+            self._hashes[i] = self._hashes[j]
+            i = j
+            j = self.normalise_index(j + 1)
+
+        self._keys[i] = None
+        self._values[i] = None
+        self._hashes[i] = None
+
+        self.key_count -= 1
+        self.used_buckets -= 1
+        self.modification_count += 1
+        return old_value
@@ -0,0 +1,192 @@
+from HashTableRobinHood import HashTableRobinHood
+import unittest
+import random
+
+class HashObject:
+    def __init__(self, hash, data):
+        self.hash = hash
+        self.data = data
+
+    def __eq__(self, other):
+        if not isinstance(other, HashObject):
+            return False
+        return self.hash == other.hash and self.data == other.data
+
+    def __hash__(self):
+        return self.hash
+
+
+class HashTableRobinHoodTest(unittest.TestCase):
+    LOOPS = random.randint(2500, 7500)
+    MAX_SIZE = random.randint(1, 750)
+    MAX_RAND_NUM = random.randint(1, 350)
+
+    @classmethod
+    def setUp(cls):
+        cls.map = HashTableRobinHood()
+
+    def testNullKey(self):
+        with self.assertRaises(ValueError):
+            self.map[None] = 5
+
+    def testIllegalCreation1(self):
+        with self.assertRaises(ValueError):
+            HashTableRobinHood(-3, 0.5)
+
+    def testIllegalCreation2(self):
+        with self.assertRaises(ValueError):
+            HashTableRobinHood(5, float('inf'))
+
+    def testLegalCreation(self):
+        HashTableRobinHood(6, 0.9)
+
+    def testUpdatingValue(self):
+        self.map[1] = 1
+        self.assertEqual(1, self.map[1])
+
+        self.map[1] = 5
+        self.assertEqual(5, self.map[1])
+
+        self.map[1] = -7
+        self.assertEqual(-7, self.map[1])
+        self.assertEqual(1, len(self.map))
+
+    def testIterator(self):
+        rand_nums = self.gen_rand_list(self.MAX_SIZE)
+        for key in rand_nums:
+            self.map[key] = key
+
+        count = 0
+        for key in self.map:
+            self.assertEqual(key, self.map[key])
+            self.assertTrue(key in rand_nums)
+            count += 1
+
+        self.assertEqual(len(set(rand_nums)), count)
+
+    def testRemoveComplex1(self):
+        o1 = HashObject(88, 1)
+        o2 = HashObject(88, 2)
+        o3 = HashObject(88, 3)
+        o4 = HashObject(88, 4)
+
+        self.map[o1] = 111
+        self.map[o2] = 111
+        self.map[o3] = 111
+        self.map[o4] = 111
+
+        self.map.remove(o2)
+        self.map.remove(o3)
+        self.map.remove(o1)
+        self.map.remove(o4)
+
+        self.assertEqual(0, len(self.map))
+
+    def testNoTombstones(self):
+        for i in range(1000):
+            self.map[i] = i
+        for i in range(0, 1000, 2):
+            self.assertEqual(i, self.map.remove(i))
+
+        self.assertEqual(0, self.map.tombstone_count())
+        self.assertTrue(self.isRobinHood(self.map))
+        for i in range(1000):
+            self.assertEqual(i % 2 == 1, self.map.contains_key(i))
+
+    def testClusteredKeys(self):
+        # Runs of consecutive integer IDs, which would fill runs of
+        # neighbouring slots without scrambled home slots
+        rng = random.Random(1)
+        keys = [start + i for start in rng.sample(range(0, 10 ** 7, 1000), 200)
+                for i in range(100)]
+        for key in keys:
+            self.map[key] = key
+
+        stats = self.map.probe_stats()
+        self.assertLess(stats["average_probe_length"], 2)
+        self.assertLessEqual(stats["max_probe_length"], 16)
+        self.assertTrue(self.isRobinHood(self.map))
+        for key in keys:
+            self.assertEqual(key, self.map[key])
+
+    def testBatchOperations(self):
+        pymap = {}
+        for _ in range(10):
+            pairs = [(key, random.random()) for key in self.gen_rand_list(self.MAX_SIZE)]
+            expected = []
+            for key, val in pairs:
+                expected.append(pymap.get(key, None))
+                pymap[key] = val
+            self.assertEqual(expected, self.map.put_many(pairs))
+
+            keys = self.gen_rand_list(self.MAX_SIZE)
+            self.assertEqual([pymap.get(key, None) for key in keys], self.map.get_many(keys))
+
+            keys = self.gen_rand_list(self.MAX_SIZE // 2)
+            self.assertEqual([pymap.pop(key, None) for key in keys], self.map.remove_many(keys))
+            self.assertEqual(len(pymap), len(self.map))
+
+        # Putting keys which are all in a full table again does not grow it
+        table = HashTableRobinHood.from_items((i, i) for i in range(100))
+        capacity = table.get_capacity()
+        self.assertEqual(list(range(100)), table.put_many([(i, -i) for i in range(100)]))
+        self.assertEqual(capacity, table.get_capacity())
+
+        with self.assertRaises(ValueError):
+            self.map.get_many([1, None])
+
+    def testRandomMapOperations(self):
+        pymap = {}
+
+        for _ in range(self.LOOPS):
+            self.map.clear()
+            pymap.clear()
+
+            probability1 = random.random()
+            probability2 = random.random()
+
+            nums = self.gen_rand_list(self.MAX_SIZE)
+            for i in range(self.MAX_SIZE):
+                r = random.random()
+
+                key = nums[i]
+                val = i
+
+                if r < probability1:
+                    self.assertEqual(self.map.__setitem__(key, val), pymap.get(key, None))
+                    pymap[key] = val
+
+                self.assertEqual(pymap.get(key, None), self.map[key])
+                self.assertEqual(key in pymap, self.map.contains_key(key))
+
+                if r > probability2:
+                    self.assertEqual(pymap.pop(key, None), self.map.remove(key))
+
+                self.assertEqual(pymap.get(key, None), self.map[key])
+                self.assertEqual(key in pymap, self.map.contains_key(key))
+                self.assertEqual(len(pymap), len(self.map))
+
+            self.assertTrue(self.isRobinHood(self.map))
+
+    # Checks that no key is further from its home slot than
+    # one more than the key preceding it
+    def isRobinHood(self, table):
+        for i in range(table.get_capacity()):
+            j = (i + 1) % table.get_capacity()
+            if table._keys[j] is None:
+                continue
+            if table._keys[i] is None:
+                if table.probe_distance(j) != 0:
+                    return False
+            elif table.probe_distance(j) > table.probe_distance(i) + 1:
+                return False
+        return True
+
+    # Generate a list of random numbers
+    def gen_rand_list(self, sz):
+        lst = [random.randint(-self.MAX_RAND_NUM, self.MAX_RAND_NUM) for _ in range(sz)]
+        return lst
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,15 +1,47 @@
 """
 An implementation of a hash-table using separate chaining with a linked list
 
+Each bucket is a plain list of Entry objects, which are slotted so that an
+entry costs a fixed three references instead of an instance dictionary.
+Like Java 8's HashMap, a bucket which collects too many colliding entries is
+turned into a balanced search tree ordered by (hash, key), so that lookups in
+it take O(log(n)) instead of O(n).
+
 """
 
-from collections import deque
+from AVLTreeRecursive import AVLTreeRecursive
+from HashTableStats import HashTableStats
+
+# Orders two keys by hash and then by key so that a bucket of colliding
+# entries can be kept in a balanced search tree. Returns a negative number,
+# zero or a positive number like Java's compareTo.
+#
+# Raises a TypeError if the keys are different but their ordering cannot
+# tell them apart, e.g. keys ordered by a priority field or frozensets
+# ordered by inclusion, since a tree would take them for the same key.
+# Like Java's comparableClassFor, keys are only ordered against keys of
+# the very same type, whose comparison methods may expect their fields.
+def compareKeys(hash1, key1, hash2, key2):
+    if hash1 != hash2:
+        return -1 if hash1 < hash2 else 1
+    if key1 == key2:
+        return 0
+    if type(key1) is not type(key2):
+        raise TypeError("Keys of different types are not ordered: %r and %r"
+                        % (key1, key2))
+    if key1 < key2:
+        return -1
+    if key1 > key2:
+        return 1
+    raise TypeError("Keys are not totally ordered: %r and %r" % (key1, key2))
 
 class Entry:
-    def __init__(self, key, value):
+    __slots__ = ("key", "value", "hash")
+
+    def __init__(self, key, value, keyHash=None):
         self.key = key
         self.value = value
-        self.hash = hash(key)
+        self.hash = hash(key) if keyHash is None else keyHash
 
     def __eq__(self, other):
         if not isinstance(other, Entry):
@@ -19,13 +51,98 @@ class Entry:
             return False
         return self.key == other.key
 
+    # Entries are ordered by compareKeys
+    def __lt__(self, other):
+        return compareKeys(self.hash, self.key, other.hash, other.key) < 0
+
+    def __gt__(self, other):
+        return compareKeys(self.hash, self.key, other.hash, other.key) > 0
+
     def __str__(self):
         return str(self.key) + " => " + str(self.value)
 
+# A bucket holding its entries in an AVL tree. It supports the same
+# operations the hash-table uses on list buckets.
+class TreeBucket:
+    __slots__ = ("tree",)
+
+    def __init__(self, entries):
+        self.tree = AVLTreeRecursive()
+        for entry in entries:
+            self.append(entry)
+
+    def __len__(self):
+        return len(self.tree)
+
+    # In-order traversal of the tree
+    def __iter__(self):
+        stack = []
+        node = self.tree.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.value
+            node = node.right
+
+    # Raises a TypeError if entries with equal hashes have keys which cannot
+    # be ordered, in which case the bucket has to go back to being a list.
+    # The entry is new, so the tree rejecting it as a duplicate means the
+    # ordering of the keys is inconsistent with their equality.
+    def append(self, entry):
+        if not self.tree.insert(entry):
+            raise TypeError("Key ordering is inconsistent with equality: %r" % (entry.key,))
+
+    def remove(self, entry):
+        self.tree.remove(entry)
+
+    def clear(self):
+        self.tree = AVLTreeRecursive()
+
+    # Returns the number of levels a lookup may have to descend
+    def depth(self):
+        return self.tree.height() + 1
+
+    # Searches the tree with the key and its hash directly, so that lookups
+    # and updates do not allocate a probe entry
+    def find(self, key, keyHash):
+        node = self.tree.root
+        try:
+            while node is not None:
+                entry = node.value
+                order = compareKeys(keyHash, key, entry.hash, entry.key)
+                if order < 0:
+                    node = node.left
+                elif order > 0:
+                    node = node.right
+                else:
+                    return entry
+            return None
+        except TypeError:
+            # The key cannot be ordered against a stored key with the same hash
+            pass
+        for entry in self:
+            if entry.key == key:
+                return entry
+        return None
+
 class HashTableSeparateChaining:
     __DEFAULT_CAPACITY = 3
+    # A bucket is turned into a tree once it holds more than TREEIFY_THRESHOLD
+    # entries and back into a list when it shrinks to UNTREEIFY_THRESHOLD
+    TREEIFY_THRESHOLD = 8
+    UNTREEIFY_THRESHOLD = 6
+    # Number of non-empty buckets migrated by each operation during an
+    # incremental resize, and how many empty buckets one step may skip over
+    __REHASH_STEP = 4
+    __REHASH_EMPTY_VISITS = 40
 
-    def __init__(self, capacity=3, maxLoadFactor=0.75):
+    # With incremental=True the table grows like Redis' progressive rehashing:
+    # the new bucket array is allocated straight away but the entries are moved
+    # over a few buckets at a time by the following operations, so no single
+    # insertion pays for rehashing the whole table.
+    def __init__(self, capacity=3, maxLoadFactor=0.75, incremental=False):
         if capacity < 0:
             raise ValueError
         if maxLoadFactor <= 0 or maxLoadFactor == float('inf'):  
@@ -34,7 +151,18 @@ class HashTableSeparateChaining:
         self.size = 0
         self.maxLoadFactor = maxLoadFactor
         self.threshold = int(self.capacity * self.maxLoadFactor)
-        self.table = deque([None for _ in range(self.capacity)])
+        self.table = self.__newTable(self.capacity)
+        # Buckets still waiting to be moved while an incremental resize is in
+        # progress. Buckets below rehashIndex have already been migrated.
+        self.incremental = incremental
+        self.oldTable = None
+        self.oldCapacity = 0
+        self.rehashIndex = 0
+        # Counts structural changes so that iterators can detect concurrent
+        # modification
+        self.modificationCount = 0
+        # Chain length and resize counters, only allocated while stats are enabled
+        self._stats = None
     
     def __len__(self):
         return self.size
@@ -45,136 +173,430 @@ class HashTableSeparateChaining:
     def __normalizeIndex(self, keyHash):
         return keyHash % self.capacity
 
+    # Bucket arrays are plain lists so that buckets can be indexed in O(1)
+    # and a large array can be allocated without a Python level loop
+    def __newTable(self, capacity):
+        return [None] * capacity
+
+    # Returns True while entries are still spread over two bucket arrays
+    def isRehashing(self):
+        return self.oldTable is not None
+
+    # Yields every non-empty bucket, including the ones of an unfinished resize
+    def __buckets(self):
+        for bucket in self.table:
+            if bucket is not None:
+                yield bucket
+        if self.oldTable is not None:
+            for i in range(self.rehashIndex, self.oldCapacity):
+                if self.oldTable[i] is not None:
+                    yield self.oldTable[i]
+
+    # Starts recording chain lengths and resize timings
+    def enable_stats(self):
+        if self._stats is None:
+            self._stats = HashTableStats()
+
+    def disable_stats(self):
+        self._stats = None
+
+    # Returns a snapshot of the recorded counters, or None if stats are disabled
+    def stats(self):
+        if self._stats is None:
+            return None
+        longest = 0
+        for bucket in self.__buckets():
+            if len(bucket) > longest:
+                longest = len(bucket)
+        return self._stats.snapshot(
+            size=self.size,
+            capacity=self.capacity,
+            tombstones=0,
+            max_chain_length=longest,
+        )
+
     # Clears all the contents of the hashtable
     def clear(self):
-        self.table = deque([None for _ in range(self.capacity)])
+        self.table = self.__newTable(self.capacity)
+        self.oldTable = None
+        self.oldCapacity = self.rehashIndex = 0
         self.size = 0
+        self.modificationCount += 1
 
     def __contains__(self, key):
-        bucketIndex = self.__normalizeIndex(hash(key))
-        return self.__bucketSeekEntry(bucketIndex, key) is not None
+        if self.oldTable is not None:
+            self.__rehashStep()
+        keyHash = hash(key)
+        bucketIndex = self.__normalizeIndex(keyHash)
+        if self.__bucketSeekEntry(bucketIndex, key, keyHash) is not None:
+            return True
+        return self.__oldBucketSeekEntry(keyHash, key) is not None
 
+    # Inserts or updates a key and returns its previous value
     def __setitem__(self, key, value):
         if key is None:
             raise ValueError
-        newEntry = Entry(key, value)
-        bucketIndex = self.__normalizeIndex(newEntry.hash)
-        self.__bucketInsertEntry(bucketIndex, newEntry)
+        return self.__put(key, hash(key), value)
+
+    # Inserts or updates a key whose hash has already been computed and
+    # returns the previous value
+    def __put(self, key, keyHash, value):
+        if self.oldTable is not None:
+            self.__rehashStep()
+        # The key may still live in a bucket that has not been migrated yet
+        existingEntry = self.__oldBucketSeekEntry(keyHash, key)
+        if existingEntry is not None:
+            oldValue = existingEntry.value
+            existingEntry.value = value
+            return oldValue
+        bucketIndex = self.__normalizeIndex(keyHash)
+        return self.__bucketInsertEntry(bucketIndex, key, keyHash, value)
 
     def __getitem__(self, key):
         if key is None:
             return None
-        bucketIndex = self.__normalizeIndex(hash(key))
-        entry = self.__bucketSeekEntry(bucketIndex, key)
+        return self.__get(key, hash(key))
+
+    def __get(self, key, keyHash):
+        if self.oldTable is not None:
+            self.__rehashStep()
+        bucketIndex = self.__normalizeIndex(keyHash)
+        entry = self.__bucketSeekEntry(bucketIndex, key, keyHash)
+        if entry is None:
+            entry = self.__oldBucketSeekEntry(keyHash, key)
         if entry is not None:
             return entry.value
         else:
             return None
 
+    # Removes a key and returns its value, or None if it does not exist
     def remove(self, key):
         if key is None:
             return None
-        bucketIndex = self.__normalizeIndex(hash(key))
-        self.__bucketRemoveEntry(bucketIndex, key)
+        return self.__remove(key, hash(key))
 
+    def __remove(self, key, keyHash):
+        if self.oldTable is not None:
+            self.__rehashStep()
+        if self.oldTable is not None:
+            oldIndex = keyHash % self.oldCapacity
+            entry = self.__oldBucketSeekEntry(keyHash, key)
+            if entry is not None:
+                self.__unlinkEntry(self.oldTable, oldIndex, entry)
+                return entry.value
+        bucketIndex = self.__normalizeIndex(keyHash)
+        return self.__bucketRemoveEntry(bucketIndex, key, keyHash)
 
-    # Removes an entry from a given bucket if it exists
-    def __bucketRemoveEntry(self, bucketIndex, key):
-        entry = self.__bucketSeekEntry(bucketIndex, key)
+    # Looks up a batch of keys and returns their values in input order.
+    # Every key is hashed up front, then the bucket array and capacity are
+    # hoisted out of the loop and the hashes are compared before the keys.
+    # During an incremental resize each lookup still migrates a step, and a
+    # key which is not in the new bucket array is looked up in the old one.
+    def get_many(self, keys):
+        if not isinstance(keys, (list, tuple)):
+            keys = list(keys)
+        hashes = [None if key is None else hash(key) for key in keys]
+        if self._stats is not None:
+            # The per-key path records the probe counts
+            get = self.__get
+            return [None if key is None else get(key, keyHash)
+                    for key, keyHash in zip(keys, hashes)]
+
+        # An incremental resize only moves entries from the old bucket array
+        # into this one, which stays in place until the next resize
+        table = self.table
+        capacity = self.capacity
+        scan = self.__scanBucket
+
+        result = []
+        for key, keyHash in zip(keys, hashes):
+            value = None
+            if key is not None:
+                if self.oldTable is not None:
+                    self.__rehashStep()
+                entry = None
+                bucket = table[keyHash % capacity]
+                if bucket is not None:
+                    if type(bucket) is TreeBucket:
+                        entry = bucket.find(key, keyHash)
+                    else:
+                        for candidate in bucket:
+                            if candidate.hash == keyHash and candidate.key == key:
+                                entry = candidate
+                                break
+                if entry is None and self.oldTable is not None:
+                    entry = scan(self.oldTable[keyHash % self.oldCapacity], key, keyHash)
+                if entry is not None:
+                    value = entry.value
+            result.append(value)
+        return result
+
+    # Finds the entry of a key in a bucket of any bucket array, comparing the
+    # hashes before the keys. Returns null if there is no such entry.
+    def __scanBucket(self, bucket, key, keyHash):
+        if bucket is None:
+            return None
+        if type(bucket) is TreeBucket:
+            return bucket.find(key, keyHash)
+        for entry in bucket:
+            if entry.hash == keyHash and entry.key == key:
+                return entry
+        return None
+
+    # Inserts a batch of key-value pairs and returns the previous
+    # values in input order
+    def put_many(self, pairs):
+        if not isinstance(pairs, (list, tuple)):
+            pairs = list(pairs)
+        hashes = []
+        for key, _ in pairs:
+            if key is None:
+                raise ValueError
+            hashes.append(hash(key))
+        put = self.__put
+        return [put(key, keyHash, value) for (key, value), keyHash in zip(pairs, hashes)]
+
+    # Removes a batch of keys and returns their values in input order. Every
+    # key is hashed up front, before the table is modified.
+    def remove_many(self, keys):
+        if not isinstance(keys, (list, tuple)):
+            keys = list(keys)
+        hashes = [None if key is None else hash(key) for key in keys]
+        remove = self.__remove
+        return [None if key is None else remove(key, keyHash)
+                for key, keyHash in zip(keys, hashes)]
+
+    # Removes an entry from a given bucket if it exists and returns its value
+    def __bucketRemoveEntry(self, bucketIndex, key, keyHash):
+        entry = self.__bucketSeekEntry(bucketIndex, key, keyHash)
         if entry is not None:
-            bucket = self.table[bucketIndex]
+            self.__unlinkEntry(self.table, bucketIndex, entry)
+            return entry.value
+        return None
+
+    # Removes an entry known to be in the given bucket, dropping the bucket
+    # list altogether once it becomes empty
+    def __unlinkEntry(self, table, bucketIndex, entry):
+        bucket = table[bucketIndex]
+        if type(bucket) is TreeBucket:
             bucket.remove(entry)
-            self.size -= 1
+            if len(bucket) <= self.UNTREEIFY_THRESHOLD:
+                table[bucketIndex] = list(bucket)
+        else:
+            for i in range(len(bucket)):
+                if bucket[i] is entry:
+                    del bucket[i]
+                    break
+            if not bucket:
+                table[bucketIndex] = None
+        self.size -= 1
+        self.modificationCount += 1
 
-    # Inserts an entry in a given bucket only if the entry does not already
-    # exist in the given bucket, but if it does then update the entry value
-    def __bucketInsertEntry(self, bucketIndex, entry):
-        bucket = self.table[bucketIndex]
+    # Appends an entry to a bucket of the given table, creating the bucket if
+    # needed and turning it into a tree once it grows past the threshold
+    def __appendEntry(self, table, bucketIndex, entry):
+        bucket = table[bucketIndex]
         if bucket is None:
-            self.table[bucketIndex] = bucket = deque([])
-        existingEntry = self.__bucketSeekEntry(bucketIndex, entry.key)
-        if existingEntry is None:
+            table[bucketIndex] = [entry]
+            return
+        try:
+            bucket.append(entry)
+        except TypeError:
+            # The keys can no longer be ordered so fall back to a list
+            table[bucketIndex] = bucket = list(bucket)
             bucket.append(entry)
+            return
+        if len(bucket) == self.TREEIFY_THRESHOLD + 1 and type(bucket) is list:
+            try:
+                table[bucketIndex] = TreeBucket(bucket)
+            except TypeError:
+                pass
+
+    # Inserts an entry in a given bucket only if the key does not already
+    # exist in the given bucket, but if it does then update the entry value.
+    # Updates modify the existing entry so they do not allocate anything.
+    def __bucketInsertEntry(self, bucketIndex, key, keyHash, value):
+        existingEntry = self.__bucketSeekEntry(bucketIndex, key, keyHash)
+        if existingEntry is None:
+            self.__appendEntry(self.table, bucketIndex, Entry(key, value, keyHash))
             self.size += 1
+            self.modificationCount += 1
             if self.size > self.threshold:
-                self.__resizeTable()
+                if self.incremental:
+                    self.__startIncrementalResize()
+                else:
+                    self.__resizeTable()
+            return None
         else:
-            # oldVal = existingEntry.value
-            existingEntry.value = entry.value
+            oldValue = existingEntry.value
+            existingEntry.value = value
+            return oldValue
 
     # Finds and returns a particular entry in a given bucket if it exists,
-    # return null otherwise
-    def __bucketSeekEntry(self, bucketIndex, key):
+    # return null otherwise. keyHash is the hash the caller already computed.
+    def __bucketSeekEntry(self, bucketIndex, key, keyHash):
         if key is None:
             return None
         bucket = self.table[bucketIndex]
         if bucket is None:
+            if self._stats is not None: self._stats.record_probes(0)
             return None
+        if type(bucket) is TreeBucket:
+            if self._stats is not None: self._stats.record_probes(bucket.depth())
+            return bucket.find(key, keyHash)
+        if self._stats is not None:
+            return self.__bucketSeekEntryCounted(bucket, key)
         for entry in bucket:
             if entry.key == key:
                 return entry
         return None
 
+    # Finds an entry in the not yet migrated part of the old bucket array
+    # during an incremental resize, return null otherwise
+    def __oldBucketSeekEntry(self, keyHash, key):
+        if self.oldTable is None:
+            return None
+        bucket = self.oldTable[keyHash % self.oldCapacity]
+        if bucket is None:
+            return None
+        if type(bucket) is TreeBucket:
+            return bucket.find(key, keyHash)
+        for entry in bucket:
+            if entry.key == key:
+                return entry
+        return None
+
+    # Same as the bucket scan above but records how many entries were visited
+    def __bucketSeekEntryCounted(self, bucket, key):
+        probes = 0
+        for entry in bucket:
+            probes += 1
+            if entry.key == key:
+                self._stats.record_probes(probes)
+                return entry
+        self._stats.record_probes(probes)
+        return None
+
     # Resize the internal table holding buckets of entries
     def __resizeTable(self):
+        if self._stats is not None: start = self._stats.start_resize()
+
         self.capacity *= 2
         self.threshold = int(self.capacity * self.maxLoadFactor)
 
-        newTable = deque([None for _ in range(self.capacity)])
+        newTable = self.__newTable(self.capacity)
 
         for i in range(len(self.table)):
             if self.table[i] is not None:
                 for entry in self.table[i]:
                     bucketIndex = self.__normalizeIndex(entry.hash)
-                    bucket = newTable[bucketIndex]
-                    if bucket is None:
-                        newTable[bucketIndex] = bucket = deque([])
-                    bucket.append(entry)
+                    self.__appendEntry(newTable, bucketIndex, entry)
                 # Avoid memory leak. Help the GC
                 self.table[i].clear()
                 self.table[i] = None
 
         self.table = newTable
 
+        if self._stats is not None: self._stats.end_resize(start)
 
-    def keys(self):
-        keys = deque([])
-        for bucket in self.table:
+    # Doubles the capacity but leaves the entries in the old bucket array,
+    # from where the following operations migrate them a few buckets at a time
+    def __startIncrementalResize(self):
+        # Finish any resize still in progress before starting another one
+        if self.oldTable is not None:
+            self.__migrateBuckets(self.oldCapacity, self.oldCapacity)
+
+        if self._stats is not None: start = self._stats.start_resize()
+
+        self.oldTable = self.table
+        self.oldCapacity = self.capacity
+        self.rehashIndex = 0
+
+        self.capacity *= 2
+        self.threshold = int(self.capacity * self.maxLoadFactor)
+        self.table = self.__newTable(self.capacity)
+
+        if self._stats is not None: self._stats.end_resize(start)
+
+    # Moves up to __REHASH_STEP non-empty buckets from the old bucket array
+    # into the new one, giving up after visiting too many empty buckets
+    def __rehashStep(self):
+        self.__migrateBuckets(self.__REHASH_STEP, self.__REHASH_EMPTY_VISITS)
+
+    # The time spent moving buckets counts towards the resize time, which
+    # otherwise would only cover allocating the new bucket array
+    def __migrateBuckets(self, maxMoved, maxVisited):
+        if self._stats is not None: start = self._stats.start_resize()
+
+        moved = visited = 0
+        while self.rehashIndex < self.oldCapacity and moved < maxMoved \
+                and visited < maxVisited:
+            bucket = self.oldTable[self.rehashIndex]
             if bucket is not None:
                 for entry in bucket:
-                    keys.append(entry.key)
-        return keys
+                    bucketIndex = self.__normalizeIndex(entry.hash)
+                    self.__appendEntry(self.table, bucketIndex, entry)
+                self.oldTable[self.rehashIndex] = None
+                moved += 1
+            self.rehashIndex += 1
+            visited += 1
 
-    def values(self):
-        values = deque([])
-        for bucket in self.table:
-            if bucket is not None:
+        if self.rehashIndex == self.oldCapacity:
+            self.oldTable = None
+            self.oldCapacity = self.rehashIndex = 0
+
+        if self._stats is not None: self._stats.add_resize_time(start)
+
+    # Lazily walks the entries in place. Raises a RuntimeError if the table
+    # is structurally modified while the walk is in progress.
+    #
+    # During an incremental resize the walk goes one old bucket r at a time,
+    # together with the new buckets r and r + oldCapacity which its entries
+    # migrate to, and collects the entries of these buckets before yielding
+    # any of them. Migrating a bucket then only moves entries the walk has
+    # either finished with or not reached yet, so rehashing carries on while
+    # an iterator is suspended.
+    def __entries(self):
+        expectedCount = self.modificationCount
+        span = self.oldCapacity if self.oldTable is not None else self.capacity
+        for r in range(span):
+            if self.oldTable is None:
+                buckets = [self.table[r]]
+                if r + span < self.capacity:
+                    buckets.append(self.table[r + span])
+            else:
+                buckets = [self.oldTable[r], self.table[r], self.table[r + span]]
+                buckets = [[entry for bucket in buckets if bucket is not None
+                            for entry in bucket]]
+            for bucket in buckets:
+                if bucket is None:
+                    continue
                 for entry in bucket:
-                    values.append(entry.value)
-        return values
+                    if self.modificationCount != expectedCount:
+                        raise RuntimeError("Concurrent modification")
+                    yield entry
+
+    # Returns a lazy iterator over the keys
+    def keys(self):
+        return (entry.key for entry in self.__entries())
+
+    # Returns a lazy iterator over the values
+    def values(self):
+        return (entry.value for entry in self.__entries())
+
+    # Returns a lazy iterator over the (key, value) pairs
+    def items(self):
+        return ((entry.key, entry.value) for entry in self.__entries())
 
     # Returns an iterator to iterate over all the keys in this map
     def __iter__(self):
-        bucketIndex = 0
-        self.arr = deque([])
-        # bucketIter = None if self.table[0] is None else self.table[0]
-        # if bucketIter is None or len(bucketIter) == 0:
-        while bucketIndex < self.capacity:
-            if self.table[bucketIndex] is not None:
-                bucket = self.table[bucketIndex]
-                for entry in bucket:
-                    self.arr.append(entry.key)
-            bucketIndex += 1
-
-        return iter(self.arr)
+        return self.keys()
 
     # Returns a string representation of this hash table
     def __str__(self):
         result = "{"
-        for i in range(self.capacity):
-            if self.table[i] is None:
-                continue
-            for entry in self.table[i]:
+        for bucket in self.__buckets():
+            for entry in bucket:
                 result += str(entry) + ", "
         result += "}"
         return result
@@ -1,7 +1,8 @@
+import functools
 import unittest
 import random
 from collections import deque
-from HashTableSeparateChaining import HashTableSeparateChaining
+from HashTableSeparateChaining import HashTableSeparateChaining, Entry
 
 class HashObject:
     def __init__(self, hash, data):
@@ -16,6 +17,70 @@ class HashObject:
     def __hash__(self):
         return self.hash
 
+# Orderable key whose hash always collides
+class CollidingKey:
+    def __init__(self, data):
+        self.data = data
+
+    def __eq__(self, other):
+        return isinstance(other, CollidingKey) and self.data == other.data
+
+    def __lt__(self, other):
+        return self.data < other.data
+
+    def __gt__(self, other):
+        return self.data > other.data
+
+    def __hash__(self):
+        return 7
+
+# Key ordered by a priority which distinct keys can share, with a weak hash
+class PriorityKey:
+    def __init__(self, name, priority):
+        self.name = name
+        self.priority = priority
+
+    def __eq__(self, other):
+        return isinstance(other, PriorityKey) and self.name == other.name
+
+    def __lt__(self, other):
+        return self.priority < other.priority
+
+    def __gt__(self, other):
+        return self.priority > other.priority
+
+    def __hash__(self):
+        return len(self.name)
+
+# Sets are ordered by inclusion, which leaves most pairs incomparable
+class CollidingSet(frozenset):
+    def __hash__(self):
+        return 7
+
+# Ordered key which collides with the int 5 and whose comparisons read the
+# field of the other key without checking its type
+@functools.total_ordering
+class FieldKey:
+    def __init__(self, x):
+        self.x = x
+
+    def __eq__(self, other):
+        return isinstance(other, FieldKey) and self.x == other.x
+
+    def __lt__(self, other):
+        return self.x < other.x
+
+    def __hash__(self):
+        return 5
+
+# Orderable colliding key which counts how often it is hashed
+class CountingKey(CollidingKey):
+    hash_calls = 0
+
+    def __hash__(self):
+        CountingKey.hash_calls += 1
+        return 7
+
 class HashTableSeparateChainingTest(unittest.TestCase):
     LOOPS = random.randint(25000, 75000)
     MAX_SIZE = random.randint(1, 750)
@@ -54,6 +119,12 @@ class HashTableSeparateChainingTest(unittest.TestCase):
         self.map[1] = -7
         self.assertTrue(-7 == self.map[1])
 
+    def testSlottedEntry(self):
+        entry = Entry("key", 1)
+        self.assertFalse(hasattr(entry, "__dict__"))
+        self.assertEqual(hash("key"), entry.hash)
+        self.assertEqual(Entry("key", 2), entry)
+
     def testIterator(self):
         map2 = {}
         for _ in range(self.LOOPS):
@@ -87,6 +158,65 @@ class HashTableSeparateChainingTest(unittest.TestCase):
             self.assertEqual(len(mySet), count)
             self.assertEqual(len(map2), count)
 
+    def testViews(self):
+        pymap = {key: key * 2 for key in self.genRandList(self.MAX_SIZE)}
+        for key, val in pymap.items():
+            self.map[key] = val
+
+        self.assertEqual(sorted(pymap.keys()), sorted(self.map.keys()))
+        self.assertEqual(sorted(pymap.values()), sorted(self.map.values()))
+        self.assertEqual(sorted(pymap.items()), sorted(self.map.items()))
+
+        # Views are lazy so the first key is available without a full copy
+        keys = self.map.keys()
+        self.assertTrue(next(keys) in pymap)
+
+    def testConcurrentModification(self):
+        for i in range(10):
+            self.map[i] = i
+
+        with self.assertRaises(RuntimeError):
+            for key in self.map:
+                self.map[key + 100] = key
+
+        with self.assertRaises(RuntimeError):
+            for key in self.map.keys():
+                self.map.remove(key)
+
+        # Updating the value of an existing key is not a structural change
+        for key, val in self.map.items():
+            self.map[key] = val + 1
+
+    def testIteratingDuringIncrementalResize(self):
+        myMap = HashTableSeparateChaining(incremental=True)
+        i = 0
+        while not myMap.isRehashing():
+            myMap[i] = i
+            i += 1
+
+        # Lookups made while iterating migrate buckets under the iterator, which
+        # must still see every key exactly once
+        seen = []
+        for key in myMap:
+            self.assertEqual(key, myMap[key])
+            seen.append(key)
+        self.assertEqual(list(range(i)), sorted(seen))
+
+    def testSuspendedIteratorDoesNotStallResize(self):
+        myMap = HashTableSeparateChaining(incremental=True)
+        i = 0
+        while not myMap.isRehashing():
+            myMap[i] = i
+            i += 1
+
+        it = iter(myMap)
+        seen = [next(it)]
+        for _ in range(i):
+            self.assertEqual(0, myMap[0])
+        self.assertFalse(myMap.isRehashing())
+        seen.extend(it)
+        self.assertEqual(list(range(i)), sorted(seen))
+
     def testRandomRemove(self):
         for _ in range(self.LOOPS):
             myMap = HashTableSeparateChaining()
@@ -100,7 +230,7 @@ class HashTableSeparateChainingTest(unittest.TestCase):
 
             self.assertEqual(len(myMap), len(keys_set))
 
-            keys = myMap.keys()
+            keys = list(myMap.keys())
             for key in keys:
                 myMap.remove(key)
             
@@ -151,6 +281,165 @@ class HashTableSeparateChainingTest(unittest.TestCase):
     
         self.assertEqual(0, len(myMap))
 
+    def testStats(self):
+        self.assertIsNone(self.map.stats())
+
+        self.map.enable_stats()
+        o1 = HashObject(88, 1)
+        o2 = HashObject(88, 2)
+        o3 = HashObject(88, 3)
+        self.map[o1] = 1
+        self.map[o2] = 2
+        self.map[o3] = 3
+        self.assertEqual(3, self.map[o3])
+
+        stats = self.map.stats()
+        self.assertEqual(4, stats["operations"])
+        self.assertEqual({0: 1, 1: 1, 2: 1, 3: 1}, stats["probe_histogram"])
+        self.assertEqual(3, stats["max_probe_length"])
+        self.assertEqual(3, stats["max_chain_length"])
+        self.assertEqual(1, stats["resize_count"])
+
+        self.map.disable_stats()
+        self.assertIsNone(self.map.stats())
+
+    # Moving the buckets of an incremental resize counts as resize time
+    def testIncrementalResizeTime(self):
+        table = HashTableSeparateChaining(incremental=True)
+        table.enable_stats()
+        i = 0
+        while not table.isRehashing():
+            table[i] = i
+            i += 1
+        stats = table.stats()
+        while table.isRehashing():
+            table[0]
+        self.assertEqual(stats["resize_count"], table.stats()["resize_count"])
+        self.assertGreater(table.stats()["resize_time"], stats["resize_time"])
+
+    def testTreeifiedBucket(self):
+        keys = [CollidingKey(i) for i in range(1000)]
+        random.shuffle(keys)
+        for key in keys:
+            self.map[key] = key.data
+
+        self.map.enable_stats()
+        for key in keys:
+            self.assertEqual(key.data, self.map[key])
+        self.assertIsNone(self.map[CollidingKey(-1)])
+
+        # Lookups descend a balanced tree instead of scanning 1000 entries
+        stats = self.map.stats()
+        self.assertEqual(1000, stats["max_chain_length"])
+        self.assertTrue(stats["max_probe_length"] <= 15)
+
+        for key in keys:
+            self.map.remove(key)
+            self.assertFalse(key in self.map)
+        self.assertEqual(0, len(self.map))
+
+    def testUnorderableCollidingKeys(self):
+        objs = [HashObject(88, i) for i in range(50)]
+        for o in objs:
+            self.map[o] = o.data
+        for o in objs:
+            self.assertEqual(o.data, self.map[o])
+        for o in objs:
+            self.map.remove(o)
+        self.assertEqual(0, len(self.map))
+
+    # Colliding keys whose ordering is coarser than their equality must not
+    # be mistaken for one another
+    def testPartiallyOrderedCollidingKeys(self):
+        for keys in ([PriorityKey("task%d" % i, i % 3) for i in range(30)],
+                     [CollidingSet(s) for s in ([], [1], [2], [1, 2], [3], [1, 3], [2, 3], [1, 2, 3],
+                                                [4], [1, 4], [2, 4], [3, 4], [1, 2, 3, 4])]):
+            table = HashTableSeparateChaining()
+            for i, key in enumerate(keys):
+                table[key] = i
+            self.assertEqual(len(keys), len(table))
+            self.assertEqual(len(keys), len(list(table.keys())))
+            for i, key in enumerate(keys):
+                self.assertEqual(i, table[key])
+            for i, key in enumerate(keys):
+                table[key] = -i
+            self.assertEqual([-i for i in range(len(keys))], [table[key] for key in keys])
+            for i, key in enumerate(keys):
+                self.assertEqual(-i, table.remove(key))
+                self.assertFalse(key in table)
+            self.assertEqual(0, len(table))
+
+    # A key of another type colliding with a tree bucket must not be
+    # ordered against the keys in it
+    def testCollidingKeyOfAnotherType(self):
+        keys = [FieldKey(i) for i in range(12)]
+        for i, key in enumerate(keys):
+            self.map[key] = i
+        self.assertIsNone(self.map[5])
+        self.assertFalse(5 in self.map)
+        self.assertIsNone(self.map.remove(5))
+        self.assertIsNone(self.map.put_many([(5, "five")])[0])
+        self.assertEqual("five", self.map[5])
+        self.assertEqual(["five", None], self.map.get_many([5, FieldKey(-1)]))
+        self.assertEqual(list(range(12)), [self.map[key] for key in keys])
+        self.assertEqual("five", self.map.remove(5))
+        self.assertEqual(12, len(self.map))
+
+    # Lookups and updates in a tree bucket hash the key only once
+    def testTreeBucketHashesKeyOnce(self):
+        keys = [CountingKey(i) for i in range(20)]
+        for i, key in enumerate(keys):
+            self.map[key] = i
+        CountingKey.hash_calls = 0
+        for i, key in enumerate(keys):
+            self.assertEqual(i, self.map[key])
+        self.assertEqual(len(keys), CountingKey.hash_calls)
+        CountingKey.hash_calls = 0
+        for i, key in enumerate(keys):
+            self.map[key] = -i
+        self.assertEqual(len(keys), CountingKey.hash_calls)
+
+    # Lookups and updates in a tree bucket do not create entries
+    def testTreeBucketLookupsDoNotAllocate(self):
+        keys = [CollidingKey(i) for i in range(20)]
+        for i, key in enumerate(keys):
+            self.map[key] = i
+
+        created = []
+        init = Entry.__init__
+        def countingInit(entry, *args):
+            created.append(entry)
+            init(entry, *args)
+        Entry.__init__ = countingInit
+        try:
+            for i, key in enumerate(keys):
+                self.assertEqual(i, self.map[key])
+                self.map[key] = -i
+            self.assertIsNone(self.map[CollidingKey(-1)])
+        finally:
+            Entry.__init__ = init
+        self.assertEqual([], created)
+
+    def testBatchOperations(self):
+        pymap = {}
+        for _ in range(10):
+            pairs = [(key, random.random()) for key in self.genRandList(self.MAX_SIZE)]
+            expected = []
+            for key, val in pairs:
+                expected.append(pymap.get(key, None))
+                pymap[key] = val
+            self.assertEqual(expected, self.map.put_many(pairs))
+
+            keys = self.genRandList(self.MAX_SIZE)
+            self.assertEqual([pymap.get(key, None) for key in keys], self.map.get_many(keys))
+
+            keys = self.genRandList(self.MAX_SIZE // 2)
+            self.assertEqual([pymap.pop(key, None) for key in keys], self.map.remove_many(keys))
+            self.assertEqual(len(pymap), len(self.map))
+
+        with self.assertRaises(ValueError):
+            self.map.put_many([(1, 1), (None, 2)])
+
     def testRandomMapOperations(self):
         pymap = {}
         for _ in range(self.LOOPS):
@@ -185,6 +474,74 @@ class HashTableSeparateChainingTest(unittest.TestCase):
                 self.assertEqual(key in pymap, key in self.map)
                 self.assertEqual(len(pymap), len(self.map))
 
+    def testIncrementalResize(self):
+        myMap = HashTableSeparateChaining(incremental=True)
+        for i in range(1000):
+            myMap[i] = i
+
+        # Growing the table only allocates the new bucket array, the
+        # entries are moved over by the following operations
+        capacity = myMap.capacity
+        while myMap.capacity == capacity:
+            myMap[i] = i
+            i += 1
+        self.assertTrue(myMap.isRehashing())
+
+        for key in range(i):
+            self.assertEqual(key, myMap[key])
+        self.assertFalse(myMap.isRehashing())
+        self.assertEqual(i, len(myMap))
+
+    def testIncrementalRandomMapOperations(self):
+        pymap = {}
+        for _ in range(self.LOOPS // 10):
+            pymap.clear()
+            self.map = HashTableSeparateChaining(incremental=True)
+
+            prob1 = random.random()
+            prob2 = random.random()
+            nums = self.genRandList(self.MAX_SIZE)
+            for i in range(self.MAX_SIZE):
+                r = random.random()
+                key = nums[i]
+
+                if r < prob1:
+                    pymap[key] = i
+                    self.map[key] = i
+                if r > prob2:
+                    self.map.remove(key)
+                    pymap.pop(key, None)
+
+                self.assertEqual(pymap.get(key, None), self.map[key])
+                self.assertEqual(key in pymap, key in self.map)
+                self.assertEqual(len(pymap), len(self.map))
+
+            self.assertEqual(sorted(pymap), sorted(self.map))
+
+    # Batches take the inline path while an incremental resize is running
+    def testIncrementalBatchOperations(self):
+        for _ in range(10):
+            self.map = HashTableSeparateChaining(incremental=True)
+            pymap = {}
+            # Tuple keys so that none collides with the CollidingKeys
+            keys = [("k", i) for i in range(random.randint(100, 2000))] + [CollidingKey(i) for i in range(10)]
+            random.shuffle(keys)
+            for key in keys:
+                self.map[key] = pymap[key] = random.random()
+            i = 0
+            while not self.map.isRehashing():
+                self.map[("extra", i)] = pymap[("extra", i)] = i
+                i += 1
+
+            keys = list(pymap) + [("missing", i) for i in range(50)] + [None]
+            random.shuffle(keys)
+            self.assertEqual([pymap.get(key, None) for key in keys], self.map.get_many(iter(keys)))
+
+            keys = random.sample(list(pymap), len(pymap) // 2) + [("missing", 0), None]
+            self.assertEqual([pymap.pop(key, None) for key in keys], self.map.remove_many(iter(keys)))
+            self.assertEqual(len(pymap), len(self.map))
+            self.assertEqual(sorted(pymap.values()), sorted(self.map.values()))
+
     def testRandomIterator(self):
         pymap = {}
         for _ in range(self.LOOPS):
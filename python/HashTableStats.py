@@ -0,0 +1,49 @@
+"""
+Probe and resize counters shared by the hash-table implementations.
+
+A table only creates one of these when its stats mode is turned on, so the
+hot paths pay a single attribute check per operation while it is off.
+
+"""
+
+import time
+
+class HashTableStats:
+    def __init__(self):
+        # Maps a probe count to the number of operations which needed it
+        self.probe_histogram = {}
+        self.operations = 0
+        self.max_probe_length = 0
+        self.resize_count = 0
+        self.resize_time = 0.0
+
+    # Records that an operation visited n slots (or chain entries)
+    def record_probes(self, n):
+        self.probe_histogram[n] = self.probe_histogram.get(n, 0) + 1
+        self.operations += 1
+        if n > self.max_probe_length:
+            self.max_probe_length = n
+
+    def start_resize(self):
+        return time.perf_counter()
+
+    def end_resize(self, start):
+        self.resize_count += 1
+        self.resize_time += time.perf_counter() - start
+
+    # Adds the time spent on a resize which was already counted, such as a
+    # step of an incremental resize
+    def add_resize_time(self, start):
+        self.resize_time += time.perf_counter() - start
+
+    # Returns a copy of the counters merged with any table specific values
+    def snapshot(self, **extra):
+        result = {
+            "operations": self.operations,
+            "probe_histogram": dict(sorted(self.probe_histogram.items())),
+            "max_probe_length": self.max_probe_length,
+            "resize_count": self.resize_count,
+            "resize_time": self.resize_time,
+        }
+        result.update(extra)
+        return result
@@ -0,0 +1,173 @@
+"""
+An indexed min priority queue implementation using a binary heap.
+
+Every element is a key with a separate priority. Alongside the heap, a
+position map records the heap index of every key and is kept up to date by
+swap, so a key can be found in O(1) and removed or given a new priority in
+O(log(n)). This is the priority queue Dijkstra's and Prim's algorithms need:
+a vertex's tentative distance can be lowered in place instead of pushing a
+duplicate entry.
+
+Keys must be hashable and unique, priorities must be comparable.
+
+"""
+
+from BinaryHeap import BinaryHeap
+
+class IndexedBinaryHeap(BinaryHeap):
+    # Construct from (key, priority) pairs using heapify in O(n) time
+    def __init__(self, items=None, arity=2):
+        keys = []
+        # Priorities parallel to the heap array, priorities[i] belongs to heap[i]
+        self.priorities = []
+        # Maps each key to its index in the heap
+        self.positions = {}
+        if items:
+            for key, priority in items:
+                self.__check(key, priority)
+                if key in self.positions:
+                    raise ValueError("Duplicate key: " + str(key))
+                self.positions[key] = len(keys)
+                keys.append(key)
+                self.priorities.append(priority)
+        super().__init__(keys, arity)
+
+    def __check(self, key, priority):
+        if key is None:
+            raise ValueError("Null key")
+        if priority is None:
+            raise ValueError("Null priority")
+
+    def clear(self):
+        super().clear()
+        for i in range(self.heapCapacity):
+            self.priorities[i] = None
+        self.positions.clear()
+
+    # Returns the (key, priority) pair with the smallest priority
+    def peek(self):
+        if not self:
+            return None
+        return self.heap[0], self.priorities[0]
+
+    # Checks whether key is in the heap, O(1)
+    def contains(self, key):
+        return key in self.positions
+
+    def __contains__(self, key):
+        return key in self.positions
+
+    # Returns the priority of key, or None if it is not in the heap
+    def get_priority(self, key):
+        i = self.positions.get(key)
+        return None if i is None else self.priorities[i]
+
+    # Inserts a key which is not in the heap yet, O(log(n))
+    def add(self, key, priority):
+        self.__check(key, priority)
+        if key in self.positions:
+            raise ValueError("Key already in heap: " + str(key))
+
+        if self.heapSize < self.heapCapacity:
+            self.heap[self.heapSize] = key
+            self.priorities[self.heapSize] = priority
+        else:
+            self.heap.append(key)
+            self.priorities.append(priority)
+            self.heapCapacity += 1
+
+        self.positions[key] = self.heapSize
+        self.swim(self.heapSize)
+        self.heapSize += 1
+
+    # Adds (key, priority) pairs, choosing between sifting each one up and
+    # heapifying again like BinaryHeap.add_all. All the pairs are checked
+    # before any is added.
+    def add_all(self, items):
+        items = list(items)
+        batch = set()
+        for key, priority in items:
+            self.__check(key, priority)
+            if key in self.positions or key in batch:
+                raise ValueError("Key already in heap: " + str(key))
+            batch.add(key)
+        super().add_all(items)
+
+    def _place(self, item):
+        key, priority = item
+        if self.heapSize < self.heapCapacity:
+            self.priorities[self.heapSize] = priority
+        else:
+            self.priorities.append(priority)
+        self.positions[key] = self.heapSize
+        super()._place(key)
+
+    # Removes the (key, priority) pair with the smallest priority and adds
+    # the given key in its place
+    def replace_top(self, key, priority):
+        self.__check(key, priority)
+        top = self.poll()
+        self.add(key, priority)
+        return top
+
+    # Changes the priority of a key in the heap, O(log(n))
+    def update_priority(self, key, priority):
+        self.__check(key, priority)
+        i = self.positions.get(key)
+        if i is None:
+            raise KeyError(key)
+        self.priorities[i] = priority
+        # The key moves up if its priority dropped, down otherwise
+        self.swim(i)
+        self.sink(self.positions[key])
+
+    # Lowers the priority of a key. Returns False, leaving the heap
+    # unchanged, if the new priority is not smaller than the current one.
+    def decrease_key(self, key, priority):
+        self.__check(key, priority)
+        i = self.positions.get(key)
+        if i is None:
+            raise KeyError(key)
+        if not priority < self.priorities[i]:
+            return False
+        self.priorities[i] = priority
+        self.swim(i)
+        return True
+
+    # Tests if the priority of node i <= the priority of node j, O(1)
+    def less(self, i, j):
+        return self.priorities[i] <= self.priorities[j]
+
+    # Swap two nodes and their priorities and record their new positions, O(1)
+    def swap(self, i, j):
+        heap = self.heap
+        priorities = self.priorities
+        key_i = heap[i]
+        key_j = heap[j]
+
+        heap[i] = key_j
+        heap[j] = key_i
+        priorities[i], priorities[j] = priorities[j], priorities[i]
+        self.positions[key_j] = i
+        self.positions[key_i] = j
+
+    # Removes a key and returns its priority, or None if it is not in the heap, O(log(n))
+    def remove(self, key):
+        i = self.positions.get(key)
+        if i is None:
+            return None
+        return self.removeAt(i)[1]
+
+    # Removes the node at index i and returns its (key, priority) pair, O(log(n))
+    def removeAt(self, i):
+        if not self:
+            return None
+        key = self.heap[i]
+        priority = self.priorities[i]
+        super().removeAt(i)
+        self.priorities[self.heapSize] = None
+        del self.positions[key]
+        return key, priority
+
+    def __str__(self):
+        return str([(self.heap[i], self.priorities[i]) for i in range(self.heapSize)])
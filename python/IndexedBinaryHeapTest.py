@@ -0,0 +1,154 @@
+from IndexedBinaryHeap import IndexedBinaryHeap
+import unittest
+import heapq
+import random
+
+class IndexedBinaryHeapTest(unittest.TestCase):
+    LOOPS = 1000
+    MAX_SZ = 100
+
+    def testEmpty(self):
+        q = IndexedBinaryHeap()
+        self.assertEqual(len(q), 0)
+        self.assertTrue(not q)
+        self.assertEqual(q.poll(), None)
+        self.assertEqual(q.peek(), None)
+        self.assertEqual(q.remove("a"), None)
+        self.assertFalse(q.contains("a"))
+
+    def testIllegalArguments(self):
+        q = IndexedBinaryHeap([("a", 1)])
+        with self.assertRaises(ValueError):
+            q.add(None, 1)
+        with self.assertRaises(ValueError):
+            q.add("b", None)
+        with self.assertRaises(ValueError):
+            q.add("a", 2)
+        with self.assertRaises(KeyError):
+            q.update_priority("b", 2)
+        with self.assertRaises(ValueError):
+            IndexedBinaryHeap([("a", 1), ("a", 2)])
+
+    def testHeapify(self):
+        for i in range(1, self.LOOPS):
+            priorities = self.genRandList(i)
+            q = IndexedBinaryHeap(list(enumerate(priorities)))
+            self.assertTrue(q.isMinHeap(0))
+            self.assertTrue(self.positionsValid(q))
+            self.assertEqual(sorted(priorities), [q.poll()[1] for _ in range(i)])
+
+    def testUpdatePriority(self):
+        q = IndexedBinaryHeap([("a", 5), ("b", 3), ("c", 8)])
+        q.update_priority("c", 1)
+        self.assertEqual(("c", 1), q.peek())
+        q.update_priority("c", 9)
+        self.assertEqual(("b", 3), q.peek())
+        self.assertFalse(q.decrease_key("a", 6))
+        self.assertEqual(5, q.get_priority("a"))
+        self.assertTrue(q.decrease_key("a", 2))
+        self.assertEqual([("a", 2), ("b", 3), ("c", 9)], [q.poll() for _ in range(3)])
+
+    def testAddAll(self):
+        q = IndexedBinaryHeap([("a", 5)])
+        q.add_all([("b", 3), ("c", 8)])
+        q.add_all((key, priority) for key, priority in enumerate(self.genRandList(self.MAX_SZ)))
+        self.assertTrue(q.isMinHeap(0))
+        self.assertTrue(self.positionsValid(q))
+        self.assertEqual(self.MAX_SZ + 3, len(q))
+        with self.assertRaises(ValueError):
+            q.add_all([("d", 1), ("d", 2)])
+        with self.assertRaises(ValueError):
+            q.add_all([("e", 1), ("a", 2)])
+        self.assertFalse("d" in q or "e" in q)
+        self.assertEqual(self.MAX_SZ + 3, len(q))
+
+        priorities = sorted(q.priorities[:len(q)])
+        self.assertEqual(priorities, [priority for _, priority in q.poll_many(len(q))])
+
+    def testClear(self):
+        q = IndexedBinaryHeap([("aa", 1), ("bb", 2), ("cc", 3)])
+        q.clear()
+        self.assertEqual(len(q), 0)
+        self.assertFalse("aa" in q)
+        q.add("aa", 4)
+        self.assertEqual(("aa", 4), q.poll())
+
+    # Compares against a dict of priorities, taking the minimum by brute force
+    def testRandomisedOperations(self):
+        for _ in range(self.LOOPS // 10):
+            q = IndexedBinaryHeap()
+            model = {}
+            for _ in range(self.MAX_SZ * 5):
+                key = random.randrange(self.MAX_SZ)
+                priority = random.random()
+                r = random.random()
+                if r < 0.3:
+                    if key in model:
+                        q.update_priority(key, priority)
+                    else:
+                        q.add(key, priority)
+                    model[key] = priority
+                elif r < 0.5:
+                    if key in model:
+                        self.assertEqual(priority < model[key], q.decrease_key(key, priority))
+                        model[key] = min(model[key], priority)
+                elif r < 0.7:
+                    self.assertEqual(model.pop(key, None), q.remove(key))
+                elif r < 0.8 and model:
+                    smallest = min(model, key=model.get)
+                    self.assertEqual((smallest, model.pop(smallest)), q.poll())
+                self.assertEqual(key in model, q.contains(key))
+                self.assertEqual(len(model), len(q))
+            self.assertTrue(q.isMinHeap(0))
+            self.assertTrue(self.positionsValid(q))
+
+    # Dijkstra with decrease_key must agree with the lazy deletion
+    # version built on heapq
+    def testDijkstra(self):
+        for _ in range(20):
+            n = random.randint(1, self.MAX_SZ)
+            graph = [[] for _ in range(n)]
+            for _ in range(n * 4):
+                graph[random.randrange(n)].append((random.randrange(n), random.randint(1, 100)))
+            self.assertEqual(self.lazyDijkstra(graph), self.indexedDijkstra(graph))
+            self.assertEqual(self.lazyDijkstra(graph), self.indexedDijkstra(graph, 4))
+
+    def indexedDijkstra(self, graph, arity=2):
+        dist = [None] * len(graph)
+        q = IndexedBinaryHeap([(0, 0)], arity)
+        while q:
+            u, d = q.poll()
+            dist[u] = d
+            for v, w in graph[u]:
+                if dist[v] is not None:
+                    continue
+                if v in q:
+                    q.decrease_key(v, d + w)
+                else:
+                    q.add(v, d + w)
+        return dist
+
+    def lazyDijkstra(self, graph):
+        dist = [None] * len(graph)
+        q = [(0, 0)]
+        while q:
+            d, u = heapq.heappop(q)
+            if dist[u] is not None:
+                continue
+            dist[u] = d
+            for v, w in graph[u]:
+                if dist[v] is None:
+                    heapq.heappush(q, (d + w, v))
+        return dist
+
+    def positionsValid(self, q):
+        if len(q.positions) != len(q):
+            return False
+        return all(q.heap[i] == key for key, i in q.positions.items())
+
+    def genRandList(self, sz):
+        return [random.randint(-sz, sz) for _ in range(sz)]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,215 @@
+"""
+A min priority queue implementation using a pairing heap.
+
+The heap is a tree in which every node is no larger than its children,
+stored with a pointer to the leftmost child and to the next sibling. Two
+heaps are melded by making the root with the larger key the leftmost child
+of the other, O(1), and add is a meld with a one node heap. poll removes
+the root and melds its children back together in two passes: pairs of
+adjacent children from left to right, then the results from right to left,
+which costs O(log(n)) amortized.
+
+add returns the node holding the element. The node is a handle which can
+later be given to decrease_key or remove, O(log(n)) amortized, since it
+can be cut out of the tree without searching for it. A handle stays valid
+after its heap is melded into another one, but must not be used once its
+element has been removed.
+
+Like BinaryHeap, elements can be ordered by a key function and largest
+first with reverse. Only heaps with the same ordering can be melded.
+
+"""
+
+class PairingHeapNode:
+    __slots__ = ("elem", "key", "child", "sibling", "prev")
+
+    def __init__(self, elem, key):
+        self.elem = elem
+        # The element itself when the heap has no key function
+        self.key = key
+        # Leftmost child
+        self.child = None
+        # Next sibling to the right
+        self.sibling = None
+        # The parent of a leftmost child, otherwise the previous sibling
+        self.prev = None
+
+class PairingHeap:
+    def __init__(self, elems=None, key=None, reverse=False):
+        self.key = key
+        self.reverse = reverse
+        self.root = None
+        self.heapSize = 0
+        if elems:
+            self.add_all(elems)
+
+    def __len__(self):
+        return self.heapSize
+
+    def __bool__(self):
+        return self.root is not None
+
+    def clear(self):
+        self.root = None
+        self.heapSize = 0
+
+    def peek(self):
+        if self.root is None:
+            return None
+        return self.root.elem
+
+    # Adds an element and returns its node, O(1)
+    def add(self, elem):
+        if elem is None:
+            raise ValueError
+        node = PairingHeapNode(elem, elem if self.key is None else self.key(elem))
+        self.root = node if self.root is None else self.__link(self.root, node)
+        self.heapSize += 1
+        return node
+
+    # Adds every element of an iterable and returns their nodes, O(m)
+    def add_all(self, elems):
+        elems = list(elems)
+        for elem in elems:
+            if elem is None:
+                raise ValueError
+        return [self.add(elem) for elem in elems]
+
+    # Removes and returns the smallest element, O(log(n)) amortized
+    def poll(self):
+        root = self.root
+        if root is None:
+            return None
+        self.root = self.__mergePairs(root.child)
+        root.child = None
+        self.heapSize -= 1
+        return root.elem
+
+    # Removes and returns the k smallest elements, smallest first
+    def poll_many(self, k):
+        if k < 0:
+            raise ValueError("Illegal k: " + str(k))
+        return [self.poll() for _ in range(min(k, self.heapSize))]
+
+    # Moves every element of other into this heap, leaving other empty, O(1)
+    def meld(self, other):
+        if other is self:
+            raise ValueError("Cannot meld a heap with itself")
+        if other.key is not self.key or other.reverse != self.reverse:
+            raise ValueError("Cannot meld heaps with different orderings")
+        if other.root is not None:
+            self.root = other.root if self.root is None else self.__link(self.root, other.root)
+        self.heapSize += other.heapSize
+        other.clear()
+
+    # Replaces the element of a node with one which is no larger. Returns
+    # False, leaving the heap unchanged, if elem would not move the node
+    # closer to the top. O(log(n)) amortized.
+    def decrease_key(self, node, elem):
+        if elem is None:
+            raise ValueError
+        key = elem if self.key is None else self.key(elem)
+        if not self.__before(key, node.key):
+            return False
+        node.elem = elem
+        node.key = key
+        if node is not self.root:
+            self.__cut(node)
+            self.root = self.__link(self.root, node)
+        return True
+
+    # Removes the element of a node and returns it, O(log(n)) amortized
+    def remove(self, node):
+        if node is self.root:
+            return self.poll()
+        self.__cut(node)
+        subtree = self.__mergePairs(node.child)
+        node.child = None
+        if subtree is not None:
+            self.root = self.__link(self.root, subtree)
+        self.heapSize -= 1
+        return node.elem
+
+    # Tests if key a belongs strictly above key b
+    def __before(self, a, b):
+        return b < a if self.reverse else a < b
+
+    # Makes the root with the later key the leftmost child of the other
+    # and returns the new root. Both nodes must be roots, O(1)
+    def __link(self, a, b):
+        if a.key < b.key if self.reverse else b.key < a.key:
+            a, b = b, a
+        child = a.child
+        b.prev = a
+        b.sibling = child
+        if child is not None:
+            child.prev = b
+        a.child = b
+        return a
+
+    # Detaches a node, with its subtree, from its parent and siblings
+    def __cut(self, node):
+        prev = node.prev
+        if prev.child is node:
+            prev.child = node.sibling
+        else:
+            prev.sibling = node.sibling
+        if node.sibling is not None:
+            node.sibling.prev = prev
+        node.prev = node.sibling = None
+
+    # Melds a list of siblings into one tree and returns its root: adjacent
+    # pairs from left to right, then the results from right to left
+    def __mergePairs(self, first):
+        pairs = []
+        node = first
+        while node is not None:
+            a = node
+            b = a.sibling
+            a.prev = None
+            if b is None:
+                pairs.append(a)
+                break
+            node = b.sibling
+            a.sibling = b.sibling = b.prev = None
+            pairs.append(self.__link(a, b))
+        if not pairs:
+            return None
+        root = pairs.pop()
+        while pairs:
+            root = self.__link(pairs.pop(), root)
+        return root
+
+    # Checks the heap order, the prev pointers and the size of the tree.
+    # This method is just for testing purposes.
+    def isMinHeap(self):
+        if self.root is None:
+            return self.heapSize == 0
+        if self.root.prev is not None or self.root.sibling is not None:
+            return False
+        count = 0
+        stack = [self.root]
+        while stack:
+            parent = stack.pop()
+            count += 1
+            prev = parent
+            child = parent.child
+            while child is not None:
+                if child.prev is not prev or self.__before(child.key, parent.key):
+                    return False
+                stack.append(child)
+                prev = child
+                child = child.sibling
+        return count == self.heapSize
+
+    def __str__(self):
+        elems = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            elems.append(node.elem)
+            child = node.child
+            while child is not None:
+                stack.append(child)
+                child = child.sibling
+        return str(elems)
@@ -0,0 +1,165 @@
+from PairingHeap import PairingHeap
+import unittest
+import heapq
+import random
+
+class PairingHeapTest(unittest.TestCase):
+    LOOPS = 1000
+    MAX_SZ = 100
+
+    def testEmpty(self):
+        q = PairingHeap()
+        self.assertEqual(len(q), 0)
+        self.assertTrue(not q)
+        self.assertEqual(q.poll(), None)
+        self.assertEqual(q.peek(), None)
+        self.assertTrue(q.isMinHeap())
+
+    def testIllegalArguments(self):
+        q = PairingHeap([1])
+        with self.assertRaises(ValueError):
+            q.add(None)
+        with self.assertRaises(ValueError):
+            q.add_all([2, None])
+        self.assertEqual(1, len(q))
+        with self.assertRaises(ValueError):
+            q.meld(q)
+        with self.assertRaises(ValueError):
+            q.meld(PairingHeap(reverse=True))
+        with self.assertRaises(ValueError):
+            q.poll_many(-1)
+
+    def testPollOrder(self):
+        for i in range(1, self.LOOPS):
+            nums = self.genRandList(i % self.MAX_SZ + 1)
+            q = PairingHeap(nums)
+            self.assertTrue(q.isMinHeap())
+            self.assertEqual(min(nums), q.peek())
+            self.assertEqual(sorted(nums), q.poll_many(len(nums)))
+            self.assertEqual(0, len(q))
+
+    def testKeyAndReverse(self):
+        words = ["%x" % random.randrange(16 ** random.randint(1, 6)) for _ in range(self.MAX_SZ)]
+        q = PairingHeap(words, key=len, reverse=True)
+        self.assertTrue(q.isMinHeap())
+        self.assertEqual(sorted(map(len, words), reverse=True), [len(w) for w in q.poll_many(len(words))])
+
+        q = PairingHeap(words, key=len)
+        self.assertEqual(sorted(map(len, words)), [len(w) for w in q.poll_many(len(words))])
+
+    def testMeld(self):
+        for _ in range(self.LOOPS // 10):
+            shards = [PairingHeap(self.genRandList(random.randint(0, self.MAX_SZ)))
+                      for _ in range(random.randint(1, 10))]
+            expected = sorted(sum((q.poll_many(len(q)) for q in shards), []))
+            shards = [PairingHeap(expected[i::len(shards)]) for i in range(len(shards))]
+            merged = shards[0]
+            for q in shards[1:]:
+                merged.meld(q)
+                self.assertEqual(0, len(q))
+                self.assertIsNone(q.peek())
+            self.assertTrue(merged.isMinHeap())
+            self.assertEqual(len(expected), len(merged))
+            self.assertEqual(expected, merged.poll_many(len(merged)))
+
+    # Handles stay valid after their heap is melded into another one
+    def testHandlesSurviveMeld(self):
+        a = PairingHeap([5, 7])
+        b = PairingHeap()
+        nodes = b.add_all([9, 8])
+        a.meld(b)
+        self.assertTrue(a.decrease_key(nodes[0], 1))
+        self.assertFalse(a.decrease_key(nodes[1], 8))
+        self.assertEqual(8, a.remove(nodes[1]))
+        self.assertTrue(a.isMinHeap())
+        self.assertEqual([1, 5, 7], a.poll_many(3))
+
+    # Compares against a dict of values, taking the minimum by brute force
+    def testRandomisedOperations(self):
+        for _ in range(self.LOOPS // 10):
+            q = PairingHeap()
+            model = {}
+            for _ in range(self.MAX_SZ * 5):
+                r = random.random()
+                if r < 0.35:
+                    value = random.random()
+                    node = q.add(value)
+                    model[node] = value
+                elif r < 0.55 and model:
+                    node = random.choice(list(model))
+                    value = random.random()
+                    self.assertEqual(value < model[node], q.decrease_key(node, value))
+                    model[node] = min(model[node], value)
+                elif r < 0.75 and model:
+                    node = random.choice(list(model))
+                    self.assertEqual(model.pop(node), q.remove(node))
+                elif r < 0.9 and model:
+                    smallest = min(model, key=model.get)
+                    self.assertEqual(model.pop(smallest), q.poll())
+                self.assertEqual(len(model), len(q))
+                if model:
+                    self.assertEqual(min(model.values()), q.peek())
+            self.assertTrue(q.isMinHeap())
+
+    # Dijkstra with decrease_key must agree with the lazy deletion
+    # version built on heapq
+    def testDijkstra(self):
+        for _ in range(20):
+            n = random.randint(1, self.MAX_SZ)
+            graph = [[] for _ in range(n)]
+            for _ in range(n * 4):
+                graph[random.randrange(n)].append((random.randrange(n), random.randint(1, 100)))
+            self.assertEqual(self.lazyDijkstra(graph), self.pairingDijkstra(graph))
+
+    def pairingDijkstra(self, graph):
+        dist = [None] * len(graph)
+        nodes = {}
+        q = PairingHeap(key=lambda entry: entry[0])
+        nodes[0] = q.add((0, 0))
+        while q:
+            d, u = q.poll()
+            del nodes[u]
+            dist[u] = d
+            for v, w in graph[u]:
+                if dist[v] is not None:
+                    continue
+                if v in nodes:
+                    q.decrease_key(nodes[v], (d + w, v))
+                else:
+                    nodes[v] = q.add((d + w, v))
+        return dist
+
+    def lazyDijkstra(self, graph):
+        dist = [None] * len(graph)
+        q = [(0, 0)]
+        while q:
+            d, u = heapq.heappop(q)
+            if dist[u] is not None:
+                continue
+            dist[u] = d
+            for v, w in graph[u]:
+                if dist[v] is None:
+                    heapq.heappush(q, (d + w, v))
+        return dist
+
+    # Polling a long chain of siblings must not hit the recursion limit
+    def testLargeHeap(self):
+        nums = list(range(50000, 0, -1))
+        q = PairingHeap(nums)
+        self.assertEqual(list(range(1, 101)), q.poll_many(100))
+        self.assertTrue(q.isMinHeap())
+
+    def testClear(self):
+        q = PairingHeap([3, 1, 2])
+        q.clear()
+        self.assertEqual(0, len(q))
+        self.assertIsNone(q.poll())
+        q.add(4)
+        self.assertEqual(4, q.poll())
+
+    def genRandList(self, sz):
+        return [random.randint(-sz, sz) for _ in range(sz)]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,233 @@
+"""
+A hierarchical timer wheel for scheduling and cancelling deadlines
+
+Time is cut into ticks of resolution seconds. Level 0 of the wheel has one
+bucket for each of the next slots ticks, and every level above has slots
+buckets each covering slots times as many ticks as a bucket of the level
+below, like the digits of the tick written in base slots. A timer is
+placed in the lowest level whose bucket is not the current one, which is
+O(1). Each bucket is a dict keyed by its timers, so a timer is cancelled
+by deleting it from its bucket, also O(1), and cancelled timers take no
+memory at all.
+
+tick(now) walks the ticks up to now, expiring the timers in each level 0
+bucket. When the current tick reaches the start of a bucket of a higher
+level, that bucket is cascaded: its timers are placed again, into lower
+levels. A timer is cascaded at most levels - 1 times before it expires, so
+the cost per timer stays O(1), and stretches of empty levels are skipped
+instead of walked tick by tick.
+
+Deadlines beyond the reach of the top level are kept in a FastBinaryHeap
+of [deadline, timer] entries and moved into the wheel once it turns far
+enough. Cancelling one of those only clears the timer from its entry, and
+the heap is rebuilt without the dead entries once they make up half of it.
+
+"""
+
+import operator
+
+from FastBinaryHeap import FastBinaryHeap
+
+# The level of a timer which is in the fallback heap
+HEAP = -1
+
+class Timer:
+    __slots__ = ("deadline", "tick", "value", "bucket", "level")
+
+    def __init__(self, deadline, tick, value):
+        self.deadline = deadline
+        self.tick = tick
+        self.value = value
+        # The dict holding the timer while it is in the wheel, or its entry
+        # while it is in the heap
+        self.bucket = None
+        # The wheel level, HEAP in the fallback heap, None once the timer
+        # has expired or been cancelled
+        self.level = None
+
+    def pending(self):
+        return self.level is not None
+
+class TimerWheel:
+    def __init__(self, resolution=1.0, slots=256, levels=3, start=0):
+        if resolution <= 0:
+            raise ValueError("Illegal resolution: " + str(resolution))
+        if slots < 2:
+            raise ValueError("Illegal number of slots: " + str(slots))
+        if levels < 1:
+            raise ValueError("Illegal number of levels: " + str(levels))
+        self.resolution = resolution
+        self.slots = slots
+        self.levels = levels
+        # The number of ticks covered by a bucket of each level, and by the
+        # whole wheel
+        self.spans = [slots ** level for level in range(levels + 1)]
+        self.wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        # The number of timers in each level
+        self.counts = [0] * levels
+        # [deadline, timer] entries of the timers too far in the future for
+        # the wheel. The timer of a cancelled entry is None.
+        self.heap = FastBinaryHeap(key=operator.itemgetter(0))
+        self.cancelledInHeap = 0
+        # Every bucket before the current tick has been drained
+        self.current = self.__tickOf(start)
+
+    def __tickOf(self, time):
+        return int(time // self.resolution)
+
+    # The number of pending timers
+    def __len__(self):
+        return sum(self.counts) + len(self.heap) - self.cancelledInHeap
+
+    def __bool__(self):
+        return len(self) > 0
+
+    # Schedules value to expire at deadline and returns its timer, O(1). A
+    # deadline which has already passed expires on the next tick.
+    def schedule(self, deadline, value=None):
+        if deadline is None:
+            raise ValueError("Null deadline")
+        timer = Timer(deadline, int(deadline // self.resolution), value)
+        self.__place(timer)
+        return timer
+
+    # Stops a timer from expiring. Returns False if it had already expired
+    # or been cancelled, O(1).
+    def cancel(self, timer):
+        level = timer.level
+        if level is None:
+            return False
+        if level == HEAP:
+            timer.bucket[1] = None
+            timer.bucket = timer.level = None
+            self.cancelledInHeap += 1
+            if self.cancelledInHeap > len(self.heap) // 2:
+                self.__compactHeap()
+            return True
+        del timer.bucket[timer]
+        self.counts[level] -= 1
+        timer.bucket = timer.level = None
+        return True
+
+    # Moves a pending timer to a new deadline, O(1). Returns False, leaving
+    # the timer expired, if it was no longer pending.
+    def reschedule(self, timer, deadline):
+        if deadline is None:
+            raise ValueError("Null deadline")
+        if not self.cancel(timer):
+            return False
+        timer.deadline = deadline
+        timer.tick = self.__tickOf(deadline)
+        self.__place(timer)
+        return True
+
+    # Advances the wheel to now and returns the values of the timers whose
+    # deadline is at or before now, earliest first
+    def tick(self, now):
+        nowTick = self.__tickOf(now)
+        slots = self.slots
+        level0 = self.wheels[0]
+        expired = []
+        while True:
+            bucket = level0[self.current % slots]
+            if bucket:
+                if self.current < nowTick:
+                    due = list(bucket)
+                    bucket.clear()
+                else:
+                    due = [timer for timer in bucket if timer.deadline <= now]
+                    for timer in due:
+                        del bucket[timer]
+                self.counts[0] -= len(due)
+                due.sort(key=operator.attrgetter("deadline"))
+                for timer in due:
+                    timer.bucket = timer.level = None
+                    expired.append(timer.value)
+            if self.current >= nowTick:
+                return expired
+            self.current = self.__nextTick(nowTick)
+            self.__cascade()
+
+    # The next tick at which a bucket may need draining or cascading, no
+    # further than nowTick
+    def __nextTick(self, nowTick):
+        current = self.current
+        for level in range(self.levels):
+            if self.counts[level]:
+                break
+        else:
+            if not self.heap:
+                return nowTick
+            level = self.levels
+        # Levels below level are empty, so nothing happens before the
+        # start of the next bucket of level
+        span = self.spans[level]
+        return min(nowTick, (current // span + 1) * span)
+
+    # Moves the timers of the buckets starting at the current tick into
+    # lower levels, from the top level down
+    def __cascade(self):
+        current = self.current
+        spans = self.spans
+        if current % spans[self.levels] == 0:
+            self.__pullFromHeap()
+        for level in range(self.levels - 1, 0, -1):
+            span = spans[level]
+            if current % span:
+                continue
+            bucket = self.wheels[level][current // span % self.slots]
+            if not bucket:
+                continue
+            timers = list(bucket)
+            bucket.clear()
+            self.counts[level] -= len(timers)
+            for timer in timers:
+                self.__place(timer)
+
+    # Moves the timers of the heap which the wheel now reaches into it
+    def __pullFromHeap(self):
+        heap = self.heap
+        reach = self.current // self.spans[self.levels]
+        while heap:
+            timer = heap.peek()[1]
+            if timer is None:
+                heap.poll()
+                self.cancelledInHeap -= 1
+            elif timer.tick // self.spans[self.levels] <= reach:
+                heap.poll()
+                self.__place(timer)
+            else:
+                break
+
+    # Puts a timer into the lowest level whose bucket for its tick is not
+    # the current one, or into the heap if no level reaches that far
+    def __place(self, timer):
+        tick = timer.tick
+        current = self.current
+        if tick < current:
+            tick = current
+        slots = self.slots
+        level = 0
+        # Drop a base slots digit of both ticks per level, until the digits
+        # above the level are the same
+        for wheel in self.wheels:
+            high = tick // slots
+            if high == current // slots:
+                bucket = wheel[tick - high * slots]
+                bucket[timer] = None
+                timer.bucket = bucket
+                timer.level = level
+                self.counts[level] += 1
+                return
+            tick = high
+            current //= slots
+            level += 1
+        entry = [timer.deadline, timer]
+        timer.bucket = entry
+        timer.level = HEAP
+        self.heap.add(entry)
+
+    def __compactHeap(self):
+        pending = [entry for entry in self.heap.heap if entry[1] is not None]
+        self.heap = FastBinaryHeap(pending, key=self.heap.key)
+        self.cancelledInHeap = 0
@@ -0,0 +1,97 @@
+from TimerWheel import TimerWheel
+import unittest
+import random
+
+class TimerWheelTest(unittest.TestCase):
+    LOOPS = 200
+
+    def testIllegalArguments(self):
+        with self.assertRaises(ValueError):
+            TimerWheel(0)
+        with self.assertRaises(ValueError):
+            TimerWheel(slots=1)
+        with self.assertRaises(ValueError):
+            TimerWheel(levels=0)
+        with self.assertRaises(ValueError):
+            TimerWheel().schedule(None)
+
+    def testExpiry(self):
+        wheel = TimerWheel(resolution=0.5)
+        wheel.schedule(3.2, "c")
+        wheel.schedule(1.0, "a")
+        wheel.schedule(1.1, "b")
+        self.assertEqual(3, len(wheel))
+        self.assertEqual([], wheel.tick(0.9))
+        self.assertEqual(["a"], wheel.tick(1.0))
+        # b shares a's tick but is not due yet
+        self.assertEqual([], wheel.tick(1.05))
+        self.assertEqual(["b", "c"], wheel.tick(10))
+        self.assertEqual(0, len(wheel))
+        # A deadline in the past expires on the next tick
+        wheel.schedule(2, "late")
+        self.assertEqual(["late"], wheel.tick(10))
+
+    def testCancelAndReschedule(self):
+        wheel = TimerWheel(slots=4, levels=2)
+        near = wheel.schedule(2, "near")
+        far = wheel.schedule(1000, "far")
+        self.assertTrue(wheel.cancel(near))
+        self.assertFalse(wheel.cancel(near))
+        self.assertFalse(near.pending())
+        self.assertTrue(wheel.reschedule(far, 5))
+        self.assertFalse(wheel.reschedule(near, 6))
+        self.assertEqual(1, len(wheel))
+        self.assertEqual(["far"], wheel.tick(5))
+        self.assertFalse(wheel.cancel(far))
+        self.assertFalse(wheel)
+
+    # Cancelled timers in the fallback heap do not pile up
+    def testHeapCompaction(self):
+        wheel = TimerWheel(slots=4, levels=2)
+        timers = [wheel.schedule(100 + i, i) for i in range(1000)]
+        for timer in timers[:-1]:
+            wheel.cancel(timer)
+        self.assertEqual(1, len(wheel))
+        self.assertLessEqual(len(wheel.heap), 2)
+        self.assertEqual([999], wheel.tick(10**6))
+
+    # Compares against a dict of deadlines, expiring by brute force. A small
+    # wheel makes cascades and the fallback heap common.
+    def testRandomisedOperations(self):
+        for _ in range(self.LOOPS):
+            slots = random.randint(2, 5)
+            levels = random.randint(1, 3)
+            resolution = random.choice([1, 0.25, 3])
+            now = random.randint(0, 100)
+            wheel = TimerWheel(resolution, slots, levels, now)
+            model = {}
+            value = 0
+            for _ in range(200):
+                r = random.random()
+                if r < 0.4:
+                    deadline = now + random.choice([-2, 0, 1, 5, 30, 300]) * random.random()
+                    timer = wheel.schedule(deadline, value)
+                    model[timer] = (deadline, value)
+                    value += 1
+                elif r < 0.55 and model:
+                    timer = random.choice(list(model))
+                    self.assertTrue(wheel.cancel(timer))
+                    del model[timer]
+                elif r < 0.7 and model:
+                    timer = random.choice(list(model))
+                    deadline = now + random.random() * 100
+                    self.assertTrue(wheel.reschedule(timer, deadline))
+                    model[timer] = (deadline, timer.value)
+                else:
+                    now += random.choice([0, 0.1, 1, 10, 200]) * random.random()
+                    due = sorted((deadline, value) for timer, (deadline, value) in model.items()
+                                 if deadline <= now)
+                    self.assertEqual([value for _, value in due], wheel.tick(now))
+                    for timer in [t for t in model if model[t][0] <= now]:
+                        self.assertFalse(timer.pending())
+                        del model[timer]
+                self.assertEqual(len(model), len(wheel))
+
+
+if __name__ == "__main__":
+    unittest.main()
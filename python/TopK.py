@@ -0,0 +1,89 @@
+"""
+Keeps the k largest elements seen in a stream.
+
+The elements are held in a min heap of at most k elements whose root is the
+smallest of the current top k. A new element which beats the root replaces it
+with a single sink (replace_top), any other element is dropped after one
+comparison. Memory stays O(k) however long the stream is, and processing m
+elements costs O(m*log(k)) in the worst case and O(m) when most elements are
+dropped. With a key function the elements with the k largest keys are kept.
+
+"""
+
+from FastBinaryHeap import FastBinaryHeap
+
+class TopK(FastBinaryHeap):
+    def __init__(self, k, elems=None, arity=2, key=None):
+        if k <= 0:
+            raise ValueError("Illegal k: " + str(k))
+        self.k = k
+        super().__init__(arity=arity, key=key)
+        if elems is not None:
+            self.add_all(elems)
+
+    # Offers an element. Returns the element which was dropped to make room
+    # for it, the element itself if it did not make the top k, or None if
+    # nothing was dropped.
+    def add(self, elem):
+        if elem is None:
+            raise ValueError
+        if self.heapSize < self.k:
+            super().add(elem)
+            return None
+        if self.keys is None:
+            if elem > self.heap[0]:
+                return self.replace_top(elem)
+            return elem
+        elemKey = self.key(elem)
+        if elemKey > self.keys[0]:
+            top = self.heap[0]
+            self.heap[0] = elem
+            self.keys[0] = elemKey
+            self.sink(0)
+            return top
+        return elem
+
+    # Offers every element of an iterable, which is consumed lazily so that
+    # a stream never has to be held in memory
+    def add_all(self, elems):
+        it = iter(elems)
+        # Fill the heap with the first k elements and heapify them
+        if self.heapSize < self.k:
+            first = []
+            for elem in it:
+                first.append(elem)
+                if self.heapSize + len(first) == self.k:
+                    break
+            super().add_all(first)
+
+        heap = self.heap
+        if self.keys is None:
+            for elem in it:
+                if elem is None:
+                    raise ValueError
+                if elem > heap[0]:
+                    heap[0] = elem
+                    self.sink(0)
+            return
+
+        keys = self.keys
+        key = self.key
+        for elem in it:
+            if elem is None:
+                raise ValueError
+            elemKey = key(elem)
+            if elemKey > keys[0]:
+                heap[0] = elem
+                keys[0] = elemKey
+                self.sink(0)
+
+    # Returns the current top k, largest first, without changing the heap.
+    # With a key function the slots are sorted by their cached keys, so the
+    # key function is not called again.
+    def largest(self):
+        if self.keys is None:
+            return sorted(self.heap[:self.heapSize], reverse=True)
+        keys = self.keys
+        order = sorted(range(self.heapSize), key=keys.__getitem__, reverse=True)
+        heap = self.heap
+        return [heap[i] for i in order]
@@ -0,0 +1,79 @@
+from TopK import TopK
+import unittest
+import heapq
+import random
+
+class TopKTest(unittest.TestCase):
+    LOOPS = 1000
+    MAX_SZ = 100
+
+    def testIllegalK(self):
+        with self.assertRaises(ValueError):
+            TopK(0)
+
+    def testAdd(self):
+        top = TopK(2)
+        self.assertIsNone(top.add(5))
+        self.assertIsNone(top.add(3))
+        self.assertEqual(3, top.add(7))
+        self.assertEqual(1, top.add(1))
+        self.assertEqual([7, 5], top.largest())
+        self.assertEqual(2, len(top))
+
+    def testRandomisedStreams(self):
+        for _ in range(self.LOOPS // 10):
+            k = random.randint(1, self.MAX_SZ)
+            stream = [random.randint(-self.MAX_SZ, self.MAX_SZ)
+                      for _ in range(random.randint(0, self.MAX_SZ * 10))]
+            expected = heapq.nlargest(k, stream)
+
+            top = TopK(k, iter(stream), arity=random.randint(2, 8))
+            self.assertEqual(expected, top.largest())
+            self.assertTrue(top.isMinHeap(0))
+
+            top = TopK(k)
+            for val in stream:
+                top.add(val)
+            self.assertEqual(expected, top.largest())
+
+            # Feeding the stream in chunks must give the same answer
+            top = TopK(k)
+            for i in range(0, len(stream), 7):
+                top.add_all(stream[i:i + 7])
+            self.assertEqual(expected, top.largest())
+            self.assertEqual(sorted(expected), top.poll_many(k))
+
+    def testKey(self):
+        words = ["%x" % random.randrange(16 ** random.randint(1, 6)) for _ in range(self.MAX_SZ * 10)]
+        for k in (1, 5, self.MAX_SZ):
+            expected = heapq.nlargest(k, words, key=len)
+            top = TopK(k, iter(words), key=len)
+            self.assertEqual([len(w) for w in expected], [len(w) for w in top.largest()])
+            top = TopK(k, key=len)
+            for word in words:
+                top.add(word)
+            self.assertEqual([len(w) for w in expected], [len(w) for w in top.largest()])
+
+    # The key of every element is computed once, when it is offered
+    def testKeyComputedOnce(self):
+        calls = []
+        def key(word):
+            calls.append(word)
+            return len(word)
+
+        words = ["%x" % random.randrange(16 ** random.randint(1, 6)) for _ in range(self.MAX_SZ)]
+        top = TopK(10, words, key=key)
+        self.assertEqual(len(words), len(calls))
+        expected = heapq.nlargest(10, words, key=len)
+        self.assertEqual([len(w) for w in expected], [len(w) for w in top.largest()])
+        self.assertEqual(len(words), len(calls))
+
+    # Only k elements are ever stored, however long the stream
+    def testBoundedMemory(self):
+        top = TopK(10, (random.random() for _ in range(10000)))
+        self.assertEqual(10, len(top))
+        self.assertEqual(10, len(top.heap))
+
+
+if __name__ == "__main__":
+    unittest.main()